@@ -0,0 +1,97 @@
+"""
+Mede a vazão (MB/s) do decodificador 3270 em pyx3270.datastream.
+
+Uso:
+    python benchmarks/bench_datastream.py [-n 2000] [-f tela.bin ...]
+
+Sem ``-f``, usa a tela inicial empacotada (bin/start.bin) e uma tela
+sintética com muitos campos. Cada entrada é decodificada ``n`` vezes por
+``feed`` (com a camada telnet, em blocos de 4 KiB, como vindo do socket) e
+por ``apply`` (registro já separado, sem telnet).
+"""
+
+import argparse
+import os
+from time import perf_counter
+
+from pyx3270 import tn3270
+from pyx3270.datastream import DataStreamDecoder, encode_address
+from pyx3270.emulator import BINARY_FOLDER
+
+CHUNK_SIZE = 4096
+
+
+def synthetic_screen(rows: int = 24, cols: int = 80) -> bytes:
+    """Tela com um campo protegido e um de entrada por linha."""
+    record = bytearray(tn3270.EW + b'\xc3')
+    label = 'CAMPO'.encode('cp037')
+    for row in range(rows):
+        record += tn3270.SBA + encode_address(row * cols)
+        record += tn3270.SF + b'\x60' + label + b'\x40' * 14
+        record += tn3270.SF + b'\x40' + 'VALOR'.encode('cp037') * 11
+        record += tn3270.SF + b'\x60'
+    record += tn3270.SBA + encode_address(1) + tn3270.IC
+    return bytes(record).replace(tn3270.IAC, tn3270.IAC * 2) + (
+        tn3270.IAC + tn3270.TN_EOR
+    )
+
+
+def bench_feed(data: bytes, count: int) -> float:
+    decoder = DataStreamDecoder()
+    chunks = [
+        data[start : start + CHUNK_SIZE]
+        for start in range(0, len(data), CHUNK_SIZE)
+    ]
+    start = perf_counter()
+    for _ in range(count):
+        for chunk in chunks:
+            decoder.feed(chunk)
+    return len(data) * count / (perf_counter() - start) / 1e6
+
+
+class RecordCollector(DataStreamDecoder):
+    """Separa os registros (sem telnet) sem aplicá-los."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.collected = []
+
+    def apply(self, record: bytes) -> None:
+        self.collected.append(record)
+
+
+def bench_apply(data: bytes, count: int) -> float:
+    collector = RecordCollector()
+    collector.feed(data)
+    records = collector.collected
+    decoder = DataStreamDecoder()
+    size = sum(len(record) for record in records)
+    start = perf_counter()
+    for _ in range(count):
+        for record in records:
+            decoder.apply(record)
+    return size * count / (perf_counter() - start) / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--count', type=int, default=2000)
+    parser.add_argument('-f', '--files', nargs='+', default=[])
+    args = parser.parse_args()
+
+    inputs = {}
+    for path in args.files or [os.path.join(BINARY_FOLDER, 'start.bin')]:
+        with open(path, 'rb') as fd:
+            inputs[os.path.basename(path)] = fd.read()
+    if not args.files:
+        inputs['sintética'] = synthetic_screen()
+
+    print(f'{"entrada":<12} {"bytes":>7} {"feed":>9} {"apply":>9}  (MB/s)')
+    for name, data in inputs.items():
+        feed = bench_feed(data, args.count)
+        apply = bench_apply(data, args.count)
+        print(f'{name:<12} {len(data):>7} {feed:>9.1f} {apply:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
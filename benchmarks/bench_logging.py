@@ -0,0 +1,95 @@
+"""
+Mede o custo de logging por comando em X3270._exec_command.
+
+Uso:
+    python benchmarks/bench_logging.py [-n 20000] [-s 100]
+
+Um aplicativo falso responde em memória (sem s3270), então o tempo medido
+é apenas o do pyx3270. Cada nível configura o logger ``pyx3270.emulator``
+com um handler para os.devnull e executa ``Enter`` (sem dados) e
+``Ascii`` (24 linhas de dados, como uma leitura de tela completa).
+"""
+
+import argparse
+import logging
+import os
+from time import perf_counter
+from unittest.mock import patch
+
+from pyx3270.emulator import X3270
+from pyx3270.logging_config import command_trace
+
+STATUS = b'U F U C(host) I 4 24 80 0 0 0x0 0.000\n'
+SCREEN = [b'data: ' + b'X' * 80 + b'\n'] * 24
+LEVELS = {
+    'WARNING': logging.WARNING,
+    'INFO': logging.INFO,
+    'DEBUG': logging.DEBUG,
+    'TRACE': 5,
+}
+
+
+class MemoryApp:
+    """Responde em memória: ``Ascii`` devolve 24 linhas, o resto nenhuma."""
+
+    def __init__(self) -> None:
+        self.pending = []
+
+    def write(self, data: bytes) -> None:
+        for cmdstr in data.splitlines():
+            if cmdstr.lower().startswith(b'ascii'):
+                self.pending.extend(SCREEN)
+            self.pending.extend([STATUS, b'ok\n'])
+
+    def readline(self, timeout: float | None = None) -> bytes:
+        return self.pending.pop(0)
+
+
+def bench(level: int, count: int) -> dict[str, float]:
+    emulator_logger = logging.getLogger('pyx3270.emulator')
+    devnull = open(os.devnull, 'w', encoding='utf-8')
+    handler = logging.StreamHandler(devnull)
+    emulator_logger.handlers = [handler]
+    emulator_logger.propagate = False
+    emulator_logger.setLevel(level)
+    try:
+        with patch.object(X3270, '_create_app', return_value=MemoryApp()):
+            em = X3270(model='2')
+        results = {}
+        for cmdstr in ('Enter', 'Ascii()'):
+            for _ in range(count // 10):
+                em._exec_command(cmdstr)
+            start = perf_counter()
+            for _ in range(count):
+                em._exec_command(cmdstr)
+            results[cmdstr] = (perf_counter() - start) / count * 1e6
+        return results
+    finally:
+        emulator_logger.handlers = []
+        devnull.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--count', type=int, default=20000)
+    parser.add_argument(
+        '-l', '--levels', nargs='+', default=list(LEVELS), choices=LEVELS
+    )
+    parser.add_argument(
+        '-s',
+        '--trace-every',
+        type=int,
+        default=1,
+        help='registra em TRACE 1 a cada N comandos',
+    )
+    args = parser.parse_args()
+    command_trace.every = args.trace_every
+
+    print(f'{"nível":<8} {"Enter":>10} {"Ascii()":>10}  (µs/comando)')
+    for name in args.levels:
+        result = bench(LEVELS[name], args.count)
+        print(f'{name:<8} {result["Enter"]:>10.1f} {result["Ascii()"]:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Mede a vazão do proxy de gravação (pyx3270.server.record_handler).
+
+Uso:
+    python benchmarks/bench_proxy.py [-n 5000] [--record] [-f tela.bin]
+
+Um host falso local envia ``n`` telas seguidas; o terminal conectado ao
+proxy lê tudo e o tempo total vira MB/s e registros/s. Com ``--record`` as
+telas também são gravadas em um diretório temporário.
+"""
+
+import argparse
+import os
+import socket
+import tempfile
+import threading
+from time import perf_counter
+from types import SimpleNamespace
+
+from pyx3270 import tn3270
+from pyx3270.emulator import BINARY_FOLDER
+from pyx3270.server import record_handler
+
+RECV_SIZE = 65536
+
+
+def fake_host(server: socket.socket, payload: bytes) -> None:
+    """Envia ``payload`` de uma vez e espera o proxy fechar a conexão."""
+    conn, _ = server.accept()
+    with conn:
+        conn.sendall(payload)
+        while conn.recv(RECV_SIZE):
+            pass
+
+
+def run_proxy(
+    listener: socket.socket, address: str, record_dir: str | None
+) -> None:
+    conn, _ = listener.accept()
+    # Sem TLS o proxy não consulta o emulador além de ``tls``.
+    emu = SimpleNamespace(tls=False)
+    record_handler(conn, emu, address, record_dir, delay=0.001)
+
+
+def bench(screen: bytes, count: int, record_dir: str | None) -> float:
+    payload = screen * count
+    host = socket.create_server(('127.0.0.1', 0))
+    proxy = socket.create_server(('127.0.0.1', 0))
+    address = f'127.0.0.1:{host.getsockname()[1]}'
+    threads = [
+        threading.Thread(target=fake_host, args=(host, payload)),
+        threading.Thread(target=run_proxy, args=(proxy, address, record_dir)),
+    ]
+    for thread in threads:
+        thread.start()
+
+    buffer = bytearray(RECV_SIZE)
+    received = 0
+    with socket.create_connection(proxy.getsockname()) as terminal:
+        start = perf_counter()
+        while received < len(payload):
+            size = terminal.recv_into(buffer)
+            if not size:
+                break
+            received += size
+        elapsed = perf_counter() - start
+
+    for thread in threads:
+        thread.join()
+    host.close()
+    proxy.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--count', type=int, default=5000)
+    parser.add_argument('-f', '--file', default=None)
+    parser.add_argument('--record', action='store_true')
+    args = parser.parse_args()
+
+    path = args.file or os.path.join(BINARY_FOLDER, 'start.bin')
+    with open(path, 'rb') as fd:
+        screen = fd.read()
+    if not screen.endswith(tn3270.IAC + tn3270.TN_EOR):
+        screen += tn3270.IAC + tn3270.TN_EOR
+
+    with tempfile.TemporaryDirectory() as tmp:
+        elapsed = bench(screen, args.count, tmp if args.record else None)
+
+    size = len(screen) * args.count
+    print(f'{"registros":>10} {"bytes":>10} {"MB/s":>8} {"reg/s":>10}')
+    print(
+        f'{args.count:>10} {size:>10} {size / elapsed / 1e6:>8.1f} '
+        f'{args.count / elapsed:>10.0f}'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Mede a vazão do replay com um ou mais workers (pyx3270.prefork).
+
+Uso:
+    python benchmarks/bench_replay.py [-w 1 4] [-c 8] [-n 2000]
+
+Para cada quantidade de workers, ``c`` processos clientes conectam ao
+replay e enviam ``n`` ENTER cada um, lendo a tela devolvida a cada envio.
+O resultado é o total de telas por segundo; só escala com mais workers
+se houver núcleos livres para eles e para os clientes.
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+from time import perf_counter
+
+from pyx3270 import tn3270
+from pyx3270.prefork import PreforkReplay
+
+EOR = tn3270.IAC + tn3270.TN_EOR
+# Duas telas de tamanho igual: o primeiro ENTER avança, os demais repetem.
+SCREENS = {
+    f'{number:03}': tn3270.EW + b'\xc3' + bytes([0xC1 + number]) * 1900 + EOR
+    for number in range(2)
+}
+NEGOTIATION = b'\xff\xfd\x18\xff\xfb\x18'
+ENTER = tn3270.ENTER + b'\x40\x40' + EOR
+
+
+def recv_exactly(sock, size: int) -> None:
+    while size:
+        size -= len(sock.recv(size))
+
+
+def client(port: int, count: int) -> None:
+    with socket.create_connection(('127.0.0.1', port)) as sock:
+        recv_exactly(sock, len(NEGOTIATION) + len(SCREENS['000']))
+        for _ in range(count):
+            sock.sendall(ENTER)
+            recv_exactly(sock, len(SCREENS['001']))
+
+
+def bench(workers: int, clients: int, count: int) -> float:
+    replay = PreforkReplay(SCREENS, '.', workers)
+    port = replay.bind(0, '127.0.0.1')
+    replay.start()
+    try:
+        processes = [
+            multiprocessing.Process(target=client, args=(port, count))
+            for _ in range(clients)
+        ]
+        start = perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return perf_counter() - start
+    finally:
+        for pid in replay.pids:
+            os.kill(pid, signal.SIGTERM)
+        for pid in replay.pids:
+            os.waitpid(pid, 0)
+        replay.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=[1])
+    parser.add_argument('-c', '--clients', type=int, default=8)
+    parser.add_argument('-n', '--count', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f'{"workers":>8} {"telas":>10} {"tempo (s)":>10} {"telas/s":>10}')
+    for workers in args.workers:
+        elapsed = bench(workers, args.clients, args.count)
+        total = args.clients * args.count
+        print(
+            f'{workers:>8} {total:>10} {elapsed:>10.2f} '
+            f'{total / elapsed:>10.0f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
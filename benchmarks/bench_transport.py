@@ -0,0 +1,75 @@
+"""
+Compara a latência por comando dos transportes do s3270 (pipe, unix, tcp).
+
+Uso:
+    python benchmarks/bench_transport.py [-n 2000] [-t pipe unix tcp]
+
+Cada transporte executa ``n`` comandos sem acesso ao host (``Query``) e
+reporta média, mediana, p95 e p99 em microssegundos. O s3270 não precisa
+estar conectado a um host.
+"""
+
+import argparse
+import statistics
+from time import perf_counter
+
+from pyx3270.emulator import Command, S3270App, S3270SocketApp
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def bench(transport: str, count: int, warmup: int) -> list[float]:
+    if transport == 'pipe':
+        app = S3270App('2')
+    else:
+        app = S3270SocketApp('2', transport)
+    try:
+        for _ in range(warmup):
+            Command(app, 'Query(ConnectionState)').execute()
+        samples = []
+        for _ in range(count):
+            start = perf_counter()
+            Command(app, 'Query(ConnectionState)').execute()
+            samples.append((perf_counter() - start) * 1e6)
+        return samples
+    finally:
+        try:
+            Command(app, 'Quit').execute()
+        except Exception:
+            pass
+        app.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--count', type=int, default=2000)
+    parser.add_argument('-w', '--warmup', type=int, default=100)
+    parser.add_argument(
+        '-t',
+        '--transports',
+        nargs='+',
+        default=['pipe', 'unix', 'tcp'],
+        choices=['pipe', 'unix', 'tcp'],
+    )
+    args = parser.parse_args()
+
+    print(
+        f'{"transporte":<10} {"média":>9} {"mediana":>9} '
+        f'{"p95":>9} {"p99":>9}  (µs, n={args.count})'
+    )
+    for transport in args.transports:
+        samples = bench(transport, args.count, args.warmup)
+        print(
+            f'{transport:<10} {statistics.fmean(samples):>9.1f} '
+            f'{statistics.median(samples):>9.1f} '
+            f'{percentile(samples, 95):>9.1f} '
+            f'{percentile(samples, 99):>9.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -11,10 +11,22 @@ Emulador de terminal 3270
 
 """
 
+from pyx3270.aio import AsyncX3270
 from pyx3270.cli import record, replay
 from pyx3270.emulator import X3270
 from pyx3270.offline import PyX3270Manager
+from pyx3270.pool import X3270Pool, session_factory
+from pyx3270.retry import RetryPolicy
 
 __author__ = 'MatheusLPolidoro'
 __version__ = '0.1.1'
-__all__ = ['X3270', 'replay', 'record', 'PyX3270Manager']
+__all__ = [
+    'X3270',
+    'AsyncX3270',
+    'X3270Pool',
+    'session_factory',
+    'RetryPolicy',
+    'replay',
+    'record',
+    'PyX3270Manager',
+]
@@ -0,0 +1,558 @@
+import asyncio
+import os
+import re
+from logging import getLogger
+from time import monotonic
+from typing import Literal
+
+from pyx3270.conditions import Condition, StringCondition
+from pyx3270.emulator import (
+    COMMAND_TIMEOUT,
+    MODEL_DIMENSIONS,
+    MODEL_TYPE,
+    WAIT_BACKOFF_MAX,
+    WAIT_BACKOFF_MIN,
+    Command,
+    S3270App,
+    Screen,
+    Status,
+    Ws3270App,
+    X3270Cmd,
+    wait_slice,
+)
+from pyx3270.exceptions import (
+    CommandError,
+    CommandTimeoutError,
+    FieldTruncateError,
+    KeyboardStateError,
+    NotConnectedException,
+    TerminatedError,
+)
+from pyx3270.iemulator import AbstractAsyncEmulator
+from pyx3270.native import AsyncNativeApp
+from pyx3270.retry import RetryPolicy, RetryStats
+from pyx3270.x3270_commands import X3270Commands, command_result, format_args
+
+logger = getLogger(__name__)
+
+BUILTIN_COMMANDS = frozenset(
+    name for name in vars(X3270Commands) if not name.startswith('__')
+)
+
+
+class AsyncExecutableApp:
+    """Processo s3270/ws3270 controlado por streams do asyncio."""
+
+    fractional_wait = False
+
+    def __init__(
+        self, model: MODEL_TYPE = '2', args: list[str] | None = None
+    ) -> None:
+        base = Ws3270App.args if os.name == 'nt' else S3270App.args
+        self.args = args or base + ['-xrm', f'*model:{model}', '-utf8']
+        self.process: asyncio.subprocess.Process | None = None
+
+    async def start(self) -> None:
+        logger.debug(f'Iniciando processo assíncrono: {self.args}')
+        self.process = await asyncio.create_subprocess_exec(
+            *self.args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        logger.debug(f'Processo iniciado com PID: {self.process.pid}')
+
+    async def write(self, data: bytes) -> None:
+        if self.process is None:
+            raise NotConnectedException
+        self.process.stdin.write(data)
+        await self.process.stdin.drain()
+
+    async def readline(self) -> bytes:
+        if self.process is None:
+            raise NotConnectedException
+        return await self.process.stdout.readline()
+
+    async def close(self) -> int:
+        logger.info('Fechando aplicativo assíncrono')
+        if self.process is None:
+            return 0
+        if self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        return self.process.returncode or 0
+
+
+class AsyncCommand(Command):
+    async def execute(self) -> bool:
+        logger.debug(f'Executando comando: {self.cmdstr}')
+        try:
+            await self.app.write(self.cmdstr + b'\n')
+            return await self.read_response()
+        except Exception:
+            logger.error(f'Erro durante execução do comando: {self.cmdstr}')
+            raise
+
+    async def read_response(self) -> bool:
+        while True:
+            line = await self.app.readline()
+            if not line:
+                raise NotConnectedException
+            if not line.startswith(b'data:'):
+                self.status_line = line.rstrip()
+                result = (await self.app.readline()).rstrip()
+                return self.handle_result(result.decode('utf-8'))
+            self.data.append(line[6:].rstrip(b'\n\r'))
+
+
+class ScreenReader:
+    """Leituras síncronas sobre um Screen, usadas pelas Conditions."""
+
+    def __init__(self, screen: Screen, model_dimensions: dict) -> None:
+        self.screen = screen
+        self.model_dimensions = model_dimensions
+
+    def get_string(self, ypos: int, xpos: int, length: int) -> str:
+        return self.screen.get_string(ypos - 1, xpos - 1, length)
+
+    def get_string_area(
+        self, yposi: int, xposi: int, ypose: int, xpose: int
+    ) -> str:
+        return self.screen.get_area(
+            yposi - 1, xposi - 1, ypose - yposi + 1, xpose - xposi + 1
+        )
+
+    def get_full_screen(self, header: bool = True) -> str:
+        text = self.screen.text
+        return text if header else text[self.model_dimensions['columns'] :]
+
+
+class AsyncX3270(AbstractAsyncEmulator):
+    """
+    Emulador s3270 com API assíncrona. Cada instância usa um subprocesso
+    controlado por streams do asyncio, permitindo que um único event loop
+    conduza centenas de sessões.
+
+    Os builtins do X3270Commands ficam disponíveis como corrotinas
+    (``await em.enter()``, ``await em.ascii(0, 0, 10)``).
+
+    Com ``transport='native'`` não há subprocesso: o TN3270 é falado em
+    Python (pyx3270.native) e a tela fica em memória.
+
+    Como no X3270, cada comando tem até ``command_timeout`` segundos para
+    responder (o processo travado é substituído) e as falhas transitórias
+    são repetidas conforme ``retry_policy``.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        model: MODEL_TYPE = '2',
+        time_unlock: int = 60,
+        screen_cache: bool = False,
+        app: AsyncExecutableApp | AsyncNativeApp | None = None,
+        transport: Literal['pipe', 'native'] = 'pipe',
+        *,
+        command_timeout: float | None = COMMAND_TIMEOUT,
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        logger.info(f'Inicializando AsyncX3270 (model={model})')
+        self.model = model
+        self.model_dimensions = MODEL_DIMENSIONS[model]
+        self.time_unlock = time_unlock
+        self.screen_cache = screen_cache
+        self.screen_cache_hits = 0
+        self.screen_cache_misses = 0
+        self._screen: Screen | None = None
+        self.transport = transport
+        self.command_timeout = command_timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_stats = RetryStats()
+        self._recycling = False
+        self.app = app or self._create_app()
+        self.status = Status(None)
+        self.is_terminated = False
+        self.host = None
+        self.port = None
+        self.tls = None
+        self.mode_3270 = None
+        self._lock = asyncio.Lock()
+
+    # Lógica pura compartilhada com o emulador síncrono.
+    check_limits = X3270Cmd.check_limits
+    _get_ypos_and_xpos_from_index = X3270Cmd._get_ypos_and_xpos_from_index
+    _track_screen_change = X3270Cmd._track_screen_change
+    invalidate_screen = X3270Cmd.invalidate_screen
+    screen_cache_stats = X3270Cmd.screen_cache_stats
+    reset_screen_cache_stats = X3270Cmd.reset_screen_cache_stats
+
+    @property
+    def fractional_wait(self) -> bool:
+        return self.app.fractional_wait
+
+    def __getattr__(self, name: str):
+        if name not in BUILTIN_COMMANDS:
+            raise AttributeError(name)
+
+        async def x3270_builtin_func(*args, **kwargs):
+            return await self._builtin(name, *args, **kwargs)
+
+        return x3270_builtin_func
+
+    def _create_app(
+        self, args: list[str] | None = None
+    ) -> AsyncExecutableApp | AsyncNativeApp:
+        if self.transport == 'native':
+            return AsyncNativeApp(
+                self.model,
+                self.model_dimensions['rows'],
+                self.model_dimensions['columns'],
+            )
+        return AsyncExecutableApp(self.model, args)
+
+    async def __aenter__(self) -> 'AsyncX3270':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.terminate()
+
+    async def start(self) -> 'AsyncX3270':
+        if self.app.process is None:
+            await self.app.start()
+        return self
+
+    async def _builtin(self, func: str, *args, **kwargs):
+        all_args_str = format_args(*args, **kwargs)
+        if func == 'pf':
+            await self._exec_command(f'PF({all_args_str})'.encode('utf8'))
+            await self.wait(self.time_unlock, 'unlock')
+            return
+        if func == 'connect' and (len(args) + len(kwargs)) > 1:
+            return await self.connect_host(*args, **kwargs)
+
+        cmd = await self._exec_command(f'{func}({all_args_str})'.encode())
+        return command_result(cmd)
+
+    async def _exec_command(self, cmdstr: bytes | str) -> AsyncCommand:
+        logger.debug(f'Executando comando: {cmdstr}')
+        if self.is_terminated:
+            logger.error('Tentativa de executar comando em emulador terminado')
+            raise TerminatedError
+        self._track_screen_change(cmdstr)
+        policy = self.retry_policy
+        stats = self.retry_stats
+        attempt = 0
+        first_failure = None
+        while True:
+            attempt += 1
+            try:
+                cmd = await self._execute(cmdstr)
+                if first_failure is not None:
+                    stats.recovered += 1
+                return cmd
+            except NotConnectedException:
+                logger.error('Emulador não conectado.')
+                raise
+            except (KeyboardStateError, CommandError) as e:
+                if not policy.is_retryable(e):
+                    raise
+                now = monotonic()
+                if first_failure is None:
+                    first_failure = now
+                    stats.retried_commands += 1
+                if not policy.should_retry(attempt, now - first_failure):
+                    break
+
+            await self._backoff(cmdstr, attempt)
+
+        stats.exhausted += 1
+        logger.error(
+            'Erro ao executar %r total de tentativas: %d', cmdstr, attempt
+        )
+        raise CommandError
+
+    async def _execute(self, cmdstr: bytes | str) -> AsyncCommand:
+        """Executa um comando com o limite de ``command_timeout``."""
+        cmd = AsyncCommand(self.app, cmdstr, timeout=self.command_timeout)
+        try:
+            async with self._lock:
+                await asyncio.wait_for(cmd.execute(), cmd.timeout)
+        except asyncio.TimeoutError:
+            logger.error('Timeout ao executar %r', cmd.cmdstr)
+            await self._recycle_app()
+            raise CommandTimeoutError(
+                f'Sem resposta em {cmd.timeout}s: {cmd.cmdstr!r}'
+            ) from None
+        self.status = Status(cmd.status_line)
+        return cmd
+
+    async def _backoff(self, cmdstr: bytes | str, attempt: int) -> None:
+        """Versão assíncrona de X3270._backoff."""
+        delay = self.retry_policy.delay(attempt)
+        logger.warning(
+            'Nova tentativa de exec command: %r %d/%d (aguardando %.3fs)',
+            cmdstr,
+            attempt,
+            self.retry_policy.max_attempts,
+            delay,
+        )
+        self.retry_stats.retries += 1
+        self.retry_stats.backoff_time += delay
+        await asyncio.sleep(delay)
+        start = monotonic()
+        try:
+            await self.reset()
+            await self.wait(self.time_unlock, 'unlock')
+            await self.tab()
+        finally:
+            self.retry_stats.recovery_time += monotonic() - start
+
+    async def _recycle_app(self) -> None:
+        """Versão assíncrona de X3270._recycle_app."""
+        if self._recycling:
+            return
+        logger.warning('[!] Reciclando processo do emulador travado')
+        self._recycling = True
+        try:
+            await self.app.close()
+        except Exception:
+            logger.warning('Erro ao encerrar processo travado')
+        self.invalidate_screen()
+        self.app = self._create_app(getattr(self.app, 'args', None))
+        try:
+            await self.start()
+            if self.host is not None:
+                await self.connect_host(
+                    self.host, self.port, self.tls, self.mode_3270
+                )
+        except Exception as e:
+            logger.error(f'Falha ao reciclar processo do emulador: {e}')
+        finally:
+            self._recycling = False
+
+    async def terminate(self) -> None:
+        logger.info('Terminando emulador assíncrono')
+        if not self.is_terminated and self.app.process is not None:
+            try:
+                await self.quit()
+            except (CommandError, NotConnectedException, OSError):
+                logger.warning('Falha ao enviar quit, ignorando')
+        await self.app.close()
+        self.is_terminated = True
+
+    async def is_connected(self) -> bool:
+        try:
+            await self.query('ConnectionState')
+            return self.status.connection_state.startswith(b'C(')
+        except Exception:
+            logger.error('Erro ao verificar conexão')
+            return False
+
+    async def connect_host(
+        self,
+        host: str,
+        port: int | str,
+        tls: bool = True,
+        mode_3270: bool = True,
+    ) -> None:
+        logger.info(f'Conectando ao host: {host}:{port} (tls={tls})')
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.mode_3270 = mode_3270
+        self.invalidate_screen()
+        await self.start()
+        tls_prefix = 'L:Y:' if tls else ''
+        try:
+            await self._exec_command(f'connect({tls_prefix}{host}:{port})')
+            if mode_3270:
+                await self.wait(5, '3270mode')
+        except CommandError:
+            logger.warning('CommandError durante conexão')
+
+    async def reconnect_host(self) -> 'AsyncX3270':
+        try:
+            await self.reconnect()
+            return self
+        except Exception:
+            logger.warning('Erro durante reconexão, recriando processo.')
+            await self.terminate()
+            self.app = self._create_app(getattr(self.app, 'args', None))
+            self.is_terminated = False
+            await self.connect_host(
+                self.host, self.port, self.tls, self.mode_3270
+            )
+            return self
+
+    async def screen(self, refresh: bool = False) -> Screen:
+        if self.screen_cache and self._screen is not None and not refresh:
+            self.screen_cache_hits += 1
+            return self._screen
+
+        self.screen_cache_misses += 1
+        screen = Screen.from_command(await self._exec_command(b'ascii()'))
+        if self.screen_cache:
+            self._screen = screen
+        return screen
+
+    async def clear_screen(self) -> None:
+        for _ in range(6):
+            await self.clear()
+            await self.wait(self.time_unlock, 'unlock')
+            if not (await self.get_full_screen(header=True)).strip():
+                return
+        logger.warning('Não foi possível limpar a tela completamente')
+
+    async def wait_for_field(self, timeout: int = 30) -> None:
+        try:
+            await self.wait(timeout, 'InputField')
+        except CommandError:
+            logger.warning(f'Timeout atingido: {timeout}s.')
+
+    async def wait_string_found(
+        self,
+        ypos: int,
+        xpos: int,
+        string: str,
+        equal: bool = True,
+        timeout: int = 5,
+    ) -> bool:
+        return await self.wait_until(
+            StringCondition(ypos, xpos, string, equal), timeout=timeout
+        )
+
+    async def wait_until(
+        self,
+        *conditions: Condition,
+        timeout: float = 5,
+        match: Literal['all', 'any'] = 'all',
+    ) -> bool:
+        """Versão assíncrona de X3270Cmd.wait_until."""
+        matcher = all if match == 'all' else any
+        for condition in conditions:
+            condition.reset()
+
+        end_time = monotonic() + timeout
+        delay = WAIT_BACKOFF_MIN
+        while True:
+            reader = ScreenReader(await self.screen(), self.model_dimensions)
+            result = matcher(cond.check(reader) for cond in conditions)
+            remaining = end_time - monotonic()
+            if result or remaining <= 0:
+                return result
+
+            fractional = self.fractional_wait
+            slice_time = wait_slice(conditions, remaining, fractional)
+            if not fractional and slice_time < 1:
+                await asyncio.sleep(slice_time)
+                self.invalidate_screen()
+                continue
+            try:
+                await self.wait(
+                    round(slice_time, 3) if fractional else 1, 'Output'
+                )
+                delay = WAIT_BACKOFF_MIN
+            except CommandError as e:
+                if 'timed out' in str(e).lower():
+                    continue
+                await asyncio.sleep(
+                    min(delay, max(0.0, end_time - monotonic()))
+                )
+                delay = min(delay * 2, WAIT_BACKOFF_MAX)
+
+    async def string_found(self, ypos: int, xpos: int, string: str) -> bool:
+        try:
+            return await self.get_string(ypos, xpos, len(string)) == string
+        except Exception:
+            logger.error('Erro ao verificar string=%r', string)
+            return False
+
+    async def delete_field(self) -> None:
+        await self.deletefield()
+
+    async def move_to(self, ypos: int, xpos: int) -> None:
+        await self.movecursor1(ypos, xpos)
+
+    async def send_pf(self, value: int) -> None:
+        await self.pf(value)
+
+    async def send_string(
+        self,
+        tosend: str,
+        ypos: int | None = None,
+        xpos: int | None = None,
+        password: bool = False,
+    ) -> None:
+        if not tosend:
+            logger.warning('tosend não é string, send_string não executado.')
+            return
+        tosend = re.sub(r"[()\"']", '', tosend)
+        if xpos is not None and ypos is not None:
+            await self.move_to(ypos, xpos)
+        await self.string(f'"{tosend}"')
+        await self.wait(self.time_unlock, 'unlock')
+
+    async def send_enter(self) -> None:
+        await self.enter()
+        await self.wait(self.time_unlock, 'unlock')
+
+    async def send_home(self) -> None:
+        await self.home()
+        await self.wait(self.time_unlock, 'unlock')
+
+    async def get_string(self, ypos: int, xpos: int, length: int) -> str:
+        self.check_limits(ypos, xpos)
+        if (xpos + length) > (self.model_dimensions['columns'] + 1):
+            raise FieldTruncateError
+        screen = await self.screen()
+        return screen.get_string(ypos - 1, xpos - 1, length)
+
+    async def get_string_area(
+        self, yposi: int, xposi: int, ypose: int, xpose: int
+    ) -> str:
+        self.check_limits(yposi, xposi)
+        self.check_limits(ypose, xpose)
+        reader = ScreenReader(await self.screen(), self.model_dimensions)
+        return reader.get_string_area(yposi, xposi, ypose, xpose)
+
+    async def get_full_screen(self, header: bool = True) -> str:
+        reader = ScreenReader(await self.screen(), self.model_dimensions)
+        return reader.get_full_screen(header)
+
+    async def save_screen(self, file_path: str, file_name: str) -> None:
+        if not os.path.exists(file_path):
+            os.makedirs(file_path)
+        await self.printtext(
+            'html', 'file', os.path.join(file_path, f'{file_name}.html')
+        )
+
+    async def search_string(
+        self, string: str, ignore_case: bool = False
+    ) -> bool:
+        try:
+            screen = await self.screen()
+        except Exception:
+            logger.error('Erro durante busca de texto')
+            return False
+        if ignore_case:
+            string = string.lower()
+            return any(string in row.lower() for row in screen.rows)
+        return any(string in row for row in screen.rows)
+
+    async def get_string_positions(
+        self, string: str, ignore_case: bool = False
+    ) -> list[tuple[int, int]]:
+        try:
+            screen_content = await self.get_full_screen(header=True)
+        except Exception:
+            logger.error('Erro ao buscar posições')
+            return []
+        flags = re.IGNORECASE if ignore_case else 0
+        return [
+            self._get_ypos_and_xpos_from_index(match.start() + 1)
+            for match in re.finditer(re.escape(string), screen_content, flags)
+        ]
@@ -0,0 +1,143 @@
+"""
+Arquivo único de telas gravadas, lido por mmap.
+
+Formato (inteiros little-endian)::
+
+    cabeçalho   MAGIC, versão, quantidade, posição do índice, dos nomes
+    telas       conteúdo de cada tela, em sequência
+    índice      por tela: posição, tamanho, posição e tamanho do nome
+    nomes       nomes em UTF-8, em sequência
+
+O índice fica no fim para que o arquivo seja escrito em uma passada. Na
+leitura só o índice é decodificado: cada tela é um memoryview sobre o
+mmap, sem cópia, e processos que abrem o mesmo arquivo dividem as páginas.
+"""
+
+import mmap
+import os
+import struct
+from collections.abc import Iterator, Mapping
+from logging import getLogger
+
+from pyx3270 import tn3270
+from pyx3270.exceptions import ArchiveFormatError
+
+logger = getLogger(__name__)
+
+MAGIC = b'PYX3270A'
+VERSION = 1
+HEADER = struct.Struct('<8sHxxIQQ')
+ENTRY = struct.Struct('<QIII')
+EXTENSION = '.pyx3270'
+
+
+def screen_key(filename: str) -> str:
+    """Nome da tela como em load_screens: maiúsculo e sem ``.bin``."""
+    return filename.upper().replace('.BIN', '')
+
+
+class ArchiveWriter:
+    """Escreve um arquivo de telas; só aparece no destino após ``close``."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._tmp_path = f'{path}.tmp'
+        self._fd = open(self._tmp_path, 'wb')
+        self._fd.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        self._entries: list[tuple[int, int, bytes]] = []
+
+    def add(self, name: str, data: bytes) -> None:
+        if not data.endswith(tn3270.IAC + tn3270.TN_EOR):
+            data += tn3270.IAC + tn3270.TN_EOR
+        self._entries.append((self._fd.tell(), len(data), name.encode()))
+        self._fd.write(data)
+
+    def close(self) -> None:
+        index_offset = self._fd.tell()
+        names_offset = index_offset + ENTRY.size * len(self._entries)
+        name_offset = names_offset
+        for offset, size, name in self._entries:
+            self._fd.write(ENTRY.pack(offset, size, name_offset, len(name)))
+            name_offset += len(name)
+        for _, _, name in self._entries:
+            self._fd.write(name)
+        self._fd.seek(0)
+        self._fd.write(
+            HEADER.pack(
+                MAGIC, VERSION, len(self._entries), index_offset, names_offset
+            )
+        )
+        self._fd.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._fd.close()
+            os.remove(self._tmp_path)
+
+
+class ScreenArchive(Mapping):
+    """Telas de um arquivo ``.pyx3270``; ``archive[nome]`` é um memoryview."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as fd:
+            self._mmap = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._index = self._read_index()
+
+    def _read_index(self) -> dict[str, tuple[int, int]]:
+        if len(self._mmap) < HEADER.size:
+            raise ArchiveFormatError(f'Arquivo de telas inválido: {self.path}')
+        magic, version, count, index_offset, _ = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ArchiveFormatError(f'Arquivo de telas inválido: {self.path}')
+        index = {}
+        for position in range(count):
+            offset, size, name_offset, name_size = ENTRY.unpack_from(
+                self._mmap, index_offset + position * ENTRY.size
+            )
+            name = self._mmap[name_offset : name_offset + name_size].decode()
+            index[name] = (offset, size)
+        return index
+
+    def __getitem__(self, name: str) -> memoryview:
+        offset, size = self._index[name]
+        return self._view[offset : offset + size]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        self._view.release()
+        self._mmap.close()
+
+
+def is_archive(path: str) -> bool:
+    if not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as fd:
+        return fd.read(len(MAGIC)) == MAGIC
+
+
+def pack_directory(record_dir: str, path: str) -> int:
+    """Empacota os .bin de ``record_dir``, na ordem de load_screens."""
+    count = 0
+    with ArchiveWriter(path) as writer:
+        for root, _, files in os.walk(record_dir):
+            for f in sorted(files):
+                if not f.endswith('.bin'):
+                    continue
+                with open(os.path.join(root, f), 'rb') as fd:
+                    writer.add(screen_key(f), fd.read())
+                count += 1
+    logger.info(f'[+] {count} telas empacotadas em {path}')
+    return count
@@ -1,21 +1,21 @@
 import os
 import socket
 import threading
+from functools import partial
 from time import sleep
-from typing import Callable
+from typing import Callable, Mapping
 
 import rich
 import typer
 
-from pyx3270 import state
+from pyx3270.archive import pack_directory
+from pyx3270.control import DEFAULT_CONTROL, ControlClient
 from pyx3270.emulator import X3270
-from pyx3270.server import (
-    load_screens,
-    record_handler,
-    replay_handler,
-    server_stop,
-    start_command_process,
-)
+from pyx3270.exceptions import ControlError
+from pyx3270.prefork import PreforkReplay
+from pyx3270.proxy import RecordProxy
+from pyx3270.server import EmbeddedReplay, open_screens, record_handler
+from pyx3270.store import DEFAULT_CACHE_SIZE
 
 app = typer.Typer()
 
@@ -35,7 +35,17 @@ def start_server_thread(
     handler: Callable,
     handler_args: tuple | list | None = None,
     label: str = 'Servidor',
+    stop: threading.Event | None = None,
 ) -> threading.Thread:
+    """Atende ``port``; com ``stop``, sinaliza o fim de cada cliente."""
+
+    def handle(clientsock: socket.socket) -> None:
+        try:
+            handler(clientsock, *handler_args)
+        finally:
+            if stop:
+                stop.set()
+
     def server_loop():
         tnsock = start_sock(port)
         rich.print(f'[+] {label} escutando na porta {port}')
@@ -44,7 +54,7 @@ def start_server_thread(
             rich.print(f'[+] Cliente conectado: {addr}')
 
             th = threading.Thread(
-                target=handler, args=(clientsock, *handler_args), daemon=True
+                target=handle, args=(clientsock,), daemon=True
             )
             th.start()
 
@@ -53,14 +63,92 @@ def start_server_thread(
     return th
 
 
-def control_replay(th: threading.Thread) -> None:
-    # Aguarda encerramento da thread ou falha do servidor
+def start_replay_server(
+    port: int,
+    screens: Mapping,
+    emulator: bool,
+    directory: str,
+    control: str = DEFAULT_CONTROL,
+    stop: threading.Event | None = None,
+) -> EmbeddedReplay:
+    """
+    Servidor de replay asyncio em uma thread, para todos os terminais,
+    com o canal de controle no mesmo laço. Com ``port`` 0 a porta é
+    escolhida pelo sistema e informada em ``replay.port``; ``stop`` é
+    sinalizado quando um terminal desconecta.
+    """
+    replay = EmbeddedReplay(
+        screens,
+        directory,
+        emulator,
+        on_session_closed=(lambda _: stop.set()) if stop else None,
+    )
+    # Só IPv4, como start_sock: com host None o asyncio abre um socket por
+    # família e, com port 0, cada um recebe uma porta diferente.
+    replay.start(port, host='0.0.0.0', control=control)
+    rich.print(f'[+] Servidor de replay escutando na porta {replay.port}')
+    rich.print(f'[+] Canal de controle em {replay.control_address}')
+    return replay
+
+
+def start_prefork_replay(
+    port: int, screens: Mapping, emulator: bool, directory: str, workers: int
+) -> None:
+    """Supervisiona ``workers`` processos de replay até Ctrl+C."""
+    try:
+        replay = PreforkReplay(screens, directory, workers, emulator)
+    except OSError as e:
+        rich.print(f'[!] {e}')
+        raise typer.Exit(1)
+    port = replay.bind(port)
+    rich.print(
+        f'[+] Servidor de replay escutando na porta {port} '
+        f'com {workers} workers'
+    )
+    replay.run()
+    rich.print('[x] Workers encerrados.')
+
+
+def start_record_proxy(
+    port: int,
+    address: str,
+    directory: str,
+    stop: threading.Event | None = None,
+) -> tuple[RecordProxy, threading.Thread]:
+    """Proxy de gravação em uma thread só, para todos os terminais."""
+    proxy = RecordProxy(
+        address,
+        directory,
+        on_session_closed=(lambda _: stop.set()) if stop else None,
+    )
+    proxy.listen(port)
+    rich.print(f'[+] Servidor de gravação escutando na porta {port}')
+    th = threading.Thread(target=proxy.serve_forever, daemon=True)
+    th.start()
+    return proxy, th
+
+
+def pack_recording(
+    proxy: RecordProxy | None, directory: str, archive: str
+) -> None:
+    """Espera o proxy gravar as telas enfileiradas e as empacota."""
+    if proxy and proxy.writer:
+        proxy.writer.flush()
+    pack(directory, archive)
+
+
+def control_replay(
+    th: threading.Thread,
+    stop: threading.Event,
+    on_stop: Callable[[], None] | None = None,
+) -> None:
+    # Aguarda encerramento da thread ou o fim da sessão (``stop``)
     while th.is_alive():
-        if server_stop.is_set():
+        if stop.is_set():
             rich.print('[x] Conexão encerrada.')
-            if state.command_process:
-                state.command_process.terminate()
-            server_stop.clear()
+            if on_stop:
+                on_stop()
+            stop.clear()
             break
         sleep(1)
 
@@ -83,36 +171,61 @@ def control_replay(th: threading.Thread) -> None:
 @app.command()
 def replay(
     directory: str = typer.Option(default='./screens'),
-    port: int = typer.Option(default=3270),
+    port: int = typer.Option(default=3270, help='0 = porta livre.'),
     tls: bool = typer.Option(default=False),
     model: str = typer.Option(default='2'),
     emulator: bool = typer.Option(default=True),
+    cache_size: int = typer.Option(
+        default=DEFAULT_CACHE_SIZE, help='Telas mantidas em memória.'
+    ),
+    control: str = typer.Option(
+        default=DEFAULT_CONTROL,
+        help='Canal de controle: host:porta (0 = livre) ou unix:caminho.',
+    ),
+    workers: int = typer.Option(
+        default=1, help='Processos de replay na mesma porta (POSIX).'
+    ),
 ):
-    screens = load_screens(directory)
+    screens = open_screens(directory, cache_size)
     rich.print(f'[+] REPLAY do caminho: {directory}')
 
+    if workers > 1:
+        start_prefork_replay(port, screens, emulator, directory, workers)
+        return
+
+    stop = threading.Event()
     try:
+        server = start_replay_server(
+            port, screens, emulator, directory, control, stop
+        )
         while True:
-            server_thread = start_server_thread(
-                port,
-                replay_handler,
-                handler_args=(screens, emulator, directory),
-                label='Servidor de replay',
-            )
-
             if emulator:
                 emu = X3270(visible=True, model=model, save_log_file=True)
-                emu.connect_host('localhost', port, tls, mode_3270=False)
+                emu.connect_host(
+                    'localhost', server.port, tls, mode_3270=False
+                )
                 sleep(2)
 
-            start_command_process()
-            control_replay(server_thread)
+            control_replay(server.thread, stop)
     except KeyboardInterrupt:
         rich.print('\n[x] Interrompido pelo usuário.')
-        state.command_process.terminate()
         os._exit(0)
 
 
+@app.command()
+def command(
+    text: str = typer.Argument(help='Comando: set, next, prev, add...'),
+    control: str = typer.Option(help='Endereço do canal de controle.'),
+):
+    """Envia um comando ao replay em execução e mostra a resposta."""
+    try:
+        with ControlClient(control) as client:
+            rich.print(client.send(text))
+    except (ControlError, OSError) as e:
+        rich.print(f'[!] {e}')
+        raise typer.Exit(1)
+
+
 @app.command()
 def record(
     address: str = typer.Option(),
@@ -120,12 +233,16 @@ def record(
     tls: bool = typer.Option(default=True),
     model: str = typer.Option(default='2'),
     emulator: bool = typer.Option(default=True),
+    archive: str = typer.Option(
+        default='', help='Empacota as telas gravadas neste arquivo.'
+    ),
 ):
     host, *port = address.split(':', 2)
     port = int(*port) if port else 3270
 
     rich.print(f'[+] RECORD na porta {port}')
 
+    proxy = None
     try:
         while True:
             if emulator:
@@ -133,23 +250,54 @@ def record(
             else:
                 emu = None
 
-            server_thread = start_server_thread(
-                port=port,
-                handler=record_handler,
-                handler_args=(emu, address, directory, 0.01),
-                label='Servidor de gravação',
-            )
+            proxy = None
+            stop = threading.Event()
+            if tls:
+                # Com TLS o tráfego é cifrado: a tela é lida do emulador.
+                server_thread = start_server_thread(
+                    port=port,
+                    handler=record_handler,
+                    handler_args=(emu, address, directory, 0.01),
+                    label='Servidor de gravação',
+                    stop=stop,
+                )
+            else:
+                proxy, server_thread = start_record_proxy(
+                    port, address, directory, stop
+                )
 
             if emulator:
                 rich.print('[+] Conectando ao emulador...')
                 emu.connect_host('localhost', port, tls, mode_3270=False)
 
             rich.print(f'[+] Escutando localhost, origem {host=} {port=}')
-            control_replay(server_thread)
+            control_replay(
+                server_thread,
+                stop,
+                on_stop=partial(pack_recording, proxy, directory, archive)
+                if archive
+                else None,
+            )
+            if proxy:
+                proxy.stop()
+                server_thread.join()
+                proxy.close()
     except KeyboardInterrupt:
         rich.print('\n[x] Interrompido pelo usuário.')
+        if archive:
+            pack_recording(proxy, directory, archive)
         os._exit(0)
 
 
+@app.command()
+def pack(
+    directory: str = typer.Option(default='./screens'),
+    output: str = typer.Option(default='./screens.pyx3270'),
+):
+    """Empacota as telas .bin de um diretório em um arquivo .pyx3270."""
+    count = pack_directory(directory, output)
+    rich.print(f'[+] {count} telas empacotadas em {output}')
+
+
 if __name__ == '__main__':
     app()
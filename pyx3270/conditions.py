@@ -0,0 +1,141 @@
+import re
+from abc import ABC, abstractmethod
+from logging import getLogger
+from time import monotonic
+
+logger = getLogger(__name__)
+
+
+class Condition(ABC):
+    """Condição avaliada sobre a tela do emulador por X3270Cmd.wait_until."""
+
+    @abstractmethod
+    def check(self, em) -> bool: ...
+
+    def reset(self) -> None:
+        """Reinicia o estado interno antes de uma nova espera."""
+
+    def retry_after(self) -> float | None:
+        """
+        Segundos até a condição poder ser satisfeita sem nova saída do host.
+        ``None`` indica que somente uma alteração de tela pode satisfazê-la.
+        """
+
+
+class StringCondition(Condition):
+    """Texto na posição (origem 1) igual, ou diferente, do esperado."""
+
+    def __init__(
+        self, ypos: int, xpos: int, string: str, equal: bool = True
+    ) -> None:
+        self.ypos = ypos
+        self.xpos = xpos
+        self.string = string
+        self.equal = equal
+
+    def check(self, em) -> bool:
+        try:
+            found = em.get_string(self.ypos, self.xpos, len(self.string))
+        except Exception:
+            logger.debug('Erro ao buscar string, tentando novamente')
+            return False
+        logger.debug(f"String encontrada: '{found}'")
+        return (found == self.string) is self.equal
+
+    def __repr__(self) -> str:
+        return (
+            f'StringCondition({self.ypos}, {self.xpos}, '
+            f'{self.string!r}, equal={self.equal})'
+        )
+
+
+class RegexCondition(Condition):
+    """Expressão regular encontrada na tela ou em uma área dela."""
+
+    def __init__(
+        self,
+        pattern: str | re.Pattern,
+        area: tuple[int, int, int, int] | None = None,
+        flags: int = 0,
+    ) -> None:
+        self.pattern = re.compile(pattern, flags)
+        self.area = area
+
+    def check(self, em) -> bool:
+        try:
+            if self.area:
+                text = em.get_string_area(*self.area)
+            else:
+                text = em.get_full_screen(header=True)
+        except Exception:
+            logger.debug('Erro ao ler tela, tentando novamente')
+            return False
+        return self.pattern.search(text) is not None
+
+    def __repr__(self) -> str:
+        return f'RegexCondition({self.pattern.pattern!r}, area={self.area})'
+
+
+class StableCondition(Condition):
+    """Tela (ou área) sem alterações por ``duration`` segundos."""
+
+    def __init__(
+        self,
+        duration: float = 1.0,
+        area: tuple[int, int, int, int] | None = None,
+    ) -> None:
+        self.duration = duration
+        self.area = area
+        self.reset()
+
+    def reset(self) -> None:
+        self._last = None
+        self._since = None
+
+    def check(self, em) -> bool:
+        try:
+            if self.area:
+                text = em.get_string_area(*self.area)
+            else:
+                text = em.get_full_screen(header=True)
+        except Exception:
+            logger.debug('Erro ao ler tela, tentando novamente')
+            return False
+
+        now = monotonic()
+        if text != self._last:
+            self._last = text
+            self._since = now
+        return now - self._since >= self.duration
+
+    def retry_after(self) -> float | None:
+        if self._since is None:
+            return self.duration
+        return max(0.0, self.duration - (monotonic() - self._since))
+
+    def __repr__(self) -> str:
+        return f'StableCondition({self.duration}, area={self.area})'
+
+
+class ChangedCondition(Condition):
+    """Tela (ou área) diferente de ``before``, lida antes de uma ação."""
+
+    def __init__(
+        self, before: str, area: tuple[int, int, int, int] | None = None
+    ) -> None:
+        self.before = before
+        self.area = area
+
+    def check(self, em) -> bool:
+        try:
+            if self.area:
+                text = em.get_string_area(*self.area)
+            else:
+                text = em.get_full_screen(header=True)
+        except Exception:
+            logger.debug('Erro ao ler tela, tentando novamente')
+            return False
+        return text != self.before
+
+    def __repr__(self) -> str:
+        return f'ChangedCondition(area={self.area})'
@@ -0,0 +1,111 @@
+"""
+Canal de controle do replay.
+
+Protocolo de linhas UTF-8 sobre TCP local ou socket Unix: cada linha é um
+comando (``set``, ``next``, ``prev``, ``add``, ``change directory``,
+``clear``, ``status``) e recebe como resposta uma linha JSON, com ``ok``
+e o estado do replay depois do comando, ou ``ok`` falso e ``error``.
+"""
+
+import asyncio
+import json
+import socket
+from logging import getLogger
+from typing import Callable
+
+from pyx3270.exceptions import ControlError
+
+logger = getLogger(__name__)
+
+CONTROL_HOST = '127.0.0.1'
+DEFAULT_CONTROL = f'{CONTROL_HOST}:0'
+UNIX_PREFIX = 'unix:'
+CONTROL_TIMEOUT = 5.0
+CONTROL_COMMANDS = ('set', 'next', 'prev', 'add', 'change', 'clear', 'status')
+
+
+def parse_address(address: str) -> tuple[str, int] | str:
+    """``host:porta`` vira uma tupla; ``unix:caminho``, o caminho."""
+    if address.startswith(UNIX_PREFIX):
+        return address.removeprefix(UNIX_PREFIX)
+    host, _, port = address.rpartition(':')
+    return host or CONTROL_HOST, int(port)
+
+
+async def start_control_server(
+    execute: Callable[[str], dict], address: str = DEFAULT_CONTROL
+) -> tuple[asyncio.Server, str]:
+    """
+    Atende ``address`` chamando ``execute`` para cada linha recebida;
+    retorna o servidor e o endereço efetivo (com a porta escolhida).
+    """
+
+    def reply(line: bytes) -> bytes:
+        """Linha JSON de resposta a ``line``; vazia se não há comando."""
+        command = line.decode('utf-8').strip()
+        if not command:
+            return b''
+        try:
+            response = execute(command)
+        except Exception as e:
+            logger.error(f'[!] Falha no comando {command!r}: {e}')
+            response = {'ok': False, 'error': str(e)}
+        return json.dumps(response).encode() + b'\n'
+
+    async def handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while line := await reader.readline():
+                writer.write(reply(line))
+                await writer.drain()
+        except (ConnectionError, UnicodeDecodeError) as e:
+            logger.info(f'[!] Controle: conexão encerrada: {e}')
+        finally:
+            writer.close()
+
+    target = parse_address(address)
+    if isinstance(target, str):
+        server = await asyncio.start_unix_server(handle, target)
+        return server, address
+    server = await asyncio.start_server(handle, *target)
+    host, port = server.sockets[0].getsockname()[:2]
+    return server, f'{host}:{port}'
+
+
+class ControlClient:
+    """Cliente síncrono do canal de controle (uma conexão, vários comandos)."""
+
+    def __init__(self, address: str, timeout: float = CONTROL_TIMEOUT) -> None:
+        target = parse_address(address)
+        if isinstance(target, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(target)
+        else:
+            self.sock = socket.create_connection(target, timeout)
+        self._file = self.sock.makefile('rb')
+
+    def send(self, command: str) -> dict:
+        """Envia ``command`` e retorna a resposta; ControlError se falhou."""
+        try:
+            self.sock.sendall(command.strip().encode() + b'\n')
+            line = self._file.readline()
+        except OSError as e:
+            raise ControlError(f'Canal de controle indisponível: {e}') from e
+        if not line:
+            raise ControlError('Canal de controle encerrado.')
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise ControlError(response.get('error', 'Comando recusado.'))
+        return response
+
+    def close(self) -> None:
+        self._file.close()
+        self.sock.close()
+
+    def __enter__(self) -> 'ControlClient':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,638 @@
+import dataclasses
+import re
+from logging import getLogger
+
+from pyx3270 import tn3270
+
+logger = getLogger(__name__)
+
+EBCDIC = 'cp037'
+
+# Comandos de escrita (3270 e equivalentes SNA) em valores inteiros.
+CMD_W = {tn3270.W[0], tn3270.SNA_W[0]}
+CMD_EW = {tn3270.EW[0], tn3270.SNA_EW[0]}
+CMD_EWA = {tn3270.EWA[0], tn3270.SNA_EWA[0]}
+CMD_EAU = {tn3270.EAU[0], tn3270.SNA_EAU[0]}
+CMD_WSF = {tn3270.WSF[0], tn3270.SNA_WSF[0]}
+CMD_READ = {
+    tn3270.RB[0],
+    tn3270.RM[0],
+    tn3270.RMA[0],
+    tn3270.SNA_RB[0],
+    tn3270.SNA_RM[0],
+    tn3270.SNA_RMA[0],
+}
+
+ORDER_SF = tn3270.SF[0]
+ORDER_SFE = tn3270.SFE[0]
+ORDER_SBA = tn3270.SBA[0]
+ORDER_SA = tn3270.SA[0]
+ORDER_MF = tn3270.MF[0]
+ORDER_IC = tn3270.IC[0]
+ORDER_PT = tn3270.PT[0]
+ORDER_RA = tn3270.RA[0]
+ORDER_EUA = tn3270.EUA[0]
+ORDER_GE = tn3270.GE[0]
+
+# Sequência de bytes que não são ordens: copiada direto para o buffer.
+DATA_RUN = re.compile(
+    b'[^'
+    + re.escape(
+        tn3270.SF
+        + tn3270.SFE
+        + tn3270.SBA
+        + tn3270.SA
+        + tn3270.MF
+        + tn3270.IC
+        + tn3270.PT
+        + tn3270.RA
+        + tn3270.EUA
+        + tn3270.GE
+    )
+    + b']+'
+)
+
+# Atributo de campo (bits do byte de atributo).
+FA_PROTECT = 0x20
+FA_NUMERIC = 0x10
+FA_INTENSITY = 0x0C
+FA_INT_ZERO_NSEL = 0x0C
+FA_MODIFY = 0x01
+
+# WCC
+WCC_RESET_MDT = 0x01
+WCC_KEYBOARD_RESTORE = 0x02
+WCC_SOUND_ALARM = 0x04
+
+XA_3270 = 0xC0
+TN3270E_HEADER = 5
+SF_HEADER = 3  # tamanho (2 bytes) + id
+SF_ERASE_RESET = tn3270.SF_ERASE_RESET[0]
+SF_OUTBOUND_DS = tn3270.SF_OUTBOUND_DS[0]
+
+# Controles EBCDIC (< 0x40) aparecem como espaço, como no Ascii().
+EBCDIC_SPACE = 0x40
+DISPLAY_TABLE = bytes(max(code, EBCDIC_SPACE) for code in range(256))
+
+SB = tn3270.SB[0]
+
+# Registro de entrada: AID + endereço do cursor, depois SBA + dados.
+ADDRESS_SIZE = 2
+INBOUND_HEADER = 1 + ADDRESS_SIZE
+AID_STRUCTURED_FIELD = tn3270.AID_SF[0]
+
+
+def decode_address(b1: int, b2: int) -> int:
+    """Endereço de buffer em 12 ou 14 bits."""
+    if b1 & 0xC0 == 0:
+        return ((b1 & 0x3F) << 8) | b2
+    return ((b1 & 0x3F) << 6) | (b2 & 0x3F)
+
+
+def encode_address(address: int) -> bytes:
+    """Endereço de 12 bits com os códigos de tn3270.code_table."""
+    return bytes((
+        tn3270.code_table[(address >> 6) & 0x3F],
+        tn3270.code_table[address & 0x3F],
+    ))
+
+
+class Field:
+    """Campo da tela: posição do atributo, atributo e atributos estendidos."""
+
+    __slots__ = ('address', 'attribute', 'end', 'extended', 'start')
+
+    def __init__(
+        self,
+        address: int,
+        attribute: int,
+        extended: dict[int, int],
+        start: int,
+        end: int,
+    ) -> None:
+        self.address = address
+        self.attribute = attribute
+        self.extended = extended
+        self.start = start
+        self.end = end
+
+    @property
+    def protected(self) -> bool:
+        return bool(self.attribute & FA_PROTECT)
+
+    @property
+    def numeric(self) -> bool:
+        return bool(self.attribute & FA_NUMERIC)
+
+    @property
+    def hidden(self) -> bool:
+        return self.attribute & FA_INTENSITY == FA_INT_ZERO_NSEL
+
+    @property
+    def modified(self) -> bool:
+        return bool(self.attribute & FA_MODIFY)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return (
+            f'Field(address={self.address}, attribute=0x{self.attribute:02x}'
+            f', length={len(self)})'
+        )
+
+
+class PresentationSpace:
+    """
+    Modelo da tela 3270: buffer de caracteres (EBCDIC), atributos de campo,
+    atributos estendidos e cursor. Endereços são lineares (origem 0).
+    """
+
+    def __init__(
+        self,
+        rows: int = 24,
+        cols: int = 80,
+        alt_rows: int | None = None,
+        alt_cols: int | None = None,
+    ) -> None:
+        self.default_size = (rows, cols)
+        self.alternate_size = (alt_rows or rows, alt_cols or cols)
+        self.alarm = False
+        self.keyboard_restored = False
+        self._resize(rows, cols)
+
+    def _resize(self, rows: int, cols: int) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.buffer = bytearray(self.size)
+        self.attributes: dict[int, int] = {}
+        # 1 nas posições com atributo de campo: busca em C ao escrever dados.
+        self.field_map = bytearray(self.size)
+        self.extended: dict[int, dict[int, int]] = {}
+        self.char_attributes: dict[int, dict[int, int]] = {}
+        self.cursor = 0
+
+    def erase(self, alternate: bool = False) -> None:
+        rows, cols = self.alternate_size if alternate else self.default_size
+        self._resize(rows, cols)
+
+    def field_at(self, address: int) -> int | None:
+        """Endereço do atributo do campo que contém ``address``."""
+        if not self.attributes:
+            return None
+        best = None
+        for position in self.attributes:
+            if position <= address and (best is None or position > best):
+                best = position
+        if best is None:  # o campo começa antes do fim e dá a volta
+            best = max(self.attributes)
+        return best
+
+    def is_protected(self, address: int) -> bool:
+        """Indica se ``address`` não aceita digitação."""
+        if address in self.attributes:
+            return True
+        field = self.field_at(address)
+        return field is not None and bool(self.attributes[field] & FA_PROTECT)
+
+    def next_unprotected(self, address: int) -> int:
+        """Primeira posição do próximo campo desprotegido (ou 0)."""
+        for offset in range(self.size):
+            position = (address + offset) % self.size
+            attribute = self.attributes.get(position)
+            if attribute is not None and not attribute & FA_PROTECT:
+                next_position = (position + 1) % self.size
+                if next_position not in self.attributes:
+                    return next_position
+        return 0
+
+    def fields(self) -> list[Field]:
+        positions = sorted(self.attributes)
+        fields = []
+        for index, address in enumerate(positions):
+            start = address + 1
+            end = positions[(index + 1) % len(positions)]
+            if end <= address:
+                end += self.size
+            fields.append(
+                Field(
+                    address,
+                    self.attributes[address],
+                    self.extended.get(address, {}),
+                    start,
+                    end,
+                )
+            )
+        return fields
+
+    def _display_bytes(self) -> bytes:
+        data = bytearray(self.buffer)
+        for field in self.fields():
+            if field.hidden:
+                for address in range(field.start, field.end):
+                    data[address % self.size] = 0
+        return bytes(data)
+
+    def lines(self) -> list[str]:
+        text = self._display_bytes().translate(DISPLAY_TABLE).decode(EBCDIC)
+        return [
+            text[start : start + self.cols]
+            for start in range(0, self.size, self.cols)
+        ]
+
+    @property
+    def text(self) -> str:
+        # Mesmo formato de Screen.text / ascii(): linhas unidas por espaço.
+        return ' '.join(self.lines())
+
+    def get_string(self, row: int, col: int, length: int) -> str:
+        """Texto a partir de (row, col), origem 0."""
+        start = row * self.cols + col
+        return self.text_range(start, start + length)
+
+    def data_range(self, start: int, end: int) -> bytes:
+        """Bytes EBCDIC de ``start`` a ``end`` (pode dar a volta)."""
+        return self._range(self.buffer, start, end)
+
+    def text_range(self, start: int, end: int) -> str:
+        chunk = self._range(self._display_bytes(), start, end)
+        return chunk.translate(DISPLAY_TABLE).decode(EBCDIC)
+
+    def _range(self, data: bytes, start: int, end: int) -> bytes:
+        if end <= self.size:
+            return bytes(data[start:end])
+        return bytes(data[start:] + data[: end - self.size])
+
+    def field_text(self, field: Field) -> str:
+        return self.text_range(field.start, field.end)
+
+    @property
+    def cursor_position(self) -> tuple[int, int]:
+        return divmod(self.cursor, self.cols)
+
+
+class DataStreamDecoder:
+    """
+    Decodificador incremental do fluxo 3270 de saída (host -> terminal).
+
+    ``feed`` aceita bytes do socket ou de uma gravação (.bin) em qualquer
+    fragmentação: remove a negociação telnet, desfaz IAC IAC e aplica cada
+    registro terminado em IAC EOR ao PresentationSpace. Registros sem
+    telnet podem ser aplicados diretamente com ``apply``.
+    """
+
+    def __init__(
+        self,
+        ps: PresentationSpace | None = None,
+        tn3270e: bool = False,
+    ) -> None:
+        self.ps = ps or PresentationSpace()
+        self.tn3270e = tn3270e
+        self.records = 0
+        self._framer = tn3270.TelnetFramer()
+        self._address = 0
+        self._char_attrs: dict[int, int] = {}
+        self._orders = {
+            ORDER_SBA: self._order_sba,
+            ORDER_SF: self._order_sf,
+            ORDER_SFE: self._order_sfe,
+            ORDER_MF: self._order_mf,
+            ORDER_SA: self._order_sa,
+            ORDER_IC: self._order_ic,
+            ORDER_PT: self._order_pt,
+            ORDER_RA: self._order_ra,
+            ORDER_EUA: self._order_eua,
+            ORDER_GE: self._order_ge,
+        }
+
+    def feed(self, data: bytes) -> int:
+        """Processa ``data`` e retorna quantos registros foram aplicados."""
+        applied = 0
+        for event in self._framer.feed(data):
+            if isinstance(event, tn3270.TelnetRecord):
+                self.apply(bytes(event.data))
+                applied += 1
+            elif event.command == SB:
+                self.on_subnegotiation(event.payload)
+            elif event.option is not None:
+                self.on_negotiation(event.command, event.option)
+        return applied
+
+    # Ganchos para quem conduz a sessão (ex.: pyx3270.native); o
+    # decodificador apenas os ignora.
+
+    def on_negotiation(self, command: int, option: int) -> None:
+        """WILL/WONT/DO/DONT recebido do host."""
+
+    def on_subnegotiation(self, payload: bytes) -> None:
+        """Conteúdo de IAC SB ... IAC SE (sem os delimitadores)."""
+
+    def on_read(self, command: int) -> None:
+        """Comando de leitura (Read Buffer/Modified) recebido do host."""
+
+    def apply(self, record: bytes) -> None:
+        """Aplica um registro 3270 (sem telnet) ao PresentationSpace."""
+        if self.tn3270e:
+            if (
+                len(record) < TN3270E_HEADER
+                or record[0] != tn3270.DT_3270_DATA
+            ):
+                return
+            record = record[TN3270E_HEADER:]
+        if not record:
+            return
+        self.records += 1
+        self._apply_command(record[0], record[1:])
+
+    def _apply_command(self, command: int, data: bytes) -> None:
+        ps = self.ps
+        if command in CMD_W:
+            self._write(data)
+        elif command in CMD_EW:
+            ps.erase()
+            self._write(data)
+        elif command in CMD_EWA:
+            ps.erase(alternate=True)
+            self._write(data)
+        elif command in CMD_EAU:
+            self._erase_all_unprotected()
+        elif command in CMD_WSF:
+            self._write_structured_field(data)
+        elif command in CMD_READ:
+            self.on_read(command)
+        else:
+            logger.debug('Comando 3270 ignorado: 0x%02x', command)
+
+    def _write_structured_field(self, data: bytes) -> None:
+        pos = 0
+        while pos + SF_HEADER <= len(data):
+            length = (data[pos] << 8) | data[pos + 1]
+            if length == 0:  # até o fim do registro
+                length = len(data) - pos
+            if length < SF_HEADER:
+                break
+            sfid = data[pos + 2]
+            body = data[pos + SF_HEADER : pos + length]
+            if sfid == SF_ERASE_RESET:
+                alternate = bool(body and body[0] & 0x80)
+                self.ps.erase(alternate=alternate)
+            elif sfid == SF_OUTBOUND_DS and body[1:]:
+                # body: id da partição, comando, dados.
+                self._apply_command(body[1], body[2:])
+            pos += length
+
+    def _erase_all_unprotected(self) -> None:
+        ps = self.ps
+        for field in ps.fields():
+            if not field.protected:
+                for address in range(field.start, field.end):
+                    ps.buffer[address % ps.size] = 0
+                ps.attributes[field.address] &= ~FA_MODIFY
+        if not ps.attributes:
+            ps.buffer[:] = bytes(ps.size)
+        ps.cursor = ps.next_unprotected(0)
+        ps.keyboard_restored = True
+
+    def _fill(self, start: int, stop: int, value: int) -> None:
+        ps = self.ps
+        end = stop if stop > start else stop + ps.size
+        for position in range(start, end):
+            ps.buffer[position % ps.size] = value
+        self._drop_attributes(start, end - start)
+
+    def _drop_attributes(self, start: int, count: int) -> None:
+        """Remove atributos de campo sobrescritos por dados."""
+        ps = self.ps
+        if not ps.attributes:
+            return
+        field_map = ps.field_map
+        end = start + count
+        if end > ps.size:
+            self._drop_attributes(0, min(end - ps.size, ps.size))
+            end = ps.size
+        position = field_map.find(1, start, end)
+        while position >= 0:
+            field_map[position] = 0
+            del ps.attributes[position]
+            ps.extended.pop(position, None)
+            position = field_map.find(1, position + 1, end)
+
+    def _write(self, data: bytes) -> None:
+        ps = self.ps
+        if not data:
+            return
+        wcc = data[0]
+        if wcc & WCC_RESET_MDT:
+            for position, attribute in ps.attributes.items():
+                ps.attributes[position] = attribute & ~FA_MODIFY
+        ps.keyboard_restored = bool(wcc & WCC_KEYBOARD_RESTORE)
+        ps.alarm = bool(wcc & WCC_SOUND_ALARM)
+
+        self._address = ps.cursor
+        self._char_attrs = {}
+        handlers = self._orders
+        pos = 1
+        end = len(data)
+        while 0 < pos < end:
+            match = DATA_RUN.match(data, pos)
+            if match:
+                self._write_run(match.group())
+                pos = match.end()
+                continue
+            handler = handlers.get(data[pos])
+            pos = handler(data, pos + 1) if handler else pos + 1
+
+    def _write_run(self, run: bytes) -> None:
+        ps = self.ps
+        address = self._address
+        count = len(run)
+        self._drop_attributes(address, count)
+        if address + count <= ps.size:
+            ps.buffer[address : address + count] = run
+        else:
+            for offset, value in enumerate(run):
+                ps.buffer[(address + offset) % ps.size] = value
+        if self._char_attrs:
+            for offset in range(count):
+                ps.char_attributes[(address + offset) % ps.size] = (
+                    self._char_attrs
+                )
+        self._address = (address + count) % ps.size
+
+    # Cada ordem recebe o registro e a posição após o byte da ordem, e
+    # retorna a próxima posição (-1 quando o registro está truncado).
+
+    def _order_sba(self, data: bytes, pos: int) -> int:
+        if pos + 2 > len(data):
+            return -1
+        self._address = decode_address(data[pos], data[pos + 1]) % self.ps.size
+        return pos + 2
+
+    def _order_sf(self, data: bytes, pos: int) -> int:
+        if pos >= len(data):
+            return -1
+        self._set_attribute(data[pos], {})
+        return pos + 1
+
+    def _set_attribute(self, attribute: int, extended: dict[int, int]) -> None:
+        ps = self.ps
+        address = self._address
+        ps.attributes[address] = attribute
+        ps.field_map[address] = 1
+        ps.buffer[address] = 0
+        ps.char_attributes.pop(address, None)
+        if extended:
+            ps.extended[address] = extended
+        else:
+            ps.extended.pop(address, None)
+        self._address = (address + 1) % ps.size
+
+    @staticmethod
+    def _attribute_pairs(
+        data: bytes, pos: int
+    ) -> tuple[int, int | None, dict[int, int]]:
+        """Lê ``count`` pares (tipo, valor) de SFE/MF."""
+        count = data[pos]
+        pairs = data[pos + 1 : pos + 1 + count * 2]
+        basic = None
+        extended = {}
+        for index in range(0, len(pairs) - 1, 2):
+            if pairs[index] == XA_3270:
+                basic = pairs[index + 1]
+            else:
+                extended[pairs[index]] = pairs[index + 1]
+        return pos + 1 + count * 2, basic, extended
+
+    def _order_sfe(self, data: bytes, pos: int) -> int:
+        if pos >= len(data):
+            return -1
+        pos, basic, extended = self._attribute_pairs(data, pos)
+        self._set_attribute(basic or 0, extended)
+        return pos
+
+    def _order_mf(self, data: bytes, pos: int) -> int:
+        if pos >= len(data):
+            return -1
+        ps = self.ps
+        address = self._address
+        pos, basic, extended = self._attribute_pairs(data, pos)
+        if address in ps.attributes:
+            if basic is not None:
+                ps.attributes[address] = basic
+            if extended:
+                ps.extended.setdefault(address, {}).update(extended)
+            self._address = (address + 1) % ps.size
+        return pos
+
+    def _order_sa(self, data: bytes, pos: int) -> int:
+        if pos + 2 > len(data):
+            return -1
+        kind, value = data[pos], data[pos + 1]
+        # Novo dicionário a cada mudança: as posições já escritas o
+        # compartilham sem cópia.
+        if kind == 0:
+            self._char_attrs = {}
+        elif value:
+            self._char_attrs = {**self._char_attrs, kind: value}
+        else:
+            self._char_attrs = {
+                key: item
+                for key, item in self._char_attrs.items()
+                if key != kind
+            }
+        return pos + 2
+
+    def _order_ic(self, data: bytes, pos: int) -> int:
+        self.ps.cursor = self._address
+        return pos
+
+    def _order_pt(self, data: bytes, pos: int) -> int:
+        self._address = self.ps.next_unprotected(self._address)
+        return pos
+
+    def _order_ra(self, data: bytes, pos: int) -> int:
+        if pos + 3 > len(data):
+            return -1
+        stop = decode_address(data[pos], data[pos + 1]) % self.ps.size
+        value = data[pos + 2]
+        pos += 3
+        if value == ORDER_GE and pos < len(data):
+            value = data[pos]
+            pos += 1
+        self._fill(self._address, stop, value)
+        self._address = stop
+        return pos
+
+    def _order_eua(self, data: bytes, pos: int) -> int:
+        if pos + 2 > len(data):
+            return -1
+        stop = decode_address(data[pos], data[pos + 1]) % self.ps.size
+        self._erase_unprotected_range(self._address, stop)
+        self._address = stop
+        return pos + 2
+
+    def _order_ge(self, data: bytes, pos: int) -> int:
+        if pos >= len(data):
+            return -1
+        self._write_run(data[pos : pos + 1])
+        return pos + 1
+
+    def _erase_unprotected_range(self, start: int, stop: int) -> None:
+        ps = self.ps
+        end = stop if stop > start else stop + ps.size
+        field = ps.field_at(start)
+        protected = (
+            field is not None and ps.attributes[field] & FA_PROTECT != 0
+        )
+        for offset in range(start, end):
+            position = offset % ps.size
+            attribute = ps.attributes.get(position)
+            if attribute is not None:
+                protected = bool(attribute & FA_PROTECT)
+            elif not protected:
+                ps.buffer[position] = 0
+
+
+def decode_screen(
+    data: bytes, rows: int = 24, cols: int = 80
+) -> PresentationSpace:
+    """Aplica todos os registros de ``data`` (ex.: um .bin gravado)."""
+    decoder = DataStreamDecoder(PresentationSpace(rows, cols))
+    decoder.feed(data)
+    return decoder.ps
+
+
+@dataclasses.dataclass
+class InboundRecord:
+    """
+    Registro do terminal para o host: AID, cursor e campos modificados.
+
+    ``fields`` mapeia o endereço de cada SBA aos dados EBCDIC que o seguem.
+    Teclas de leitura curta (CLEAR, PA) trazem só o AID.
+    """
+
+    aid: int
+    cursor: int | None = None
+    fields: dict[int, bytes] = dataclasses.field(default_factory=dict)
+
+    @property
+    def texts(self) -> dict[int, str]:
+        """Campos modificados decodificados (nulos removidos)."""
+        return {
+            address: data.replace(b'\x00', b'').decode(EBCDIC)
+            for address, data in self.fields.items()
+        }
+
+
+def parse_inbound(record: bytes) -> InboundRecord:
+    """Decodifica um registro de entrada já sem telnet (sem IAC EOR)."""
+    inbound = InboundRecord(record[0])
+    if len(record) < INBOUND_HEADER or inbound.aid == AID_STRUCTURED_FIELD:
+        return inbound
+    inbound.cursor = decode_address(record[1], record[2])
+    for part in record[INBOUND_HEADER:].split(tn3270.SBA)[1:]:
+        if len(part) >= ADDRESS_SIZE:
+            address = decode_address(part[0], part[1])
+            inbound.fields[address] = part[ADDRESS_SIZE:]
+    return inbound
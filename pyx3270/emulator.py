@@ -1,18 +1,21 @@
 import errno
-import logging.config
+import logging
 import math
 import os
 import re
+import selectors
 import socket
 import subprocess
-from contextlib import closing
+from contextlib import closing, contextmanager
 from functools import cache
 from logging import getLogger
-from time import sleep, time
-from typing import Literal
-from pyx3270.x3270_commands import x3270_command
+from time import monotonic, perf_counter, sleep
+from typing import Iterable, Iterator, Literal
+
+from pyx3270.conditions import Condition, StringCondition
 from pyx3270.exceptions import (
     CommandError,
+    CommandTimeoutError,
     FieldTruncateError,
     KeyboardStateError,
     NotConnectedException,
@@ -24,12 +27,24 @@ from pyx3270.iemulator import (
     AbstractEmulatorCmd,
     AbstractExecutableApp,
 )
-from pyx3270.logging_config import LOGGING_CONFIG
+from pyx3270.logging_config import TRACE, command_trace, configure_logging
+from pyx3270.metrics import CommandMetrics
+from pyx3270.native import NativeApp
+from pyx3270.retry import RetryPolicy, RetryStats
+from pyx3270.x3270_commands import x3270_command
 
 logger = getLogger(__name__)
 
+WAIT_BACKOFF_MIN = 0.05
+WAIT_BACKOFF_MAX = 1.0
+WAIT_SLICE = 0.5
 BINARY_FOLDER = os.path.join(os.path.dirname(__file__), 'bin')
 MODEL_TYPE = Literal['2', '3', '4', '5']
+TRANSPORT_TYPE = Literal['pipe', 'unix', 'tcp', 'native']
+SOCKET_CONNECT_TIMEOUT = 5.0
+SOCKET_READ_TIMEOUT = 120.0
+COMMAND_TIMEOUT = 30.0
+READ_CHUNK_SIZE = 65536
 MODEL_DIMENSIONS = {
     '2': {
         'rows': 24,
@@ -49,6 +64,50 @@ MODEL_DIMENSIONS = {
     },
 }
 
+WAIT_SECONDS_RE = re.compile(rb'\s*wait\(\s*(\d+(?:\.\d+)?)', re.I)
+
+# Ações que não alteram o conteúdo da tela e, portanto, não invalidam o
+# retrato (Screen) mantido em cache pelo X3270Cmd.
+READ_ONLY_ACTIONS = frozenset({
+    'ascii',
+    'ascii1',
+    'asciifield',
+    'backtab',
+    'bell',
+    'down',
+    'ebcdic',
+    'ebcdicfield',
+    'fieldend',
+    'help',
+    'home',
+    'ignore',
+    'info',
+    'left',
+    'left2',
+    'movecursor',
+    'movecursor1',
+    'movecursoroffset',
+    'newline',
+    'nextword',
+    'previousword',
+    'printtext',
+    'query',
+    'readbuffer',
+    'right',
+    'right2',
+    'screentrace',
+    'show',
+    'tab',
+    'up',
+})
+
+
+def action_name(cmdstr: bytes | str) -> str:
+    """Extrai o nome da ação de um comando (``b'Ascii(0, 0)'`` → ``ascii``)."""
+    if isinstance(cmdstr, bytes):
+        cmdstr = cmdstr.decode('utf-8', errors='replace')
+    return cmdstr.split('(', 1)[0].strip().lower()
+
 
 class ExecutableApp(AbstractExecutableApp):
     args = list()
@@ -57,6 +116,8 @@ class ExecutableApp(AbstractExecutableApp):
         logger.debug(f'Inicializando ExecutableApp ({shell=}, {model=})')
         self.shell = shell
         self.subprocess = None
+        self._selector = None
+        self._buffer = bytearray()
         self.args = self._get_executable_app_args(model)
         self._spawn_app()
 
@@ -91,6 +152,9 @@ class ExecutableApp(AbstractExecutableApp):
             logger.error('Erro ao iniciar processo')
             raise
 
+        self._selector = None
+        self._buffer = bytearray()
+
     def _get_executable_app_args(self, model: MODEL_TYPE) -> list:
         logger.debug(f'Obtendo argumentos para modelo: {model}')
         args = self.__class__.args + [
@@ -115,88 +179,160 @@ class ExecutableApp(AbstractExecutableApp):
         logger.info(f'Aplicativo fechado com código de retorno: {return_code}')
         return return_code
 
+    def kill(self) -> None:
+        """Encerra à força um processo que parou de responder."""
+        if self.subprocess and self.subprocess.poll() is None:
+            logger.warning(f'Matando processo {self.subprocess.pid}')
+            self.subprocess.kill()
+            try:
+                self.subprocess.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                logger.error('Processo não encerrou após kill')
+
     def write(self, data: str):
-        logger.debug(f'Escrevendo dados para o processo: {data}')
         try:
             self.subprocess.stdin.write(data)
             self.subprocess.stdin.flush()
-            logger.debug('Dados escritos com sucesso')
         except Exception:
             logger.error('Erro ao escrever dados')
             raise
 
-    def readline(self, timeout=5) -> bytes:
+    def readline(self, timeout: float | None = None) -> bytes:
+        """
+        Lê uma linha do processo. Com ``timeout`` (segundos) levanta
+        CommandTimeoutError se a linha não chegar a tempo.
+        """
         try:
-            logger.debug('Aguardando dados no buffer do processo')
-            line = self.subprocess.stdout.readline()
-            logger.debug(f'Linha lida: {line}')
-            return line
+            # No Windows pipes não suportam select: leitura bloqueante.
+            if os.name == 'nt':
+                return self.subprocess.stdout.readline()
+            return self._readline_nonblocking(timeout)
+        except CommandTimeoutError:
+            logger.error(f'Nenhuma resposta do processo em {timeout:.2f}s')
+            raise
         except Exception:
             logger.error('Erro ao ler linha')
             raise
 
+    def _readline_nonblocking(self, timeout: float | None) -> bytes:
+        deadline = None if timeout is None else monotonic() + timeout
+        stdout = self.subprocess.stdout
+        if self._selector is None:
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(stdout, selectors.EVENT_READ)
+        while True:
+            index = self._buffer.find(b'\n')
+            if index >= 0:
+                line = bytes(self._buffer[: index + 1])
+                del self._buffer[: index + 1]
+                return line
+
+            remaining = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - monotonic())
+            if not self._selector.select(remaining):
+                raise CommandTimeoutError(
+                    f'Tempo limite de {timeout:.2f}s excedido'
+                )
+
+            chunk = os.read(stdout.fileno(), READ_CHUNK_SIZE)
+            if not chunk:  # EOF: devolve o que restou, como readline()
+                line = bytes(self._buffer)
+                self._buffer.clear()
+                return line
+            self._buffer += chunk
+
 
 class Command(AbstractCommand):
-    def __init__(self, app: ExecutableApp, cmdstr: bytes | str) -> None:
-        logger.debug(f'Inicializando Command com comando: {cmdstr}')
+    def __init__(
+        self,
+        app: ExecutableApp,
+        cmdstr: bytes | str,
+        timeout: float | None = None,
+    ) -> None:
         if isinstance(cmdstr, str):
             cmdstr = bytes(cmdstr, 'utf-8', errors='replace')
         self.app = app
         self.cmdstr = cmdstr
+        self.timeout = self._effective_timeout(cmdstr, timeout)
+        self.deadline = None
         self.status_line = None
         self.data = []
+        self.trace = command_trace.sample()
+
+    @staticmethod
+    def _effective_timeout(
+        cmdstr: bytes, timeout: float | None
+    ) -> float | None:
+        """Estende o limite pelo tempo pedido em ``Wait(n, ...)``."""
+        if timeout is None:
+            return None
+        match = WAIT_SECONDS_RE.match(cmdstr)
+        if match:
+            return timeout + float(match.group(1))
+        return timeout
+
+    def _remaining(self) -> float | None:
+        if self.timeout is None:
+            return None
+        if self.deadline is None:
+            self.deadline = monotonic() + self.timeout
+        return max(0.0, self.deadline - monotonic())
+
+    def _readline(self) -> bytes:
+        remaining = self._remaining()
+        if remaining is None:
+            return self.app.readline()
+        return self.app.readline(timeout=remaining)
 
     def execute(self) -> bool:
-        logger.debug(f'Executando comando: {self.cmdstr}')
+        if self.trace:
+            logger.log(TRACE, '> %r', self.cmdstr)
         try:
+            self._remaining()
             self.app.write(self.cmdstr + b'\n')
-
-            while True:
-                line = self.app.readline()
-                if not line.startswith('data:'.encode('utf-8')):
-                    self.status_line = line.rstrip()
-                    logger.debug(f'Status line: {self.status_line}')
-                    result = self.app.readline().rstrip()
-                    logger.debug(f'Resultado: {result}')
-                    return self.handle_result(result.decode('utf-8'))
-
-                logger.debug(f'Dados recebidos: {line}')
-                self.data.append(line[6:].rstrip('\n\r'.encode('utf-8')))
-
+            return self.read_response()
         except Exception:
-            logger.error(f'Erro durante execução do comando: {self.cmdstr}')
+            logger.error('Erro durante execução do comando: %r', self.cmdstr)
             raise
 
+    def read_response(self) -> bool:
+        """Lê as linhas de dados, status e resultado de um comando já
+        enviado ao processo."""
+        while True:
+            line = self._readline()
+            if self.trace:
+                logger.log(TRACE, '< %r', line)
+            if not line.startswith(b'data:'):
+                self.status_line = line.rstrip()
+                result = self._readline().rstrip()
+                if self.trace:
+                    logger.log(TRACE, '< %r', result)
+                return self.handle_result(result.decode('utf-8'))
+
+            self.data.append(line[6:].rstrip(b'\n\r'))
+
     def handle_result(self, result: str) -> bool:
-        logger.debug(f'Processando resultado: {result}')
-        count = 0
-        max_loop = 5
-        while count < max_loop:
-            try:
-                if not result and self.cmdstr == b'Quit':
-                    logger.info('Comando Quit executado com sucesso')
-                    return True
-                elif result.lower() == 'ok':
-                    logger.debug('Comando executado com sucesso (OK)')
-                    return True
-                else:
-                    error_msg = f'"erro" esperado, mas recebido: {result}.'
-                    logger.warning(error_msg)
-                    raise ValueError(error_msg)
-            except ValueError:
-                logger.warning(
-                    f'Tentativa {count + 1}/{max_loop} falhou, aguardando 1s'
-                )
-                sleep(0.35)
-                count += 1
+        if not result and self.cmdstr == b'Quit':
+            logger.info('Comando Quit executado com sucesso')
+            return True
+        if result.lower() == 'ok':
+            return True
+
+        # O resultado já foi lido: repetir a checagem não o altera. Novas
+        # tentativas ficam a cargo da RetryPolicy do X3270.
+        logger.warning('"ok" esperado, mas recebido: %s.', result)
+        self.raise_error()
 
+    def raise_error(self) -> None:
+        """Levanta o erro correspondente às linhas de dados do comando."""
         msg = b'[sem mensagem de erro]'
         if self.data:
             msg = ''.encode('utf-8').join(self.data).rstrip()
         error_msg = msg.decode('utf-8')
 
         if (
-            'keyboard locked' in error_msg.lower() 
+            'keyboard locked' in error_msg.lower()
             or 'canceled' in error_msg.lower()
         ):
             logger.error(f'Teclado travado detectado: {error_msg}')
@@ -206,9 +342,54 @@ class Command(AbstractCommand):
         raise CommandError(error_msg)
 
 
+class CommandBatch:
+    """
+    Fila de comandos enviados ao processo em uma única escrita.
+
+    O s3270 processa os comandos na ordem em que chegam, portanto as
+    respostas (dados, status e resultado) são lidas na mesma ordem.
+    """
+
+    def __init__(
+        self, app: ExecutableApp, timeout: float | None = None
+    ) -> None:
+        self.app = app
+        self.timeout = timeout
+        self.commands: list[Command] = []
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def add(self, cmdstr: bytes | str) -> Command:
+        cmd = Command(self.app, cmdstr, timeout=self.timeout)
+        self.commands.append(cmd)
+        logger.debug('Comando enfileirado no batch: %r', cmd.cmdstr)
+        return cmd
+
+    def execute(self) -> list[Command]:
+        if not self.commands:
+            return self.commands
+
+        logger.debug('Executando batch com %d comandos', len(self.commands))
+        self.app.write(b''.join(cmd.cmdstr + b'\n' for cmd in self.commands))
+
+        # Todas as respostas precisam ser consumidas, mesmo após uma falha,
+        # para que o pipe não fique dessincronizado com o próximo comando.
+        error = None
+        for cmd in self.commands:
+            try:
+                cmd.read_response()
+            except (CommandError, KeyboardStateError) as e:
+                logger.warning(f'Falha no batch em {cmd.cmdstr}: {e}')
+                error = error or e
+
+        if error:
+            raise error
+        return self.commands
+
+
 class Status:
     def __init__(self, status_line: str) -> None:
-        logger.debug(f'Inicializando Status com linha: {status_line}')
         if not status_line:
             status_line = (' ' * 12).encode('utf-8')
             logger.debug('Status line vazia, usando padrão')
@@ -228,17 +409,84 @@ class Status:
             self.cursor_col = parts[9] or None
             self.window_id = parts[10] or None
             self.exec_time = parts[11] or None
-            logger.debug(
-                f'Status: {self.connection_state=}, {self.emulator_mode=}'
-            )
         except IndexError:
             logger.error('Status não tem items suficientes.')
 
+    @property
+    def host_time(self) -> float | None:
+        """Segundos que o s3270 aguardou o host (campo exec_time)."""
+        try:
+            return float(self.exec_time)
+        except (AttributeError, TypeError, ValueError):
+            return None
+
     def __str__(self) -> str:
         return f'Status: {self.status_line}'
 
 
-class Wc3270App(ExecutableApp):
+class Screen:
+    """Retrato do conteúdo da tela obtido com um único ``Ascii()``."""
+
+    def __init__(self, rows: list[str]) -> None:
+        self.rows = rows
+
+    @classmethod
+    def from_command(cls, cmd: Command) -> 'Screen':
+        return cls([row.decode('utf8') for row in cmd.data])
+
+    @property
+    def text(self) -> str:
+        # Mesmo formato retornado por ascii(): linhas unidas por espaço.
+        return ' '.join(self.rows)
+
+    def get_string(self, row: int, col: int, length: int) -> str:
+        """Equivalente a ``Ascii(row, col, length)`` (origem 0)."""
+        return self.rows[row][col : col + length]
+
+    def get_area(self, row: int, col: int, rows: int, cols: int) -> str:
+        """Equivalente a ``Ascii(row, col, rows, cols)`` (origem 0)."""
+        return ' '.join(
+            line[col : col + cols] for line in self.rows[row : row + rows]
+        )
+
+
+class ScriptSocketMixin:
+    """Troca de comandos com o emulador pela porta de script (socket)."""
+
+    socket = None
+    socket_fh = None
+    timeout = None
+
+    def write(self, data: str) -> None:
+        if self.socket_fh is None:
+            logger.error('Tentativa de escrita em socket não inicializado')
+            raise NotConnectedException
+        try:
+            self.socket_fh.write(data)
+            self.socket_fh.flush()
+        except OSError:
+            logger.error('Erro de E/S ao escrever no socket')
+            raise NotConnectedException
+
+    def readline(self, timeout: float | None = None) -> bytes:
+        if self.socket_fh is None:
+            logger.error('Tentativa de leitura de socket não inicializado')
+            raise NotConnectedException
+        try:
+            if timeout is None:
+                timeout = self.timeout
+            if self.socket is not None:
+                self.socket.settimeout(timeout)
+            return self.socket_fh.readline()
+        except TimeoutError:
+            logger.error('Tempo limite de leitura do socket excedido')
+            raise CommandTimeoutError(f'Tempo limite de {timeout}s excedido')
+        except Exception:
+            logger.error('Erro ao ler do socket')
+            raise NotConnectedException
+
+
+class Wc3270App(ScriptSocketMixin, ExecutableApp):
     args = ['-xrm', '"wc3270.unlockDelay: False"']
 
     def __init__(self, model: MODEL_TYPE) -> None:
@@ -324,32 +572,6 @@ class Wc3270App(ExecutableApp):
         except Exception:
             logger.error('Erro ao fechar socket.')
 
-    def write(self, data: str) -> None:
-        logger.debug(f'Escrevendo dados para socket: {data}')
-        if self.socket_fh is None:
-            logger.error('Tentativa de escrita em socket não inicializado')
-            raise NotConnectedException
-        try:
-            self.socket_fh.write(data)
-            self.socket_fh.flush()
-            logger.debug('Dados escritos com sucesso')
-        except OSError:
-            logger.error('Erro de E/S ao escrever no socket')
-            raise NotConnectedException
-
-    def readline(self) -> bytes:
-        logger.debug('Lendo linha do socket')
-        if self.socket_fh is None:
-            logger.error('Tentativa de leitura de socket não inicializado')
-            raise NotConnectedException
-        try:
-            line = self.socket_fh.readline()
-            logger.debug(f'Linha lida: {line}')
-            return line
-        except Exception:
-            logger.error('Erro ao ler do socket')
-            raise NotConnectedException
-
 
 class Ws3270App(ExecutableApp):
     args = [
@@ -389,16 +611,190 @@ class S3270App(ExecutableApp):
         super().__init__(shell=True, model=model)
 
 
+class S3270SocketApp(ScriptSocketMixin, S3270App):
+    """
+    s3270 controlado por socket em vez de stdin/stdout.
+
+    ``transport='unix'`` usa ``-socket`` (``/tmp/x3sck.<pid>``) e
+    ``transport='tcp'`` usa ``-scriptport`` em 127.0.0.1. As leituras
+    respeitam ``timeout`` segundos; um estouro levanta
+    CommandTimeoutError e o X3270 substitui o processo. Prefira 'unix':
+    no TCP as respostas do s3270 sofrem o atraso do algoritmo de Nagle
+    (~40ms por comando).
+    """
+
+    def __init__(
+        self,
+        model: MODEL_TYPE,
+        transport: TRANSPORT_TYPE = 'unix',
+        timeout: float | None = SOCKET_READ_TIMEOUT,
+        connect_timeout: float = SOCKET_CONNECT_TIMEOUT,
+    ) -> None:
+        if transport not in {'unix', 'tcp'}:
+            raise ValueError(f'Transporte inválido: {transport}')
+        logger.info(f'Inicializando S3270SocketApp ({model=}, {transport=})')
+        self.transport = transport
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.script_port = None
+        self.socket_path = None
+        if transport == 'tcp':
+            self.script_port = Wc3270App._get_free_port()
+        # shell=False: com shell=True os argumentos não chegam ao s3270
+        # no POSIX e o PID seria o do shell, não o do emulador.
+        ExecutableApp.__init__(self, shell=False, model=model)
+        self._make_socket()
+
+    def _get_executable_app_args(self, model: MODEL_TYPE) -> list:
+        args = super()._get_executable_app_args(model)
+        if self.transport == 'tcp':
+            return args + ['-scriptport', f'127.0.0.1:{self.script_port}']
+        return args + ['-socket']
+
+    def _socket_address(self) -> tuple[int, str | tuple[str, int]]:
+        if self.transport == 'tcp':
+            return socket.AF_INET, ('127.0.0.1', self.script_port)
+        self.socket_path = f'/tmp/x3sck.{self.subprocess.pid}'
+        return socket.AF_UNIX, self.socket_path
+
+    def _make_socket(self) -> None:
+        family, address = self._socket_address()
+        logger.info(f'Conectando ao socket de script: {address}')
+        deadline = monotonic() + self.connect_timeout
+        delay = 0.01
+        while True:
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                sock.connect(address)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                sock.close()
+                if self.subprocess.poll() is not None:
+                    logger.error('Processo s3270 encerrado antes do socket')
+                    raise NotConnectedException
+                if monotonic() >= deadline:
+                    logger.error(
+                        f'Socket de script indisponível após '
+                        f'{self.connect_timeout}s'
+                    )
+                    raise NotConnectedException
+                sleep(delay)
+                delay = min(delay * 2, 0.25)
+            except OSError:
+                sock.close()
+                logger.error('Erro de conexão não recuperável.')
+                raise NotConnectedException
+
+        sock.settimeout(self.timeout)
+        if family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket = sock
+        self.socket_fh = sock.makefile(mode='rwb')
+        logger.debug('Socket de script conectado')
+
+    def close(self) -> int:
+        logger.info('Fechando socket de script')
+        for resource in (self.socket_fh, self.socket):
+            try:
+                if resource is not None:
+                    resource.close()
+            except Exception:
+                logger.warning('Erro ao fechar socket de script.')
+        self.socket_fh = self.socket = None
+        return_code = super().close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                logger.warning(f'Não foi possível remover {self.socket_path}')
+        return return_code
+
+
+def wait_slice(
+    conditions: Iterable[Condition], remaining: float, fractional: bool
+) -> float:
+    """
+    Duração do próximo ``Wait(n, Output)`` de wait_until: até WAIT_SLICE
+    (ou 1 s, se o transporte só aceita segundos inteiros), sem passar do
+    tempo restante nem do ``retry_after`` das condições.
+    """
+    slice_time = min(remaining, WAIT_SLICE if fractional else 1.0)
+    for condition in conditions:
+        retry_after = condition.retry_after()
+        if retry_after is not None:
+            slice_time = min(slice_time, retry_after)
+    return slice_time
+
+
 class X3270Cmd(AbstractEmulatorCmd):
-    def __init__(self, time_unlock: int = 60) -> None:
+    _batch: CommandBatch | None = None
+    fractional_wait = False
+
+    def __init__(
+        self, time_unlock: int = 60, screen_cache: bool = False
+    ) -> None:
         logger.info(f'Inicializando X3270Cmd com time_unlock: {time_unlock}')
         self.time_unlock = time_unlock
+        self.screen_cache = screen_cache
+        self.screen_cache_hits = 0
+        self.screen_cache_misses = 0
+        self._screen: Screen | None = None
 
     def __getattr__(self, name):
         def x3270_builtin_func(*args, **kwargs):
             return x3270_command(self, name, *args, **kwargs)
+
         return x3270_builtin_func
 
+    def screen(self, refresh: bool = False) -> Screen:
+        """
+        Retorna o retrato da tela atual. Com ``screen_cache`` ativo, o mesmo
+        ``Ascii()`` atende todas as leituras até a próxima ação que altere a
+        tela.
+
+        Dentro de ``batch()`` o ``Ascii()`` só seria executado na saída do
+        bloco, então a leitura levanta CommandError.
+        """
+        self._check_readable()
+        if self.screen_cache and self._screen is not None and not refresh:
+            self.screen_cache_hits += 1
+            return self._screen
+
+        self.screen_cache_misses += 1
+        screen = Screen.from_command(self._exec_command(b'ascii()'))
+        if self.screen_cache:
+            self._screen = screen
+        return screen
+
+    def invalidate_screen(self) -> None:
+        self._screen = None
+
+    def _check_readable(self) -> None:
+        """CommandError dentro de ``batch()``, onde o Ascii() só enfileira."""
+        if self._batch is not None:
+            raise CommandError(
+                'Leitura de tela indisponível dentro de batch()'
+            )
+
+    def _track_screen_change(self, cmdstr: bytes | str) -> None:
+        if self._screen is not None:
+            if action_name(cmdstr) not in READ_ONLY_ACTIONS:
+                logger.debug('Retrato da tela invalidado por: %r', cmdstr)
+                self._screen = None
+
+    @property
+    def screen_cache_stats(self) -> dict[str, int | float]:
+        total = self.screen_cache_hits + self.screen_cache_misses
+        return dict(
+            hits=self.screen_cache_hits,
+            misses=self.screen_cache_misses,
+            hit_rate=self.screen_cache_hits / total if total else 0.0,
+        )
+
+    def reset_screen_cache_stats(self) -> None:
+        self.screen_cache_hits = 0
+        self.screen_cache_misses = 0
+
     def clear_screen(self) -> None:
         logger.info('Limpando tela')
         count = 0
@@ -442,43 +838,80 @@ class X3270Cmd(AbstractEmulatorCmd):
             f'Aguardando {string=} na posição '
             f'({ypos},{xpos}), {equal=}, {timeout=}s'
         )
+        return self.wait_until(
+            StringCondition(ypos, xpos, string, equal), timeout=timeout
+        )
 
-        end_time = time() + timeout
-        result = None
+    def wait_until(
+        self,
+        *conditions: Condition,
+        timeout: float = 5,
+        match: Literal['all', 'any'] = 'all',
+    ) -> bool:
+        """
+        Aguarda até as condições serem satisfeitas ou o tempo acabar.
+
+        Entre as verificações o emulador fica bloqueado em
+        ``Wait(n, Output)``, que retorna quando o host altera a tela, em
+        fatias curtas (wait_slice) que nunca passam do tempo limite.
+        Restando menos de 1 s para um transporte que só aceita segundos
+        inteiros, a última fatia é um ``sleep``. Se o ``Wait`` falhar por
+        outro motivo que não o tempo limite, as verificações seguem com
+        espera exponencial.
+        """
+        matcher = all if match == 'all' else any
+        for condition in conditions:
+            condition.reset()
+
+        end_time = monotonic() + timeout
+        delay = WAIT_BACKOFF_MIN
+        result = False
+
+        while True:
+            result = matcher(cond.check(self) for cond in conditions)
+            logger.debug('Resultado da verificação: %s', result)
+            remaining = end_time - monotonic()
+            if result or remaining <= 0:
+                break
 
-        while time() < end_time:
-            try:
-                found = self.get_string(ypos, xpos, len(string))
-                logger.debug(f"String encontrada: '{found}'")
-                if equal:
-                    result = found == string
-                else:
-                    result = found != string
-                logger.debug(f'Resultado da comparação: {result}')
-                if result:
-                    break
-            except Exception:
-                logger.debug('Erro ao buscar string, tentando novamente')
+            fractional = self.fractional_wait
+            slice_time = wait_slice(conditions, remaining, fractional)
+            if not fractional and slice_time < 1:
+                sleep(slice_time)
+                self.invalidate_screen()
                 continue
+            try:
+                self.wait(round(slice_time, 3) if fractional else 1, 'Output')
+                delay = WAIT_BACKOFF_MIN
+            except CommandError as e:
+                if 'timed out' in str(e).lower():
+                    continue
+                logger.debug(
+                    'Wait(Output) indisponível, aguardando %ss', delay
+                )
+                sleep(min(delay, max(0.0, end_time - monotonic())))
+                delay = min(delay * 2, WAIT_BACKOFF_MAX)
 
-        logger.warning(
-            f'Timeout atingido após {timeout}s, resultado final: {result}'
-        )
+        if not result:
+            logger.warning(
+                'Timeout atingido após %ss aguardando %s', timeout, conditions
+            )
         return result
 
     def string_found(self, ypos: int, xpos: int, string: str) -> bool:
         logger.debug(
-            f'Verificando se {string=} existe na posição ({ypos},{xpos})'
+            'Verificando se string=%r existe na posição (%s,%s)',
+            string,
+            ypos,
+            xpos,
         )
         try:
             found = self.get_string(ypos, xpos, len(string))
             result = found == string
-            logger.debug(f"Resultado: {result} (encontrado: '{found}')")
+            logger.debug("Resultado: %s (encontrado: '%s')", result, found)
             return result
         except Exception:
-            logger.error(
-                f'Erro ao verificar {string=}',
-            )
+            logger.error('Erro ao verificar string=%r', string)
             return False
 
     def delete_field(self) -> None:
@@ -487,14 +920,14 @@ class X3270Cmd(AbstractEmulatorCmd):
         logger.debug('Campo deletado')
 
     def move_to(self, ypos: int, xpos: int) -> None:
-        logger.debug(f'Movendo cursor para posição ({ypos},{xpos})')
+        logger.debug('Movendo cursor para posição (%s,%s)', ypos, xpos)
         self.movecursor1(ypos, xpos)
         logger.debug('Cursor movido')
 
     def send_pf(self, value: int) -> None:
-        logger.info(f'Enviando tecla PF{value}')
+        logger.info('Enviando tecla PF%s', value)
         self.pf(value)
-        logger.debug(f'PF{value} enviado e tela desbloqueada')
+        logger.debug('PF%s enviado e tela desbloqueada', value)
 
     def send_string(
         self,
@@ -514,21 +947,24 @@ class X3270Cmd(AbstractEmulatorCmd):
 
         if original != tosend:
             logger.debug(
-                f'String modificada para {tosend_str} '
-                f'(removidos caracteres especiais)'
+                'String modificada para %s (removidos caracteres especiais)',
+                tosend_str,
             )
 
         if xpos is not None and ypos is not None:
             logger.info(
-                f"Enviando string '{tosend_str}' para posição {ypos=} {xpos=}"
+                "Enviando string '%s' para posição ypos=%s xpos=%s",
+                tosend_str,
+                ypos,
+                xpos,
             )
             self.move_to(ypos, xpos)
         else:
-            logger.info(f"Enviando string '{tosend_str}' na posição atual.")
+            logger.info("Enviando string '%s' na posição atual.", tosend_str)
 
         self.string(f'"{tosend}"')
         self.wait(self.time_unlock, 'unlock')
-        logger.debug("String '{tosend_str}' enviada para o emulador.")
+        logger.debug("String '%s' enviada para o emulador.", tosend_str)
 
     def send_enter(self) -> None:
         logger.info('Enviando tecla ENTER')
@@ -544,9 +980,12 @@ class X3270Cmd(AbstractEmulatorCmd):
 
     def get_string(self, ypos: int, xpos: int, length: int) -> str:
         logger.debug(
-            f'Obtendo string na posição ({ypos},{xpos})'
-            f' com comprimento {length}'
+            'Obtendo string na posição (%d,%d) com comprimento %d',
+            ypos,
+            xpos,
+            length,
         )
+        self._check_readable()
         try:
             self.check_limits(ypos, xpos)
             if (xpos + length) > (self.model_dimensions['columns'] + 1):
@@ -558,8 +997,11 @@ class X3270Cmd(AbstractEmulatorCmd):
 
             xpos -= 1
             ypos -= 1
-            result = self.ascii(ypos, xpos, length)
-            logger.debug(f"String obtida: '{result}'")
+            if self.screen_cache:
+                result = self.screen().get_string(ypos, xpos, length)
+            else:
+                result = self.ascii(ypos, xpos, length)
+            logger.debug("String obtida: '%s'", result)
             return result
         except Exception:
             logger.error(
@@ -571,8 +1013,13 @@ class X3270Cmd(AbstractEmulatorCmd):
         self, yposi: int, xposi: int, ypose: int, xpose: int
     ) -> str:
         logger.debug(
-            f'Obtendo área de texto de ({yposi},{xposi}) até ({ypose},{xpose})'
+            'Obtendo área de texto de (%d,%d) até (%d,%d)',
+            yposi,
+            xposi,
+            ypose,
+            xpose,
         )
+        self._check_readable()
         try:
             self.check_limits(yposi, xposi)
             self.check_limits(ypose, xpose)
@@ -580,8 +1027,11 @@ class X3270Cmd(AbstractEmulatorCmd):
             xposi -= 1
             ypose -= yposi
             xpose -= xposi
-            result = self.ascii(yposi, xposi, ypose, xpose)
-            logger.debug(f'Área obtida com {len(result)} caracteres')
+            if self.screen_cache:
+                result = self.screen().get_area(yposi, xposi, ypose, xpose)
+            else:
+                result = self.ascii(yposi, xposi, ypose, xpose)
+            logger.debug('Área obtida com %d caracteres', len(result))
             return result
         except Exception:
             logger.error('Erro ao obter área de texto')
@@ -589,15 +1039,16 @@ class X3270Cmd(AbstractEmulatorCmd):
 
     def get_full_screen(self, header: bool = True) -> str:
         logger.debug(
-            f'Obtendo conteúdo completo da tela (com header: {header})'
+            'Obtendo conteúdo completo da tela (com header: %s)', header
         )
+        self._check_readable()
         try:
-            text = self.ascii()
+            text = self.screen().text if self.screen_cache else self.ascii()
             if not header:
                 start = self.model_dimensions['columns']
                 text = text[start:]
                 logger.debug('Header removido do conteúdo')
-            logger.debug(f'Conteúdo obtido com {len(text)} caracteres')
+            logger.debug('Conteúdo obtido com %d caracteres', len(text))
             return text
         except Exception:
             logger.error(
@@ -620,7 +1071,6 @@ class X3270Cmd(AbstractEmulatorCmd):
             raise
 
     def check_limits(self, ypos, xpos):
-        logger.debug(f'Verificando limites para posição ({ypos},{xpos})')
         if ypos > self.model_dimensions['rows']:
             error_msg = (
                 f'Você excedeu o limite do eixo y da tela do mainframe: '
@@ -635,28 +1085,20 @@ class X3270Cmd(AbstractEmulatorCmd):
             )
             logger.error(error_msg)
             raise FieldTruncateError(error_msg)
-        logger.debug('Posição dentro dos limites')
 
     def search_string(self, string: str, ignore_case: bool = False) -> bool:
         logger.info(f"Buscando texto '{string}' na tela ({ignore_case=})")
         try:
-            for ypos in range(1, self.model_dimensions['rows'] + 1):
-                line = self.get_string(
-                    ypos, 1, self.model_dimensions['columns']
+            if self.screen_cache:
+                lines = self.screen().rows
+            else:
+                lines = (
+                    self.get_string(ypos, 1, self.model_dimensions['columns'])
+                    for ypos in range(1, self.model_dimensions['rows'] + 1)
                 )
-                if ignore_case:
-                    string_comp = string.lower()
-                    line_comp = line.lower()
-                    logger.debug(
-                        f'Comparando (ignorando case) na linha {ypos}'
-                    )
-                else:
-                    string_comp = string
-                    line_comp = line
-                    logger.debug(
-                        f'Comparando (case sensitive) na linha {ypos}'
-                    )
-
+            string_comp = string.lower() if ignore_case else string
+            for ypos, line in enumerate(lines, start=1):
+                line_comp = line.lower() if ignore_case else line
                 if string_comp in line_comp:
                     logger.info(f'Texto encontrada na linha {ypos}')
                     return True
@@ -703,31 +1145,62 @@ class X3270Cmd(AbstractEmulatorCmd):
 
 
 class X3270(AbstractEmulator, X3270Cmd):
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         visible: bool = False,
         model: MODEL_TYPE = '2',
-        save_log_file: bool = False,
+        save_log_file: bool | int | str = False,
         time_unlock: int = 60,
+        *,
+        screen_cache: bool = False,
+        transport: TRANSPORT_TYPE = 'pipe',
+        command_timeout: float | None = COMMAND_TIMEOUT,
+        retry_policy: RetryPolicy | None = None,
+        metrics: bool = True,
     ) -> None:
         if save_log_file:
-            logging.config.dictConfig(LOGGING_CONFIG)
-        X3270Cmd.__init__(self, time_unlock=time_unlock)
+            # True mantém o log em DEBUG; um nível ('INFO', 'TRACE', ...)
+            # evita o custo do log detalhado em sessões de produção.
+            configure_logging(
+                logging.DEBUG if save_log_file is True else save_log_file
+            )
+        X3270Cmd.__init__(
+            self, time_unlock=time_unlock, screen_cache=screen_cache
+        )
         logger.info(f'Inicializando X3270 (visible={visible}, model={model})')
         self.model = model
         self.model_dimensions = MODEL_DIMENSIONS[model]
         self.visible = visible
+        self.transport = transport
+        self.command_timeout = command_timeout
+        self._timeout_override: float | None = None
+        self._recycling = False
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_stats = RetryStats()
+        self.metrics = CommandMetrics(enabled=metrics)
         self.app: ExecutableApp = self._create_app()
         self.is_terminated = False
         self.host = None
         self.port = None
         self.tls = None
         self.mode_3270 = None
+        self._batch: CommandBatch | None = None
         logger.debug('X3270 inicializado')
 
+    @property
+    def fractional_wait(self) -> bool:
+        return self.app.fractional_wait
+
     def _create_app(self) -> None:
         logger.info('Criando aplicativo emulador')
         try:
+            if self.transport == 'native':
+                logger.debug('Criando NativeApp (TN3270 em Python)')
+                return NativeApp(
+                    self.model,
+                    self.model_dimensions['rows'],
+                    self.model_dimensions['columns'],
+                )
             if os.name == 'nt':  # windows
                 if self.visible:
                     logger.debug('Criando Wc3270App (Windows, visível)')
@@ -738,6 +1211,11 @@ class X3270(AbstractEmulator, X3270Cmd):
             if self.visible:  # linux
                 logger.debug('Criando X3270App (Linux, visível)')
                 return X3270App(self.model)
+            if self.transport != 'pipe':
+                logger.debug(
+                    f'Criando S3270SocketApp (Linux, {self.transport})'
+                )
+                return S3270SocketApp(self.model, self.transport)
             logger.debug('Criando S3270App (Linux, não visível)')
             return S3270App(self.model)
 
@@ -746,36 +1224,208 @@ class X3270(AbstractEmulator, X3270Cmd):
             raise
 
     def _exec_command(self, cmdstr: str) -> Command:
-        logger.debug(f'Executando comando: {cmdstr}')
         if self.is_terminated:
             error_msg = 'Tentativa de executar comando em emulador terminado'
             logger.error(error_msg)
             raise TerminatedError
-        max_loop = 3
-        for exec in range(max_loop):
+        self._track_screen_change(cmdstr)
+        if self._batch is not None:
+            return self._batch.add(cmdstr)
+        policy = self.retry_policy
+        stats = self.retry_stats
+        metrics = self.metrics
+        action = action_name(cmdstr)
+        attempt = 0
+        first_failure = None
+        while True:
+            attempt += 1
             try:
-                cmd = Command(self.app, cmdstr)
+                cmd = Command(self.app, cmdstr, timeout=self._get_timeout())
+                start = perf_counter()
                 cmd.execute()
                 self.status = Status(cmd.status_line)
-                logger.debug(f'Comando executado, status: {self.status}')
+                metrics.record(
+                    action, perf_counter() - start, self.status.host_time
+                )
+                logger.debug('Comando %r executado, %s', cmdstr, self.status)
+                if first_failure is not None:
+                    stats.recovered += 1
                 return cmd
+            except CommandTimeoutError:
+                logger.error(f'Timeout ao executar {cmdstr}')
+                metrics.count(action, 'timeouts')
+                self._recycle_app()
+                raise
             except NotConnectedException:
                 logger.error('Emulador não conectado.')
                 raise NotConnectedException
-            except KeyboardStateError:
-                sleep(1)
-                logger.warning(
-                    f'Nova tentativa de exec command:'
-                    f'{cmdstr} {exec + 1}/{max_loop}'
+            except (KeyboardStateError, CommandError) as e:
+                metrics.count(
+                    action,
+                    'keyboard_errors'
+                    if isinstance(e, KeyboardStateError)
+                    else 'errors',
                 )
-                self.reset()
-                self.wait(self.time_unlock, 'unlock')
-                self.tab()
+                if not policy.is_retryable(e):
+                    raise
+                now = monotonic()
+                if first_failure is None:
+                    first_failure = now
+                    stats.retried_commands += 1
+                if not policy.should_retry(attempt, now - first_failure):
+                    break
+
+            self._backoff(cmdstr, attempt)
+
+        stats.exhausted += 1
         logger.error(
-            f'Erro ao executar {cmdstr} total de tentativas: {max_loop}'
+            f'Erro ao executar {cmdstr} total de tentativas: {attempt}'
         )
         raise CommandError
 
+    @contextmanager
+    def batch(self) -> Iterator[CommandBatch]:
+        """
+        Agrupa os comandos executados dentro do bloco em uma única escrita
+        para o processo, reduzindo as idas e voltas pelo pipe.
+
+        Os comandos são apenas enfileirados dentro do bloco (os retornos
+        ficam vazios) e executados na saída, em ordem. Os resultados ficam
+        disponíveis em ``batch.commands``. Blocos aninhados compartilham o
+        mesmo batch.
+        """
+        if self._batch is not None:
+            yield self._batch
+            return
+
+        self._batch = batch = CommandBatch(self.app, self._get_timeout())
+        try:
+            yield batch
+        except BaseException:
+            logger.warning(
+                f'Batch descartado com {len(batch)} comandos pendentes'
+            )
+            raise
+        finally:
+            self._batch = None
+
+        start = perf_counter()
+        try:
+            batch.execute()
+        except CommandTimeoutError:
+            logger.error('Timeout ao executar batch')
+            self.metrics.count('batch', 'timeouts')
+            self._recycle_app()
+            raise
+        finally:
+            self._record_batch_metrics(batch, perf_counter() - start)
+        if batch.commands:
+            self.status = Status(batch.commands[-1].status_line)
+            logger.debug(f'Batch executado, status: {self.status}')
+
+    def _record_batch_metrics(self, batch: CommandBatch, wall: float) -> None:
+        # O tempo total só é conhecido para o batch inteiro; por comando
+        # fica apenas o tempo de host informado no status.
+        self.metrics.record('batch', wall)
+        for cmd in batch.commands:
+            if cmd.status_line is not None:
+                host = Status(cmd.status_line).host_time
+                self.metrics.record(action_name(cmd.cmdstr), None, host)
+
+    def get_metrics(self) -> dict[str, dict]:
+        """
+        Latências por ação (``wall``, ``host`` e ``overhead``, em
+        segundos) e contadores de erros, erros de teclado, novas
+        tentativas e timeouts, além do custo total das novas tentativas.
+        """
+        return dict(
+            actions=self.metrics.as_dict(),
+            retries=self.retry_stats.as_dict(),
+        )
+
+    def reset_metrics(self) -> None:
+        self.metrics.reset()
+        self.reset_retry_stats()
+
+    def _backoff(self, cmdstr: bytes | str, attempt: int) -> None:
+        """Aguarda a espera da RetryPolicy e destrava o teclado."""
+        delay = self.retry_policy.delay(attempt)
+        logger.warning(
+            f'Nova tentativa de exec command:'
+            f'{cmdstr} {attempt}/{self.retry_policy.max_attempts} '
+            f'(aguardando {delay:.3f}s)'
+        )
+        self.metrics.count(action_name(cmdstr), 'retries')
+        self.retry_stats.retries += 1
+        self.retry_stats.backoff_time += delay
+        sleep(delay)
+        self._recover_keyboard()
+
+    def _recover_keyboard(self) -> None:
+        """Destrava o teclado antes de uma nova tentativa."""
+        start = monotonic()
+        try:
+            self.reset()
+            self.wait(self.time_unlock, 'unlock')
+            self.tab()
+        finally:
+            self.retry_stats.recovery_time += monotonic() - start
+
+    def reset_retry_stats(self) -> None:
+        self.retry_stats = RetryStats()
+
+    def _get_timeout(self) -> float | None:
+        if self._timeout_override is not None:
+            return self._timeout_override
+        return self.command_timeout
+
+    @contextmanager
+    def deadline(self, seconds: float) -> Iterator[None]:
+        """
+        Substitui ``command_timeout`` para os comandos executados no bloco.
+
+        Comandos ``Wait(n, ...)`` ainda recebem ``n`` segundos adicionais.
+        """
+        previous = self._timeout_override
+        self._timeout_override = seconds
+        try:
+            yield
+        finally:
+            self._timeout_override = previous
+
+    def _recycle_app(self) -> None:
+        """
+        Substitui um processo que parou de responder por um novo,
+        reconectando ao último host quando houver um.
+        """
+        if self._recycling:
+            return
+        logger.warning('[!] Reciclando processo do emulador travado')
+        self._recycling = True
+        try:
+            try:
+                self.app.kill()
+                self.app.close()
+            except Exception:
+                logger.warning('Erro ao encerrar processo travado')
+            self.invalidate_screen()
+            self.app = self._create_app()
+            if self.host is not None:
+                self.connect_host(
+                    self.host, self.port, self.tls, self.mode_3270
+                )
+        except Exception as e:
+            logger.error(f'Falha ao reciclar processo do emulador: {e}')
+        finally:
+            self._recycling = False
+
+    def execute_many(self, cmdstrs: Iterable[bytes | str]) -> list[Command]:
+        """Executa uma sequência de comandos em uma única escrita."""
+        with self.batch() as batch:
+            for cmdstr in cmdstrs:
+                self._exec_command(cmdstr)
+        return batch.commands
+
     def terminate(self) -> None:
         logger.info('Terminando emulador')
         if not self.is_terminated:
@@ -812,13 +1462,14 @@ class X3270(AbstractEmulator, X3270Cmd):
         host: str,
         port: int | str,
         tls: bool = True,
-        mode_3270: bool = True
+        mode_3270: bool = True,
     ) -> None:
         logger.info(f'Conectando ao host: {host}:{port} (tls={tls})')
         self.host = host
         self.port = port
         self.tls = tls
         self.mode_3270 = mode_3270
+        self.invalidate_screen()
         tls_prefix = 'L:Y:' if tls else ''
         strint_conn = f'{tls_prefix}{host}:{port}'
         logger.debug(f'String de conexão: {strint_conn}')
@@ -856,7 +1507,17 @@ class X3270(AbstractEmulator, X3270Cmd):
             logger.info('Criando nova instância para reconexão')
             args = self.host, self.port, self.tls, self.mode_3270
             logger.debug(f'Argumentos para nova instância: {args}')
-            new_instance = X3270(self.visible, self.model)
+            new_instance = X3270(
+                self.visible,
+                self.model,
+                time_unlock=self.time_unlock,
+                screen_cache=self.screen_cache,
+                transport=self.transport,
+                command_timeout=self.command_timeout,
+                retry_policy=self.retry_policy,
+            )
+            new_instance.metrics = self.metrics
+            new_instance.retry_stats = self.retry_stats
             new_instance.connect_host(*args)
             logger.debug('Nova instância criada com sucesso')
             # Atualiza todos os atributos de self com os do novo objeto
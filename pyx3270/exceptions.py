@@ -20,3 +20,19 @@ class FieldTruncateError(Exception):
 
 class NotConnectedException(Exception):
     """Não foi possivel conectar com o TerminalClient."""
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma sessão do pool ficou disponível dentro do tempo limite."""
+
+
+class CommandTimeoutError(Exception):
+    """O TerminalClient não respondeu ao comando dentro do tempo limite."""
+
+
+class ArchiveFormatError(Exception):
+    """Arquivo de telas gravadas em formato inválido."""
+
+
+class ControlError(Exception):
+    """Comando recusado ou canal de controle do replay indisponível."""
@@ -6,6 +6,9 @@ from pyx3270.x3270_commands import X3270Commands
 class AbstractExecutableApp(ABC):
     """Representa uma aplicação responsavel por emular um terminal tn3270."""
 
+    # O s3270 só aceita segundos inteiros em Wait(n, ...).
+    fractional_wait = False
+
     @classmethod
     @abstractmethod
     def connect(*args) -> bool: ...
@@ -17,7 +20,7 @@ class AbstractExecutableApp(ABC):
     def write(self, data: str) -> None: ...
 
     @abstractmethod
-    def readline(self) -> bytes: ...
+    def readline(self, timeout: float | None = None) -> bytes: ...
 
     @abstractmethod
     def _spawn_app(self) -> None: ...
@@ -48,6 +51,11 @@ class AbstractEmulatorCmd(ABC, X3270Commands):
         self, ypos: int, xpos: int, string: str, equal: bool, timeout: float
     ) -> bool: ...
 
+    @abstractmethod
+    def wait_until(
+        self, *conditions, timeout: float, match: str = 'all'
+    ) -> bool: ...
+
     @abstractmethod
     def string_found(self, ypos: int, xpos: int, string: str) -> bool: ...
 
@@ -120,3 +128,88 @@ class AbstractEmulator(AbstractEmulatorCmd):
 
     @abstractmethod
     def _exec_command(self, cmdstr: str) -> str: ...
+
+
+class AbstractAsyncEmulator(ABC):
+    """
+    Versão assíncrona de AbstractEmulator: mesma superfície, com métodos
+    implementados como corrotinas.
+    """
+
+    @abstractmethod
+    async def clear_screen(self) -> None: ...
+
+    @abstractmethod
+    async def wait_for_field(self, timeout: float) -> None: ...
+
+    @abstractmethod
+    async def wait_string_found(
+        self, ypos: int, xpos: int, string: str, equal: bool, timeout: float
+    ) -> bool: ...
+
+    @abstractmethod
+    async def wait_until(
+        self, *conditions, timeout: float, match: str = 'all'
+    ) -> bool: ...
+
+    @abstractmethod
+    async def string_found(
+        self, ypos: int, xpos: int, string: str
+    ) -> bool: ...
+
+    @abstractmethod
+    async def delete_field(self) -> None: ...
+
+    @abstractmethod
+    async def move_to(self, ypos: int, xpos: int) -> None: ...
+
+    @abstractmethod
+    async def send_pf(self, value: str) -> None: ...
+
+    @abstractmethod
+    async def send_string(self, tosend: str, ypos: int, xpos: int) -> None: ...
+
+    @abstractmethod
+    async def send_enter(self) -> None: ...
+
+    @abstractmethod
+    async def send_home(self) -> None: ...
+
+    @abstractmethod
+    async def get_string(self, ypos: int, xpos: int, length: int) -> str: ...
+
+    @abstractmethod
+    async def get_string_area(
+        self, yposi: int, xposi: int, ypose: int, xpose: int
+    ) -> str: ...
+
+    @abstractmethod
+    async def get_full_screen(self, header: bool) -> str: ...
+
+    @abstractmethod
+    async def save_screen(self, file_path: str, file_name: str) -> None: ...
+
+    @abstractmethod
+    async def search_string(
+        self, string: str, ignore_case: bool = False
+    ) -> bool: ...
+
+    @abstractmethod
+    async def get_string_positions(
+        self, string: str, ignore_case: bool = False
+    ) -> list[tuple[int, int]]: ...
+
+    @abstractmethod
+    async def terminate(self) -> None: ...
+
+    @abstractmethod
+    async def is_connected(self) -> bool: ...
+
+    @abstractmethod
+    async def connect_host(self, host: str, port: str, tls: bool) -> None: ...
+
+    @abstractmethod
+    async def reconnect_host(self) -> None: ...
+
+    @abstractmethod
+    async def _exec_command(self, cmdstr: str) -> str: ...
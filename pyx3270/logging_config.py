@@ -1,3 +1,12 @@
+import copy
+import logging
+import logging.config
+import threading
+
+# Nível abaixo de DEBUG para a E/S linha a linha dos comandos (amostrada).
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
 LOGGING_CONFIG = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -53,3 +62,48 @@ LOGGING_CONFIG = {
         },
     },
 }
+
+_configured = {'level': None}
+_configure_lock = threading.Lock()
+
+
+def configure_logging(
+    level: int | str = logging.DEBUG, trace_every: int | None = None
+) -> None:
+    """
+    Aplica LOGGING_CONFIG com ``level`` no logger do emulador. Chamadas
+    repetidas com o mesmo nível não recriam os handlers de arquivo.
+    ``trace_every`` define a amostragem da E/S de comandos em TRACE.
+    """
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    if trace_every is not None:
+        command_trace.every = trace_every
+    with _configure_lock:
+        if level == _configured['level']:
+            return
+        config = copy.deepcopy(LOGGING_CONFIG)
+        config['loggers']['pyx3270.emulator']['level'] = level
+        logging.config.dictConfig(config)
+        _configured['level'] = level
+
+
+class TraceSampler:
+    """
+    Decide, por comando, se a E/S linha a linha vai para o log em TRACE.
+    Somente 1 a cada ``every`` comandos é registrado.
+    """
+
+    def __init__(self, logger: logging.Logger, every: int = 1) -> None:
+        self.logger = logger
+        self.every = every
+        self._count = 0
+
+    def sample(self) -> bool:
+        if not self.logger.isEnabledFor(TRACE):
+            return False
+        self._count += 1
+        return self._count % self.every == 0
+
+
+command_trace = TraceSampler(logging.getLogger('pyx3270.emulator'))
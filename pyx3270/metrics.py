@@ -0,0 +1,129 @@
+import math
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+# Baldes em potências de 2 de microssegundos: o balde ``i`` guarda valores
+# em [2 ** (i - 1), 2 ** i) µs; o último acumula tudo acima de ~9 minutos.
+NUM_BUCKETS = 30
+COUNTERS = ('errors', 'keyboard_errors', 'retries', 'timeouts')
+
+
+class Histogram:
+    """Histograma de latências com baldes logarítmicos (base 2)."""
+
+    __slots__ = ('buckets', 'count', 'max', 'min', 'total')
+
+    def __init__(self) -> None:
+        self.buckets = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        micros = seconds * 1_000_000
+        index = math.frexp(micros)[1] if micros >= 1 else 0
+        self.buckets[min(index, NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    @staticmethod
+    def upper_bound(index: int) -> float:
+        return 2**index / 1_000_000
+
+    def percentile(self, pct: float) -> float:
+        """Limite superior do balde do percentil, limitado ao máximo."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * pct / 100)
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return dict(
+            count=self.count,
+            total=self.total,
+            mean=self.total / self.count if self.count else 0.0,
+            min=self.min if self.count else 0.0,
+            max=self.max,
+            p50=self.percentile(50),
+            p90=self.percentile(90),
+            p99=self.percentile(99),
+            buckets={
+                self.upper_bound(index): hits
+                for index, hits in enumerate(self.buckets)
+                if hits
+            },
+        )
+
+
+class ActionMetrics:
+    """
+    Latências de uma ação do s3270: tempo total (``wall``), tempo de host
+    (campo exec_time do status) e a diferença entre os dois (``overhead``:
+    processo s3270, pipe/socket e o próprio pyx3270).
+    """
+
+    __slots__ = ('counters', 'host', 'overhead', 'wall')
+
+    def __init__(self) -> None:
+        self.wall = Histogram()
+        self.host = Histogram()
+        self.overhead = Histogram()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def as_dict(self) -> dict:
+        return dict(
+            wall=self.wall.as_dict(),
+            host=self.host.as_dict(),
+            overhead=self.overhead.as_dict(),
+            **self.counters,
+        )
+
+
+class CommandMetrics:
+    """Métricas por nome de ação, coletadas por X3270._exec_command."""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.actions: dict[str, ActionMetrics] = {}
+
+    def _action(self, action: str) -> ActionMetrics:
+        metrics = self.actions.get(action)
+        if metrics is None:
+            metrics = self.actions[action] = ActionMetrics()
+        return metrics
+
+    def record(
+        self, action: str, wall: float | None, host: float | None = None
+    ) -> None:
+        if not self.enabled:
+            return
+        metrics = self._action(action)
+        if wall is not None:
+            metrics.wall.record(wall)
+        if host is not None:
+            metrics.host.record(host)
+            if wall is not None:
+                metrics.overhead.record(max(0.0, wall - host))
+
+    def count(self, action: str, counter: str) -> None:
+        if self.enabled:
+            self._action(action).counters[counter] += 1
+
+    def as_dict(self) -> dict[str, dict]:
+        return {
+            action: metrics.as_dict()
+            for action, metrics in sorted(self.actions.items())
+        }
+
+    def reset(self) -> None:
+        logger.debug('Métricas de comandos reiniciadas')
+        self.actions = {}
@@ -0,0 +1,1095 @@
+import asyncio
+import html
+import inspect
+import re
+import socket
+import ssl
+from collections import deque
+from dataclasses import dataclass
+from logging import getLogger
+from time import monotonic, sleep
+from typing import Callable, Generator
+
+from pyx3270 import tn3270
+from pyx3270.datastream import (
+    EBCDIC,
+    FA_MODIFY,
+    FA_NUMERIC,
+    FA_PROTECT,
+    DataStreamDecoder,
+    PresentationSpace,
+    encode_address,
+)
+from pyx3270.exceptions import CommandTimeoutError, NotConnectedException
+from pyx3270.iemulator import AbstractExecutableApp
+
+logger = getLogger(__name__)
+
+DEFAULT_PORT = 23
+CONNECT_TIMEOUT = 10.0
+RECV_SIZE = 65536
+
+OPT_BINARY = tn3270.options['BINARY'][0]
+OPT_EOR = tn3270.options['EOR'][0]
+OPT_TTYPE = tn3270.options['TTYPE'][0]
+# TN3270E não é negociado: a sessão fica no TN3270 básico, como o
+# ``N:`` do s3270.
+SUPPORTED_OPTIONS = {OPT_BINARY, OPT_EOR, OPT_TTYPE}
+
+DO = tn3270.DO[0]
+DONT = tn3270.DONT[0]
+WILL = tn3270.WILL[0]
+WONT = tn3270.WONT[0]
+
+AID_ENTER = tn3270.ENTER[0]
+AID_CLEAR = tn3270.CLEAR[0]
+AID_NONE = tn3270.NO_AID
+AID_PF = {n: getattr(tn3270, f'PF{n}')[0] for n in range(1, 25)}
+AID_PA = {1: tn3270.PA1[0], 2: tn3270.PA2[0], 3: tn3270.PA3[0]}
+SHORT_READ_AIDS = {AID_CLEAR, *AID_PA.values()}
+READ_BUFFER = {tn3270.RB[0], tn3270.SNA_RB[0]}
+READ_MODIFIED_ALL = {tn3270.RMA[0], tn3270.SNA_RMA[0]}
+
+# Campo protegido e numérico: o cursor pula para o próximo campo.
+FA_AUTOSKIP = FA_PROTECT | FA_NUMERIC
+
+ACTION_RE = re.compile(r'^\s*([A-Za-z][A-Za-z0-9]*)\s*(?:\((.*)\))?\s*$', re.S)
+STRING_ESCAPES = {
+    'n': 'Enter',
+    't': 'Tab',
+    'b': 'Left',
+    'r': 'Newline',
+    'f': 'Clear',
+}
+
+
+class ActionError(Exception):
+    """Falha de uma ação; vira ``data: <mensagem>`` seguido de ``error``."""
+
+
+@dataclass
+class WaitFor:
+    """Pedido ao condutor: aguardar ``predicate()`` por até ``timeout``."""
+
+    predicate: Callable[[], bool]
+    timeout: float | None
+
+
+@dataclass
+class OpenConnection:
+    host: str
+    port: int
+    tls: bool
+    verify: bool
+
+
+class CloseConnection:
+    """Pedido ao condutor: fechar a conexão com o host."""
+
+
+Request = WaitFor | OpenConnection | CloseConnection
+ActionResult = Generator[Request, object, list[str]]
+
+
+def split_args(text: str | None) -> list[str]:
+    """Separa os argumentos de uma ação, respeitando aspas."""
+    if text is None or not text.strip():
+        return []
+    args = []
+    current = []
+    quote = None
+    escaped = False
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == '\\' and quote:
+            current.append(char)
+            escaped = True
+        elif quote:
+            if char == quote:
+                quote = None
+            else:
+                current.append(char)
+        elif char in {'"', "'"}:
+            quote = char
+        elif char == ',':
+            args.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    args.append(''.join(current).strip())
+    return args
+
+
+def parse_host(spec: str) -> tuple[str, int, bool, bool]:
+    """
+    ``[L:][Y:][lu@]host[:porta]`` -> (host, porta, tls, verificar).
+    ``L:`` ativa TLS e ``Y:`` desliga a verificação do certificado.
+    """
+    tls = False
+    verify = True
+    while re.match(r'^[A-Za-z]:', spec) and not re.match(
+        r'^[A-Za-z]:\d+$', spec
+    ):
+        prefix, spec = spec[0].upper(), spec[2:]
+        if prefix == 'L':
+            tls = True
+        elif prefix == 'Y':
+            verify = False
+    spec = spec.rsplit('@', 1)[-1]
+    if spec.startswith('['):  # IPv6: [::1]:23
+        host, _, port = spec[1:].partition(']')
+        port = port.lstrip(':')
+    else:
+        host, _, port = spec.partition(':')
+    return host, int(port or DEFAULT_PORT), tls, verify
+
+
+def open_connection(request: OpenConnection) -> ActionResult:
+    if not (yield request):
+        raise ActionError(f'Connection failed: {request.host}:{request.port}')
+
+
+class _SessionDecoder(DataStreamDecoder):
+    """Decodificador que repassa negociação e leituras à sessão."""
+
+    def __init__(self, session: 'Tn3270Session') -> None:
+        super().__init__(session.ps)
+        self.session = session
+
+    def on_negotiation(self, command: int, option: int) -> None:
+        self.session.negotiate(command, option)
+
+    def on_subnegotiation(self, payload: bytes) -> None:
+        self.session.subnegotiate(payload)
+
+    def on_read(self, command: int) -> None:
+        self.session.read_command(command)
+
+    def apply(self, record: bytes) -> None:
+        super().apply(record)
+        self.session.record_applied()
+
+
+class Tn3270Session:
+    """
+    Sessão TN3270 sem E/S: negociação telnet, tela em memória, teclado e
+    as ações de script do s3270.
+
+    Os bytes para o host acumulam em ``outbox`` e os recebidos entram por
+    ``receive``. Cada ação é um gerador que pede ao condutor (NativeApp ou
+    AsyncNativeApp) para esperar, conectar ou desconectar.
+    """
+
+    def __init__(self, model: str = '2', rows: int = 24, cols: int = 80):
+        self.model = model
+        self.terminal_type = f'IBM-3279-{model}-E'.encode('ascii')
+        self.ps = PresentationSpace(
+            tn3270.ROWS, tn3270.COLS, alt_rows=rows, alt_cols=cols
+        )
+        self.decoder = _SessionDecoder(self)
+        self.outbox = bytearray()
+        self.connected = False
+        self.host: str | None = None
+        self.port: int | None = None
+        self.tls = False
+        self.verify = True
+        self.locked = False  # aguardando o host (X SYSTEM)
+        self.error = False  # erro de operador: exige Reset
+        self.output_count = 0
+        # output_count no fim do último comando: base do Wait(Output).
+        self.output_mark = 0
+        self.last_aid = AID_NONE
+        self._will: set[int] = set()
+        self._do: set[int] = set()
+
+    # Telnet / fluxo de dados
+
+    @property
+    def mode_3270(self) -> bool:
+        return self.connected and (
+            self.output_count > 0 or {OPT_BINARY, OPT_EOR} <= self._will
+        )
+
+    def connection_made(self, host: str, port: int, tls: bool) -> None:
+        self.connected = True
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.locked = True  # até o primeiro Write com keyboard restore
+        self.error = False
+        self.output_count = self.output_mark = 0
+        self.last_aid = AID_NONE
+        self._will.clear()
+        self._do.clear()
+        self.decoder = _SessionDecoder(self)
+        self.ps.erase()
+
+    def connection_lost(self) -> None:
+        if self.connected:
+            logger.info(f'Conexão com {self.host}:{self.port} encerrada')
+        self.connected = False
+        self.locked = False
+        self.outbox.clear()
+
+    def receive(self, data: bytes) -> None:
+        self.decoder.feed(data)
+
+    def negotiate(self, command: int, option: int) -> None:
+        reply = None
+        if command == DO:
+            if option not in SUPPORTED_OPTIONS:
+                reply = WONT
+            elif option not in self._will:
+                self._will.add(option)
+                reply = WILL
+        elif command == WILL:
+            if option not in SUPPORTED_OPTIONS - {OPT_TTYPE}:
+                reply = DONT
+            elif option not in self._do:
+                self._do.add(option)
+                reply = DO
+        elif command == DONT and option in self._will:
+            self._will.discard(option)
+            reply = WONT
+        elif command == WONT and option in self._do:
+            self._do.discard(option)
+            reply = DONT
+        if reply is not None:
+            self.outbox += bytes((tn3270.IAC[0], reply, option))
+
+    def subnegotiate(self, payload: bytes) -> None:
+        if payload[:2] == tn3270.options['TTYPE'] + tn3270.SEND:
+            self.outbox += (
+                tn3270.IAC
+                + tn3270.SB
+                + tn3270.options['TTYPE']
+                + tn3270.IS
+                + self.terminal_type
+                + tn3270.IAC
+                + tn3270.SE
+            )
+
+    def record_applied(self) -> None:
+        self.output_count += 1
+        if self.ps.keyboard_restored:
+            self.ps.keyboard_restored = False
+            self.locked = False
+
+    def read_command(self, command: int) -> None:
+        if command in READ_BUFFER:
+            self.send_record(self.read_buffer(self.last_aid))
+        else:
+            self.send_record(
+                self.read_modified(
+                    self.last_aid, all_fields=command in READ_MODIFIED_ALL
+                )
+            )
+
+    def send_record(self, record: bytes) -> None:
+        self.outbox += record.replace(tn3270.IAC, tn3270.IAC * 2)
+        self.outbox += tn3270.IAC + tn3270.TN_EOR
+
+    def read_modified(self, aid: int, all_fields: bool = False) -> bytes:
+        ps = self.ps
+        record = bytearray((aid,))
+        if aid in SHORT_READ_AIDS and not all_fields:
+            return bytes(record)
+        record += encode_address(ps.cursor)
+        if not ps.attributes:
+            return bytes(record + ps.buffer.replace(b'\x00', b''))
+        for field in ps.fields():
+            if field.modified:
+                record += tn3270.SBA + encode_address(field.start % ps.size)
+                record += ps.data_range(field.start, field.end).replace(
+                    b'\x00', b''
+                )
+        return bytes(record)
+
+    def read_buffer(self, aid: int) -> bytes:
+        ps = self.ps
+        record = bytearray((aid,)) + encode_address(ps.cursor)
+        for position in range(ps.size):
+            attribute = ps.attributes.get(position)
+            if attribute is None:
+                record.append(ps.buffer[position])
+            else:
+                record += tn3270.SF + bytes((attribute,))
+        return bytes(record)
+
+    # Status e execução
+
+    def status_line(self, exec_time: float) -> bytes:
+        ps = self.ps
+        keyboard = 'E' if self.error else 'L' if self.locked else 'U'
+        formatted = 'F' if ps.attributes else 'U'
+        protected = (
+            'P' if ps.attributes and ps.is_protected(ps.cursor) else 'U'
+        )
+        if self.connected:
+            connection = f'C({self.host})'
+            mode = 'I' if self.mode_3270 else 'P'
+        else:
+            connection = mode = 'N'
+        row, col = ps.cursor_position
+        return (
+            f'{keyboard} {formatted} {protected} {connection} {mode} '
+            f'{self.model} {ps.rows} {ps.cols} {row} {col} 0x0 '
+            f'{exec_time:.3f}'
+        ).encode('utf-8')
+
+    def execute(self, line: str) -> Generator[Request, object, list[bytes]]:
+        """
+        Executa uma linha de script e retorna a resposta no formato do
+        s3270: linhas ``data:``, status e ``ok``/``error``.
+        """
+        start = monotonic()
+        try:
+            result = yield from self._dispatch(line)
+            data, status = result or [], b'ok'
+        except ActionError as e:
+            data, status = [str(e)], b'error'
+        except (TypeError, ValueError) as e:
+            data, status = [f'{line.strip()}: {e}'], b'error'
+        self.output_mark = self.output_count
+        response = [f'data: {item}'.encode('utf-8') for item in data]
+        response.append(self.status_line(monotonic() - start))
+        response.append(status)
+        return [item + b'\n' for item in response]
+
+    def _dispatch(self, line: str) -> ActionResult:
+        """Chama o método ``action_*`` correspondente à linha."""
+        match = ACTION_RE.match(line)
+        if not match:
+            raise ActionError(f'Sintaxe inválida: {line}')
+        name, args = match.group(1).lower(), split_args(match.group(2))
+        action = getattr(self, f'action_{name}', None)
+        if action is None:
+            raise ActionError(f'Unknown action: {match.group(1)}')
+        result = action(*args)
+        if inspect.isgenerator(result):
+            result = yield from result
+        return result
+
+    def _require_connection(self) -> None:
+        if not self.connected:
+            raise ActionError('Not connected')
+
+    def _keyboard_ready(self) -> ActionResult:
+        """Espera o host liberar o teclado, como o s3270 faz."""
+        self._require_connection()
+        if self.locked:
+            yield WaitFor(lambda: not self.locked or not self.connected, None)
+            self._require_connection()
+        if self.error:
+            raise ActionError('Keyboard locked')
+
+    def _aid(self, aid: int) -> ActionResult:
+        yield from self._keyboard_ready()
+        self.last_aid = aid
+        record = self.read_modified(aid)
+        if aid == AID_CLEAR:
+            self.ps.erase()
+        self.locked = True
+        self.send_record(record)
+        return []
+
+    # Ações de conexão
+
+    def action_connect(self, *args: str) -> ActionResult:
+        if not args:
+            raise ActionError('Connect: host obrigatório')
+        host, port, tls, verify = parse_host(args[0])
+        if len(args) > 1:
+            port = int(args[1])
+        if self.connected:
+            raise ActionError('Already connected')
+        self.verify = verify
+        yield from open_connection(OpenConnection(host, port, tls, verify))
+        return []
+
+    action_open = action_connect
+
+    def action_disconnect(self) -> ActionResult:
+        if self.connected:
+            yield CloseConnection()
+        return []
+
+    action_close = action_disconnect
+
+    def action_reconnect(self) -> ActionResult:
+        if self.host is None:
+            raise ActionError('Reconnect: nenhum host anterior')
+        if self.connected:
+            yield CloseConnection()
+        yield from open_connection(
+            OpenConnection(self.host, self.port, self.tls, self.verify)
+        )
+        return []
+
+    def action_quit(self) -> ActionResult:
+        return (yield from self.action_disconnect())
+
+    action_exit = action_quit
+
+    def action_wait(self, *args: str) -> ActionResult:
+        timeout = None
+        if args and re.fullmatch(r'\d+(\.\d+)?', args[0]):
+            timeout, args = float(args[0]), args[1:]
+        condition = (args[0] if args else 'inputfield').lower()
+        if condition == 'seconds':
+            yield WaitFor(lambda: False, timeout or 0)
+            return []
+        if condition == 'disconnect':
+            predicate = lambda: not self.connected  # noqa: E731
+        else:
+            self._require_connection()
+            predicate = self._wait_condition(condition)
+        if not (yield WaitFor(predicate, timeout)):
+            raise ActionError('Wait: Timed out')
+        if condition != 'disconnect':
+            self._require_connection()
+        return []
+
+    def _wait_condition(self, condition: str) -> Callable[[], bool]:
+        if condition == 'output':
+            # Como no s3270, conta a saída recebida desde o comando
+            # anterior, inclusive a já aplicada por _poll antes deste.
+            baseline = self.output_mark
+            return lambda: self.output_count != baseline or not self.connected
+        if condition == '3270mode':
+            return lambda: self.mode_3270 or not self.connected
+        if condition in {'unlock', 'inputfield'}:
+            return lambda: (
+                (self.mode_3270 and not self.locked) or not self.connected
+            )
+        raise ActionError(f'Wait: condição desconhecida: {condition}')
+
+    @staticmethod
+    def action_pause() -> ActionResult:
+        yield WaitFor(lambda: False, 0.35)
+        return []
+
+    @staticmethod
+    def action_ignore(*args: str) -> list[str]:
+        return []
+
+    def action_query(self, keyword: str | None = None) -> list[str]:
+        ps = self.ps
+        row, col = ps.cursor_position
+        values = {
+            'connectionstate': (
+                ('tn3270 3270' if self.mode_3270 else 'connected')
+                if self.connected
+                else 'not-connected'
+            ),
+            'cursor': f'{row} {col}',
+            'cursor1': f'{row + 1} {col + 1}',
+            'host': (
+                f'host {self.host} {self.port}' if self.connected else ''
+            ),
+            'model': self.terminal_type.decode('ascii')[4:],
+            'screencursize': f'{ps.rows} {ps.cols}',
+            'screenmaxsize': '{} {}'.format(*ps.alternate_size),
+            'terminalname': self.terminal_type.decode('ascii'),
+            'tls': 'secure' if self.connected and self.tls else 'not-secure',
+        }
+        if keyword is None:
+            return [f'{key}: {value}' for key, value in values.items()]
+        if keyword.lower() not in values:
+            raise ActionError(f'Query: palavra-chave desconhecida: {keyword}')
+        return [values[keyword.lower()]]
+
+    # Ações de leitura
+
+    def _ascii(self, origin: int, *args: str) -> list[str]:
+        ps = self.ps
+        numbers = [int(arg) for arg in args]
+        if not numbers:
+            return ps.lines()
+        if len(numbers) == 1:
+            start, length = ps.cursor, numbers[0]
+        elif len(numbers) in {3, 4}:
+            row, col = numbers[0] - origin, numbers[1] - origin
+            if not (0 <= row < ps.rows and 0 <= col < ps.cols):
+                raise ActionError('Ascii: posição inválida')
+            if len(numbers) == 4:  # noqa: PLR2004
+                rows, cols = numbers[2], numbers[3]
+                return [
+                    ps.get_string(line, col, cols)
+                    for line in range(row, min(row + rows, ps.rows))
+                ]
+            start, length = row * ps.cols + col, numbers[2]
+        else:
+            raise ActionError('Ascii: número de argumentos inválido')
+        length = min(length, ps.size - start)
+        lines = []
+        while length > 0:
+            chunk = min(length, ps.cols - start % ps.cols)
+            lines.append(ps.text_range(start, start + chunk))
+            start += chunk
+            length -= chunk
+        return lines
+
+    def action_ascii(self, *args: str) -> list[str]:
+        return self._ascii(0, *args)
+
+    def action_ascii1(self, *args: str) -> list[str]:
+        return self._ascii(1, *args)
+
+    def action_asciifield(self) -> list[str]:
+        ps = self.ps
+        field = self._current_field()
+        if field is None:
+            return ps.lines()
+        return [ps.field_text(field)]
+
+    def action_printtext(self, *args: str) -> list[str]:
+        ps = self.ps
+        options = [arg.lower() for arg in args]
+        if 'string' in options:
+            return ps.lines()
+        if 'file' not in options or options.index('file') + 1 >= len(args):
+            raise ActionError('PrintText: somente file e string suportados')
+        path = args[options.index('file') + 1]
+        if 'html' in options:
+            body = html.escape('\n'.join(ps.lines()))
+            content = (
+                '<html><head><meta charset="utf-8"></head>'
+                f'<body><pre>{body}</pre></body></html>\n'
+            )
+        else:
+            content = '\n'.join(ps.lines()) + '\n'
+        with open(path, 'w', encoding='utf-8') as fd:
+            fd.write(content)
+        return []
+
+    # Ações de teclado
+
+    def _current_field(self):
+        ps = self.ps
+        address = ps.field_at(ps.cursor)
+        if address is None:
+            return None
+        for field in ps.fields():
+            if field.address == address:
+                return field
+        return None
+
+    def _input_field(self):
+        field = self._current_field()
+        if field is None or field.protected or self.ps.cursor == field.address:
+            self.error = True
+            raise ActionError('Keyboard locked')
+        return field
+
+    def _type(self, text: str) -> None:
+        ps = self.ps
+        for value in text.encode(EBCDIC, errors='replace'):
+            if ps.is_protected(ps.cursor):
+                self.error = True
+                raise ActionError('Keyboard locked')
+            ps.buffer[ps.cursor] = value
+            address = ps.field_at(ps.cursor)
+            if address is not None:
+                ps.attributes[address] |= FA_MODIFY
+            ps.cursor = (ps.cursor + 1) % ps.size
+            attribute = ps.attributes.get(ps.cursor)
+            if attribute is not None and attribute & FA_AUTOSKIP == (
+                FA_AUTOSKIP
+            ):
+                ps.cursor = ps.next_unprotected(ps.cursor)
+
+    def action_string(self, *args: str) -> ActionResult:
+        for text in args:
+            pos = 0
+            for match in re.finditer(r'\\(.)', text):
+                chunk = text[pos : match.start()]
+                pos = match.end()
+                yield from self._keyboard_ready()
+                self._type(chunk)
+                key = STRING_ESCAPES.get(match.group(1))
+                if key is None:
+                    yield from self._keyboard_ready()
+                    self._type(match.group(1))
+                else:
+                    result = getattr(self, f'action_{key.lower()}')()
+                    if inspect.isgenerator(result):
+                        yield from result
+            yield from self._keyboard_ready()
+            self._type(text[pos:])
+        return []
+
+    def action_enter(self) -> ActionResult:
+        return (yield from self._aid(AID_ENTER))
+
+    def action_clear(self) -> ActionResult:
+        return (yield from self._aid(AID_CLEAR))
+
+    def action_pf(self, number: str) -> ActionResult:
+        if int(number) not in AID_PF:
+            raise ActionError(f'PF: tecla inválida: {number}')
+        return (yield from self._aid(AID_PF[int(number)]))
+
+    def action_pa(self, number: str) -> ActionResult:
+        if int(number) not in AID_PA:
+            raise ActionError(f'PA: tecla inválida: {number}')
+        return (yield from self._aid(AID_PA[int(number)]))
+
+    def action_reset(self) -> list[str]:
+        self.error = False
+        self.locked = False
+        return []
+
+    def action_tab(self) -> list[str]:
+        ps = self.ps
+        ps.cursor = ps.next_unprotected(ps.cursor)
+        return []
+
+    def action_backtab(self) -> list[str]:
+        ps = self.ps
+        starts = [
+            field.start % ps.size
+            for field in ps.fields()
+            if not field.protected and len(field)
+        ]
+        if not starts:
+            ps.cursor = 0
+            return []
+        before = [start for start in starts if start < ps.cursor]
+        ps.cursor = max(before) if before else max(starts)
+        return []
+
+    def action_home(self) -> list[str]:
+        ps = self.ps
+        ps.cursor = ps.next_unprotected(ps.size - 1) if ps.attributes else 0
+        return []
+
+    def action_newline(self) -> list[str]:
+        ps = self.ps
+        row = (ps.cursor // ps.cols + 1) % ps.rows
+        ps.cursor = ps.next_unprotected((row * ps.cols - 1) % ps.size)
+        return []
+
+    def action_movecursor(self, row: str, col: str) -> list[str]:
+        ps = self.ps
+        ps.cursor = (int(row) % ps.rows) * ps.cols + int(col) % ps.cols
+        return []
+
+    def action_movecursor1(self, row: str, col: str) -> list[str]:
+        return self.action_movecursor(str(int(row) - 1), str(int(col) - 1))
+
+    def action_movecursoroffset(self, offset: str) -> list[str]:
+        self.ps.cursor = int(offset) % self.ps.size
+        return []
+
+    def _move(self, offset: int) -> list[str]:
+        self.ps.cursor = (self.ps.cursor + offset) % self.ps.size
+        return []
+
+    def action_left(self) -> list[str]:
+        return self._move(-1)
+
+    def action_right(self) -> list[str]:
+        return self._move(1)
+
+    def action_left2(self) -> list[str]:
+        return self._move(-2)
+
+    def action_right2(self) -> list[str]:
+        return self._move(2)
+
+    def action_up(self) -> list[str]:
+        return self._move(-self.ps.cols)
+
+    def action_down(self) -> list[str]:
+        return self._move(self.ps.cols)
+
+    action_backspace = action_left
+
+    def _clear_range(self, start: int, end: int, field) -> None:
+        ps = self.ps
+        for position in range(start, end):
+            ps.buffer[position % ps.size] = 0
+        ps.attributes[field.address] |= FA_MODIFY
+
+    def action_deletefield(self) -> list[str]:
+        field = self._input_field()
+        self._clear_range(field.start, field.end, field)
+        self.ps.cursor = field.start % self.ps.size
+        return []
+
+    def action_eraseeof(self) -> list[str]:
+        ps = self.ps
+        field = self._input_field()
+        start = ps.cursor if ps.cursor >= field.start else ps.cursor + ps.size
+        self._clear_range(start, field.end, field)
+        return []
+
+    def action_eraseinput(self) -> list[str]:
+        ps = self.ps
+        for field in ps.fields():
+            if not field.protected:
+                self._clear_range(field.start, field.end, field)
+                ps.attributes[field.address] &= ~FA_MODIFY
+        if not ps.attributes:
+            ps.buffer[:] = bytes(ps.size)
+        ps.cursor = ps.next_unprotected(0)
+        return []
+
+    def action_delete(self) -> list[str]:
+        ps = self.ps
+        field = self._input_field()
+        start = ps.cursor if ps.cursor >= field.start else ps.cursor + ps.size
+        data = ps.data_range(start, field.end)
+        for offset, value in enumerate(data[1:] + b'\x00'):
+            ps.buffer[(start + offset) % ps.size] = value
+        ps.attributes[field.address] |= FA_MODIFY
+        return []
+
+    def action_erase(self) -> list[str]:
+        ps = self.ps
+        field = self._input_field()
+        if ps.cursor == field.start % ps.size:
+            return []
+        self._move(-1)
+        return self.action_delete()
+
+    def action_fieldend(self) -> list[str]:
+        ps = self.ps
+        field = self._current_field()
+        if field is None or field.protected:
+            return []
+        data = ps.data_range(field.start, field.end).rstrip(b'\x00 ')
+        ps.cursor = (field.start + len(data)) % ps.size
+        return []
+
+
+class NativeApp(AbstractExecutableApp):
+    """
+    Backend sem s3270: interpreta as ações de script em processo e fala
+    TN3270 diretamente com o host pela biblioteca padrão (socket e ssl).
+
+    Responde no mesmo formato do s3270 (linhas ``data:``, status e
+    ``ok``/``error``), então Command, Status e todo o X3270Cmd funcionam
+    sem alterações. As ações só rodam em ``readline``, que recebe o tempo
+    limite do comando.
+    """
+
+    fractional_wait = True
+
+    def __init__(
+        self,
+        model: str = '2',
+        rows: int = 24,
+        cols: int = 80,
+        connect_timeout: float = CONNECT_TIMEOUT,
+    ) -> None:
+        logger.info(f'Inicializando NativeApp ({model=})')
+        self.model = model
+        self.connect_timeout = connect_timeout
+        self.session = Tn3270Session(model, rows, cols)
+        self.sock: socket.socket | None = None
+        self._commands: deque[str] = deque()
+        self._lines: deque[bytes] = deque()
+
+    def _spawn_app(self) -> None:
+        """Não há processo a iniciar."""
+
+    @staticmethod
+    def _get_executable_app_args(model: str) -> list:
+        return []
+
+    @staticmethod
+    def connect(*args) -> bool:
+        # Falso: o X3270 envia a ação Connect, interpretada em readline.
+        return False
+
+    def write(self, data: bytes) -> None:
+        for line in data.decode('utf-8', errors='replace').splitlines():
+            if line.strip():
+                self._commands.append(line)
+
+    def readline(self, timeout: float | None = None) -> bytes:
+        deadline = None if timeout is None else monotonic() + timeout
+        while not self._lines:
+            if not self._commands:
+                return b''
+            self._lines.extend(self._run(self._commands.popleft(), deadline))
+        return self._lines.popleft()
+
+    def _run(self, line: str, deadline: float | None) -> list[bytes]:
+        self._poll()
+        action = self.session.execute(line)
+        reply = None
+        try:
+            while True:
+                request = action.send(reply)
+                reply = self._fulfil(request, deadline)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            action.close()
+            self._flush()
+
+    def _fulfil(self, request: Request, deadline: float | None) -> object:
+        if isinstance(request, OpenConnection):
+            return self._open(request)
+        if isinstance(request, CloseConnection):
+            return self._close_socket()
+        return self._wait(request, deadline)
+
+    def _open(self, request: OpenConnection) -> bool:
+        logger.info(f'Conectando a {request.host}:{request.port}')
+        try:
+            sock = socket.create_connection(
+                (request.host, request.port), timeout=self.connect_timeout
+            )
+            if request.tls:
+                sock = tls_context(request.verify).wrap_socket(
+                    sock, server_hostname=request.host
+                )
+        except OSError as e:
+            logger.error(f'Falha ao conectar em {request.host}: {e}')
+            return False
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.session.connection_made(request.host, request.port, request.tls)
+        return True
+
+    def _close_socket(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                logger.warning('Erro ao fechar socket do host')
+            self.sock = None
+        self.session.connection_lost()
+
+    def _receive(self, timeout: float | None) -> bool:
+        """Lê do host uma vez; falso se nada chegou dentro do prazo."""
+        if self.sock is None:
+            return False
+        self.sock.settimeout(timeout)
+        try:
+            data = self.sock.recv(RECV_SIZE)
+        except (TimeoutError, BlockingIOError, ssl.SSLWantReadError):
+            return False
+        except OSError as e:
+            logger.error(f'Erro de leitura do host: {e}')
+            data = b''
+        if not data:
+            self._close_socket()
+            return True
+        self.session.receive(data)
+        self._flush()
+        return True
+
+    def _poll(self) -> None:
+        """Processa o que já chegou do host, sem bloquear."""
+        while self.sock is not None and self._receive(0):
+            pass
+
+    def _flush(self) -> None:
+        session = self.session
+        if not session.outbox or self.sock is None:
+            return
+        data = bytes(session.outbox)
+        session.outbox.clear()
+        try:
+            self.sock.settimeout(self.connect_timeout)
+            self.sock.sendall(data)
+        except OSError as e:
+            logger.error(f'Erro ao enviar ao host: {e}')
+            self._close_socket()
+
+    def _wait(self, request: WaitFor, deadline: float | None) -> bool:
+        limit = deadline
+        if request.timeout is not None:
+            limit = monotonic() + request.timeout
+            if deadline is not None:
+                limit = min(limit, deadline)
+        while not request.predicate():
+            remaining = None if limit is None else limit - monotonic()
+            if remaining is not None and remaining <= 0:
+                if deadline is not None and limit >= deadline:
+                    raise CommandTimeoutError(
+                        'Tempo limite excedido aguardando o host'
+                    )
+                return False
+            if self.sock is None:
+                if remaining is None:
+                    return False
+                # Sem conexão nada muda: apenas consome o tempo pedido.
+                sleep(remaining)
+                continue
+            self._receive(remaining)
+        return True
+
+    def close(self) -> int:
+        logger.info('Fechando NativeApp')
+        self._close_socket()
+        self._commands.clear()
+        self._lines.clear()
+        return 0
+
+    def kill(self) -> None:
+        self.close()
+
+
+class AsyncNativeApp:
+    """
+    Versão asyncio do NativeApp, compatível com AsyncX3270: milhares de
+    sessões podem compartilhar um único event loop, sem subprocessos.
+    """
+
+    fractional_wait = True
+
+    def __init__(
+        self,
+        model: str = '2',
+        rows: int = 24,
+        cols: int = 80,
+        connect_timeout: float = CONNECT_TIMEOUT,
+    ) -> None:
+        self.model = model
+        self.connect_timeout = connect_timeout
+        self.session = Tn3270Session(model, rows, cols)
+        # AsyncX3270 usa ``process`` para saber se o app foi iniciado.
+        self.process: Tn3270Session | None = None
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+        self._commands: deque[str] = deque()
+        self._lines: deque[bytes] = deque()
+
+    async def start(self) -> None:
+        self.process = self.session
+
+    async def write(self, data: bytes) -> None:
+        if self.process is None:
+            raise NotConnectedException
+        for line in data.decode('utf-8', errors='replace').splitlines():
+            if line.strip():
+                self._commands.append(line)
+
+    async def readline(self) -> bytes:
+        if self.process is None:
+            raise NotConnectedException
+        while not self._lines:
+            if not self._commands:
+                return b''
+            self._lines.extend(await self._run(self._commands.popleft()))
+        return self._lines.popleft()
+
+    async def _run(self, line: str) -> list[bytes]:
+        action = self.session.execute(line)
+        reply = None
+        try:
+            while True:
+                request = action.send(reply)
+                reply = await self._fulfil(request)
+                await self._flush()
+        except StopIteration as stop:
+            await self._flush()
+            return stop.value
+        finally:
+            action.close()
+
+    async def _fulfil(self, request: Request) -> object:
+        if isinstance(request, OpenConnection):
+            return await self._open(request)
+        if isinstance(request, CloseConnection):
+            return await self._close_connection()
+        return await self._wait(request)
+
+    async def _open(self, request: OpenConnection) -> bool:
+        ssl_context = tls_context(request.verify) if request.tls else None
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    request.host,
+                    request.port,
+                    ssl=ssl_context,
+                    server_hostname=request.host if ssl_context else None,
+                ),
+                self.connect_timeout,
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.error(f'Falha ao conectar em {request.host}: {e}')
+            return False
+        self.session.connection_made(request.host, request.port, request.tls)
+        self._task = asyncio.ensure_future(self._read_loop(self._reader))
+        return True
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while data := await reader.read(RECV_SIZE):
+                self.session.receive(data)
+                await self._flush()
+                self._changed.set()
+        except (OSError, asyncio.IncompleteReadError) as e:
+            logger.error(f'Erro de leitura do host: {e}')
+        if reader is self._reader:
+            self.session.connection_lost()
+            self._changed.set()
+
+    async def _flush(self) -> None:
+        session = self.session
+        if not session.outbox or self._writer is None:
+            return
+        data = bytes(session.outbox)
+        session.outbox.clear()
+        try:
+            self._writer.write(data)
+            await self._writer.drain()
+        except OSError as e:
+            logger.error(f'Erro ao enviar ao host: {e}')
+            await self._close_connection()
+
+    async def _wait(self, request: WaitFor) -> bool:
+        limit = None
+        if request.timeout is not None:
+            limit = asyncio.get_running_loop().time() + request.timeout
+        while not request.predicate():
+            self._changed.clear()
+            remaining = None
+            if limit is not None:
+                remaining = limit - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    return False
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return request.predicate()
+        return True
+
+    async def _close_connection(self) -> None:
+        writer, self._writer, self._reader = self._writer, None, None
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                logger.warning('Erro ao fechar conexão com o host')
+        self.session.connection_lost()
+
+    async def close(self) -> int:
+        logger.info('Fechando AsyncNativeApp')
+        await self._close_connection()
+        self._commands.clear()
+        self._lines.clear()
+        return 0
+
+
+def tls_context(verify: bool) -> ssl.SSLContext:
+    context = ssl.create_default_context()
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
@@ -1,15 +1,56 @@
+import os
+import shutil
+import socket
 import subprocess
 import sys
+import tempfile
 from logging import getLogger
-from time import sleep
+from time import monotonic, sleep
 
+from pyx3270.conditions import ChangedCondition
+from pyx3270.control import CONTROL_HOST, CONTROL_TIMEOUT, ControlClient
+from pyx3270.exceptions import ControlError
 from pyx3270.iemulator import AbstractEmulator
+from pyx3270.server import EmbeddedReplay, open_screens
 
 logger = getLogger(__name__)
 
+CONNECT_RETRY = 0.02
+
 
 class PyX3270Manager:
-    def __init__(self, emu: AbstractEmulator, directory='./screens'):
+    """
+    Controla um replay de telas gravadas para testes offline.
+
+    Por padrão o replay roda em um subprocesso (``pyx3270 replay``); com
+    ``embedded=True`` ele roda em uma thread deste processo, com a mesma
+    API. Por padrão o replay escuta na porta 3270, como ``pyx3270
+    replay``; com ``port`` 0 cada instância usa uma porta livre, informada
+    em ``manager.port``, e várias podem rodar lado a lado.
+    """
+
+    def __init__(
+        self,
+        emu: AbstractEmulator,
+        directory='./screens',
+        timeout: float = CONTROL_TIMEOUT,
+        embedded: bool = False,
+        port: int = 3270,
+    ):
+        self.emu = emu
+        self.timeout = timeout
+        self.client: ControlClient | None = None
+        self.state: dict | None = None
+        self.replay: EmbeddedReplay | None = None
+        self.process: subprocess.Popen | None = None
+        self._control_dir = None
+        self._port = port
+        if embedded:
+            self.replay = EmbeddedReplay(open_screens(directory), directory)
+            self._port = self.replay.start(port)
+            return
+
+        self.control = self._control_address()
         self.command = [
             sys.executable,
             '-m',
@@ -19,8 +60,11 @@ class PyX3270Manager:
             directory,
             '--no-tls',
             '--no-emulator',
+            '--port',
+            str(port),
+            '--control',
+            self.control,
         ]
-        self.emu = emu
         # Usa subprocess.Popen para iniciar o servidor
         self.process = subprocess.Popen(
             self.command,
@@ -28,33 +72,124 @@ class PyX3270Manager:
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             text=True,
-            bufsize=0
+            bufsize=0,
         )
 
-    def _exec(self, command: str) -> None:
-        if self.process.poll() is not None:
+    @property
+    def port(self) -> int:
+        """Porta do replay; com porta livre, espera o subprocesso subir."""
+        if not self._port:
+            self._port = self._send('status')['port']
+        return self._port
+
+    def _control_address(self) -> str:
+        """Socket Unix em diretório temporário; fora do POSIX, porta TCP."""
+        if os.name == 'posix':
+            self._control_dir = tempfile.mkdtemp(prefix='pyx3270-')
+            return f'unix:{os.path.join(self._control_dir, "control.sock")}'
+        with socket.socket() as sock:
+            sock.bind((CONTROL_HOST, 0))
+            return f'{CONTROL_HOST}:{sock.getsockname()[1]}'
+
+    def _alive(self) -> bool:
+        if self.replay:
+            return self.replay.running
+        return self.process.poll() is None
+
+    def _send(self, command: str) -> dict:
+        if not self.replay:
+            return self._connect().send(command)
+        response = self.replay.execute(command)
+        if not response['ok']:
+            raise ControlError(response['error'])
+        return response
+
+    def _connect(self) -> ControlClient:
+        """Conecta ao canal de controle, esperando o replay subir."""
+        if self.client:
+            return self.client
+        deadline = monotonic() + self.timeout
+        while True:
+            try:
+                self.client = ControlClient(self.control, self.timeout)
+                break
+            except OSError as e:
+                if self.process.poll() is not None or monotonic() > deadline:
+                    raise ControlError(
+                        f'Canal de controle indisponível: {e}'
+                    ) from e
+                sleep(CONNECT_RETRY)
+        return self.client
+
+    @staticmethod
+    def _session(response: dict) -> dict | None:
+        sessions = response.get('sessions')
+        return sessions[0] if sessions else None
+
+    def _repaint_expected(self, command: str) -> bool:
+        """Se ``command`` pode trocar a tela exibida, pelo último estado."""
+        session = self._session(self.state)
+        if session is None:
+            return False
+        if command.startswith('change '):
+            return True
+        if session['clear']:
+            return False
+        if command == 'next':
+            return session['screen'] < self.state['screens'] - 1
+        if command == 'prev':
+            return session['screen'] > 0
+        return command == 'clear' or command.startswith('set ')
+
+    def _snapshot(self, command: str) -> str | None:
+        """Tela do emulador antes de ``command``, se ele pode trocá-la."""
+        if self.state is None:
+            self.state = self._send('status')
+        if not self._repaint_expected(command):
+            return None
+        return self.emu.get_full_screen(header=True)
+
+    def _exec(self, command: str) -> dict | None:
+        """
+        Envia ``command`` e espera a confirmação do replay (tela já
+        enviada). Só quando a confirmação indica outra tela no terminal
+        (``version`` da sessão) espera o emulador exibi-la.
+        """
+        if not self._alive():
             logger.info(
                 '[!] O processo inativo, não é possível enviar comandos.'
             )
-            return
+            return None
 
         logger.info(f'[+] Enviando comando offline: {command}')
         try:
-            self.process.stdin.write(f"{command}\n")
-            self.process.stdin.flush()
-            sleep(0.05)
-        except Exception as e:
-            logger.error(f"Erro ao enviar comando: {e}")
-            return
-        self.emu.pf(1)
-        sleep(0.1)
+            before = self._snapshot(command)
+            response = self._send(command)
+        except ControlError as e:
+            logger.error(f'Erro ao enviar comando: {e}')
+            return None
+
+        previous = self._session(self.state)
+        current = self._session(response)
+        self.state = response
+        repainted = (
+            previous is not None
+            and current is not None
+            and current['version'] != previous['version']
+        )
+        if repainted and before is not None:
+            if not self.emu.wait_until(
+                ChangedCondition(before), timeout=self.timeout
+            ):
+                logger.warning(f'[!] Tela não atualizada após: {command}')
+        return response
 
     def next(self):
-        """Define a tela específica e aguarda processamento corretamente."""
+        """Avança para a próxima tela e aguarda o emulador exibi-la."""
         self._exec('next')
 
     def prev(self):
-        """Define a tela específica e aguarda processamento corretamente."""
+        """Volta para a tela anterior e aguarda o emulador exibi-la."""
         self._exec('prev')
 
     def clear(self):
@@ -68,19 +203,25 @@ class PyX3270Manager:
             self.prev()
 
     def set_screen(self, screen: str):
-        """Define a tela específica e aguarda processamento corretamente."""
-        self._exec(f'set {screen}')
-        return True
+        """Define a tela específica; False se o replay recusou o nome."""
+        return self._exec(f'set {screen}') is not None
 
     def change_directory(self, directory: str):
         """Troca o diretório de carregamento das telas."""
         self._exec(f'change directory {directory}')
-        self.emu.pf(1)
 
     def terminate(self):
         """Finaliza corretamente o processo e evita que fique travado."""
+        if self.client:
+            self.client.close()
+            self.client = None
+        if self.replay:
+            if self.replay.running:
+                self.emu.terminate()
+                self.replay.close()
+            return
         if (
-            self.process.poll() is None
+            self.process and self.process.poll() is None
         ):  # Verifica se o processo ainda está rodando
             self.emu.terminate()
             self.process.terminate()
@@ -88,6 +229,9 @@ class PyX3270Manager:
                 self.process.wait(timeout=5)
             except subprocess.TimeoutExpired:
                 self.process.kill()
+        if self._control_dir:
+            shutil.rmtree(self._control_dir, ignore_errors=True)
+            self._control_dir = None
 
     def __del__(self):
         """Certifica que o processo será encerrado ao destruir a instância."""
@@ -0,0 +1,230 @@
+import threading
+from collections import deque
+from contextlib import contextmanager
+from logging import getLogger
+from time import monotonic
+from typing import Callable, Iterator
+
+from pyx3270.emulator import X3270
+from pyx3270.exceptions import PoolTimeoutError
+
+logger = getLogger(__name__)
+
+
+def session_factory(
+    host: str,
+    port: int | str,
+    tls: bool = True,
+    mode_3270: bool = True,
+    **emulator_kwargs,
+) -> Callable[[], X3270]:
+    """Fábrica de sessões X3270 conectadas a ``host:port``."""
+
+    def factory() -> X3270:
+        em = X3270(**emulator_kwargs)
+        em.connect_host(host, port, tls, mode_3270)
+        return em
+
+    return factory
+
+
+class X3270Pool:
+    """
+    Mantém ``size`` sessões X3270, criadas por ``factory``, prontas para
+    uso; ``session_factory(host, port, ...)`` cria sessões conectadas.
+
+    As sessões são entregues por ``session()`` e, na devolução, voltam a
+    uma tela conhecida por ``on_checkin`` (padrão: ``clear_screen``).
+    Sessões que falham ao serem reiniciadas, perdem a conexão ou atingem
+    ``max_uses`` são encerradas; a substituta é criada pelo próximo
+    ``acquire``, não por quem devolveu a sessão.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], X3270],
+        size: int = 4,
+        on_checkin: Callable[[X3270], None] | None = None,
+        max_uses: int | None = None,
+        prewarm: bool = True,
+    ) -> None:
+        self.factory = factory
+        self.size = size
+        self.on_checkin = on_checkin or (lambda em: em.clear_screen())
+        self.max_uses = max_uses
+
+        self._cond = threading.Condition()
+        self._idle: deque[X3270] = deque()
+        self._in_use: dict[int, float] = {}
+        self._uses: dict[int, int] = {}
+        self._total = 0
+        self._closed = False
+
+        self._started_at = monotonic()
+        self._busy_time = 0.0
+        self._checkouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        if prewarm:
+            self.prewarm()
+
+    def _create(self) -> X3270:
+        logger.info('[+] Criando nova sessão para o pool')
+        try:
+            em = self.factory()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            logger.error('Erro ao criar sessão do pool')
+            raise
+        with self._cond:
+            self._created += 1
+            self._uses[id(em)] = 0
+        return em
+
+    def prewarm(self) -> None:
+        """Cria sessões até completar o tamanho do pool."""
+        while True:
+            with self._cond:
+                if self._closed or self._total >= self.size:
+                    return
+                self._total += 1
+            em = self._create()
+            with self._cond:
+                self._idle.append(em)
+                self._cond.notify()
+
+    def acquire(self, timeout: float | None = None) -> X3270:
+        start = monotonic()
+        deadline = None if timeout is None else start + timeout
+        create = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError('Pool encerrado.')
+                if self._idle:
+                    em = self._idle.popleft()
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    create = True
+                    break
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeoutError(
+                        f'Nenhuma sessão livre após {timeout}s'
+                    )
+                self._cond.wait(remaining)
+
+        if create:
+            em = self._create()
+
+        waited = monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._in_use[id(em)] = monotonic()
+            self._uses[id(em)] = self._uses.get(id(em), 0) + 1
+        logger.debug('Sessão entregue após %.3fs de espera', waited)
+        return em
+
+    def _is_healthy(self, em: X3270) -> bool:
+        if em.is_terminated:
+            return False
+        if self.max_uses and self._uses.get(id(em), 0) >= self.max_uses:
+            return False
+        try:
+            self.on_checkin(em)
+            return em.is_connected()
+        except Exception as e:
+            logger.warning(f'Falha ao reiniciar sessão do pool: {e}')
+            return False
+
+    def release(self, em: X3270, healthy: bool = True) -> None:
+        with self._cond:
+            checked_out = self._in_use.pop(id(em), None)
+            if checked_out is None:
+                logger.warning('[!] Sessão devolvida sem estar em uso')
+                return
+            self._busy_time += monotonic() - checked_out
+            closed = self._closed
+
+        if not closed and healthy and self._is_healthy(em):
+            with self._cond:
+                self._idle.append(em)
+                self._cond.notify()
+            return
+
+        # A vaga liberada é preenchida pelo próximo acquire.
+        self._discard(em)
+
+    def _discard(self, em: X3270) -> None:
+        logger.info('[!] Descartando sessão do pool')
+        try:
+            em.terminate()
+        except Exception:
+            logger.warning('Erro ao encerrar sessão descartada')
+        with self._cond:
+            self._total -= 1
+            self._recycled += 1
+            self._uses.pop(id(em), None)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout: float | None = None) -> Iterator[X3270]:
+        em = self.acquire(timeout)
+        try:
+            yield em
+        finally:
+            self.release(em)
+
+    def stats(self) -> dict[str, int | float]:
+        with self._cond:
+            now = monotonic()
+            busy = self._busy_time + sum(
+                now - start for start in self._in_use.values()
+            )
+            elapsed = now - self._started_at
+            return dict(
+                size=self.size,
+                total=self._total,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                created=self._created,
+                recycled=self._recycled,
+                checkouts=self._checkouts,
+                wait_time_total=self._wait_total,
+                wait_time_max=self._wait_max,
+                wait_time_avg=(
+                    self._wait_total / self._checkouts
+                    if self._checkouts
+                    else 0.0
+                ),
+                utilisation=(
+                    busy / (self.size * elapsed)
+                    if elapsed and self.size
+                    else 0.0
+                ),
+            )
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for em in idle:
+            self._discard(em)
+
+    def __enter__(self) -> 'X3270Pool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,145 @@
+"""
+Replay em vários processos (prefork), só em POSIX.
+
+O supervisor carrega as telas uma vez e faz ``fork`` de cada worker: as
+páginas são divididas por cópia na escrita. Cada worker abre o próprio
+socket na mesma porta com SO_REUSEPORT, e o kernel distribui as conexões
+entre eles; cada um roda um ReplayServer asyncio independente.
+"""
+
+import asyncio
+import os
+import signal
+import socket
+from collections.abc import Mapping
+from logging import getLogger
+from time import sleep
+
+from pyx3270.server import REPLAY_BACKLOG, ReplayServer
+
+logger = getLogger(__name__)
+
+RESTART_DELAY = 0.1
+
+
+def supports_prefork() -> bool:
+    return hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT')
+
+
+def reuseport_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+class PreforkReplay:
+    """
+    Supervisor de ``workers`` processos de replay na mesma porta.
+
+    O socket do supervisor só reserva a porta (não escuta), para que ela
+    continue a mesma quando um worker morto é reiniciado. Os comandos de
+    controle valem por processo e não são usados neste modo.
+    """
+
+    def __init__(
+        self,
+        screens: Mapping,
+        base_directory: str,
+        workers: int,
+        emulator: bool = False,
+    ) -> None:
+        if not supports_prefork():
+            raise OSError('Replay com vários workers requer POSIX.')
+        # Lidas antes do fork: um ScreenStore vira dict aqui, uma vez só.
+        self.screens = dict(screens)
+        self.base_directory = base_directory
+        self.workers = workers
+        self.emulator = emulator
+        self.address: tuple[str, int] | None = None
+        self.pids: dict[int, int] = {}
+        self.restarts = 0
+        self._sock: socket.socket | None = None
+        self._stopping = False
+
+    def bind(self, port: int = 0, host: str = '0.0.0.0') -> int:
+        """Reserva ``port`` (0 = porta livre) e retorna a porta usada."""
+        self._sock = reuseport_socket(host, port)
+        self.address = (host, self._sock.getsockname()[1])
+        return self.address[1]
+
+    def start(self) -> None:
+        for number in range(self.workers):
+            self._spawn(number)
+
+    def run(self) -> None:
+        """Inicia os workers e os supervisiona até SIGINT/SIGTERM."""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self.stop())
+        self.start()
+        self.supervise()
+        self.close()
+
+    def supervise(self) -> None:
+        """Espera os workers e reinicia os que morrerem, até ``stop``."""
+        while self.pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            number = self.pids.pop(pid, None)
+            if number is None or self._stopping:
+                continue
+            logger.warning(
+                f'[!] Worker {number} (pid {pid}) encerrado com código '
+                f'{os.waitstatus_to_exitcode(status)}; reiniciando.'
+            )
+            self.restarts += 1
+            sleep(RESTART_DELAY)
+            if not self._stopping:
+                self._spawn(number)
+
+    def stop(self) -> None:
+        self._stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def close(self) -> None:
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    def _spawn(self, number: int) -> None:
+        pid = os.fork()
+        if pid:
+            self.pids[pid] = number
+            logger.info(f'[+] Worker {number} iniciado (pid {pid})')
+            return
+
+        code = 0
+        try:
+            self._work()
+        except BaseException as e:
+            logger.error(f'[!] Worker {number} falhou: {e}')
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _work(self) -> None:
+        """Corpo do worker, já no processo filho."""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        self._sock.close()
+        sock = reuseport_socket(*self.address)
+        sock.listen(REPLAY_BACKLOG)
+        replay = ReplayServer(self.screens, self.emulator, self.base_directory)
+
+        async def serve() -> None:
+            await replay.start(sock=sock)
+            await replay.serve_forever()
+
+        asyncio.run(serve())
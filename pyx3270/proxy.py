@@ -0,0 +1,327 @@
+import os
+import selectors
+import socket
+from logging import getLogger
+from typing import Callable
+
+from pyx3270 import tn3270
+from pyx3270.recorder import RecordingWriter
+from pyx3270.server import (
+    PROXY_BUFFER_SIZE,
+    ensure_dir,
+    record_stream,
+)
+
+logger = getLogger(__name__)
+
+DEFAULT_HOST_PORT = 3270
+# Acima de HIGH_WATER bytes pendentes para um lado, o outro lado deixa de
+# ser lido até a fila baixar para LOW_WATER.
+HIGH_WATER = 1 << 20
+LOW_WATER = 1 << 16
+
+
+class Endpoint:
+    """Um lado do par (terminal ou host) e o que falta enviar para ele."""
+
+    def __init__(self, sock: socket.socket, session: 'ProxySession') -> None:
+        self.sock = sock
+        self.session = session
+        self.peer: Endpoint | None = None
+        self.outbox = bytearray()
+        self.paused = False
+        self.events = 0
+
+
+class ProxySession:
+    """Par terminal/host com o estado de gravação da conexão."""
+
+    def __init__(
+        self,
+        number: int,
+        client: socket.socket,
+        host: socket.socket,
+        record_dir: str | None,
+        writer: RecordingWriter | None = None,
+    ) -> None:
+        self.number = number
+        self.client = Endpoint(client, self)
+        self.host = Endpoint(host, self)
+        self.client.peer = self.host
+        self.host.peer = self.client
+        self.record_dir = record_dir
+        self.writer = writer
+        self.framer = tn3270.TelnetFramer()
+        self.counter = 0
+        self.connected = False
+        self.draining = False
+
+    def record(self, buffer: bytearray, size: int) -> None:
+        if self.record_dir:
+            self.counter = record_stream(
+                self.framer,
+                buffer,
+                size,
+                self.record_dir,
+                self.counter,
+                writer=self.writer,
+            )
+
+
+class RecordProxy:
+    """
+    Proxy de gravação em uma única thread (selectors: epoll/kqueue/select).
+
+    Cada terminal aceito ganha uma conexão própria com o host e uma
+    ProxySession. Nenhum envio bloqueia: o que o socket não aceita fica na
+    fila do destino e, se ela passar de ``high_water``, a origem deixa de
+    ser lida até a fila esvaziar. A primeira sessão grava em
+    ``record_dir``; as seguintes em ``record_dir/session-NNN``. Os
+    arquivos são gravados pelo ``writer`` (pyx3270.recorder), em outra
+    thread, para que um disco lento não atrase o tráfego. O endereço do
+    host é resolvido na criação do proxy (OSError se não resolver).
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        address: str,
+        record_dir: str | None = None,
+        *,
+        high_water: int = HIGH_WATER,
+        low_water: int = LOW_WATER,
+        on_session_closed: Callable[['ProxySession'], None] | None = None,
+        writer: RecordingWriter | None = None,
+    ) -> None:
+        host, *port = address.split(':', 2)
+        self.address = (host, int(*port) if port else DEFAULT_HOST_PORT)
+        # Resolvido uma vez: um DNS lento no accept pararia todas as sessões.
+        self.upstream = socket.getaddrinfo(
+            *self.address, type=socket.SOCK_STREAM
+        )[0]
+        self.record_dir = record_dir
+        self.high_water = high_water
+        self.low_water = low_water
+        self.on_session_closed = on_session_closed
+        self._owns_writer = bool(record_dir and not writer)
+        self.writer = RecordingWriter() if self._owns_writer else writer
+        self.sessions: set[ProxySession] = set()
+        self.selector = selectors.DefaultSelector()
+        self._buffer = bytearray(PROXY_BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._listeners: list[socket.socket] = []
+        self._accepted = 0
+        self._running = False
+        self._wakeup, self._waker = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self.selector.register(
+            self._wakeup, selectors.EVENT_READ, self._drain_wakeup
+        )
+
+    def listen(self, port: int, host: str = '') -> int:
+        """Escuta em ``port`` (0 = porta livre) e retorna a porta usada."""
+        sock = socket.create_server((host, port), backlog=128)
+        sock.setblocking(False)
+        self.selector.register(sock, selectors.EVENT_READ, self._accept)
+        self._listeners.append(sock)
+        return sock.getsockname()[1]
+
+    def serve_forever(self) -> None:
+        self._running = True
+        while self._running:
+            for key, mask in self.selector.select():
+                if isinstance(key.data, Endpoint):
+                    self._handle(key.data, mask)
+                else:
+                    key.data(key.fileobj)
+
+    def stop(self) -> None:
+        """Interrompe ``serve_forever``; pode ser chamado de outra thread."""
+        self._running = False
+        self._waker.send(b'\0')
+
+    def close(self) -> None:
+        for session in list(self.sessions):
+            self._close(session)
+        for sock in self._listeners:
+            self.selector.unregister(sock)
+            sock.close()
+        self._listeners.clear()
+        self.selector.close()
+        self._wakeup.close()
+        self._waker.close()
+        if self._owns_writer:
+            self.writer.close()
+
+    @staticmethod
+    def _drain_wakeup(sock: socket.socket) -> None:
+        sock.recv(PROXY_BUFFER_SIZE)
+
+    def _accept(self, listener: socket.socket) -> None:
+        try:
+            client, addr = listener.accept()
+        except BlockingIOError:
+            return
+        logger.info(f'[+] Proxy: terminal conectado {addr}')
+        client.setblocking(False)
+        family, kind, proto, _, address = self.upstream
+        try:
+            host = socket.socket(family, kind, proto)
+        except OSError as e:
+            logger.error(f'[!] Proxy -> MF Falha de conexão: {e}')
+            client.close()
+            return
+        host.setblocking(False)
+        try:
+            host.connect_ex(address)
+        except OSError as e:
+            logger.error(f'[!] Proxy -> MF Falha de conexão: {e}')
+            client.close()
+            host.close()
+            return
+
+        session = ProxySession(
+            self._accepted,
+            client,
+            host,
+            self._session_dir(self._accepted),
+            self.writer,
+        )
+        self._accepted += 1
+        ensure_dir(session.record_dir)
+        self.sessions.add(session)
+        self._update(session.client)
+        self._update(session.host)
+
+    def _session_dir(self, number: int) -> str | None:
+        if not self.record_dir or not number:
+            return self.record_dir
+        return os.path.join(self.record_dir, f'session-{number:03}')
+
+    def _update(self, endpoint: Endpoint) -> None:
+        """Registra no seletor os eventos que ``endpoint`` precisa agora."""
+        session = endpoint.session
+        events = 0
+        if endpoint is session.host and not session.connected:
+            events = selectors.EVENT_WRITE  # conexão com o host em curso
+        else:
+            if not endpoint.paused and not session.draining:
+                events |= selectors.EVENT_READ
+            if endpoint.outbox:
+                events |= selectors.EVENT_WRITE
+
+        if events == endpoint.events:
+            return
+        if not endpoint.events:
+            self.selector.register(endpoint.sock, events, endpoint)
+        elif not events:
+            self.selector.unregister(endpoint.sock)
+        else:
+            self.selector.modify(endpoint.sock, events, endpoint)
+        endpoint.events = events
+
+    def _handle(self, endpoint: Endpoint, mask: int) -> None:
+        session = endpoint.session
+        if session not in self.sessions:
+            return  # encerrada por outro evento do mesmo select()
+        if mask & selectors.EVENT_WRITE:
+            self._write(endpoint)
+        if mask & selectors.EVENT_READ and session in self.sessions:
+            self._read(endpoint)
+
+    def _read(self, endpoint: Endpoint) -> None:
+        session = endpoint.session
+        try:
+            size = endpoint.sock.recv_into(self._buffer)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.info(f'[!] Proxy: erro de rede na sessão: {e}')
+            self._close(session)
+            return
+
+        if not size:
+            self._finish(session)
+            return
+        if endpoint is session.host:
+            session.record(self._buffer, size)
+        self._send(endpoint.peer, self._view[:size])
+
+    def _send(self, target: Endpoint, data: memoryview) -> None:
+        session = target.session
+        sent = 0
+        ready = target is session.client or session.connected
+        if ready and not target.outbox:
+            try:
+                sent = target.sock.send(data)
+            except BlockingIOError:
+                pass
+            except OSError as e:
+                logger.info(f'[!] Proxy: erro de rede na sessão: {e}')
+                self._close(session)
+                return
+        if sent < len(data):
+            target.outbox += data[sent:]
+            if len(target.outbox) > self.high_water:
+                target.peer.paused = True
+                self._update(target.peer)
+        self._update(target)
+
+    def _write(self, endpoint: Endpoint) -> None:
+        session = endpoint.session
+        if endpoint is session.host and not session.connected:
+            error = endpoint.sock.getsockopt(
+                socket.SOL_SOCKET, socket.SO_ERROR
+            )
+            if error:
+                logger.error(
+                    f'[!] Proxy -> MF Falha de conexão: {os.strerror(error)}'
+                )
+                self._close(session)
+                return
+            session.connected = True
+
+        if endpoint.outbox:
+            try:
+                sent = endpoint.sock.send(endpoint.outbox)
+            except BlockingIOError:
+                sent = 0
+            except OSError as e:
+                logger.info(f'[!] Proxy: erro de rede na sessão: {e}')
+                self._close(session)
+                return
+            del endpoint.outbox[:sent]
+
+        if endpoint.peer.paused and len(endpoint.outbox) <= self.low_water:
+            endpoint.peer.paused = False
+            self._update(endpoint.peer)
+        if session.draining and not (
+            session.client.outbox or session.host.outbox
+        ):
+            self._close(session)
+            return
+        self._update(endpoint)
+
+    def _finish(self, session: ProxySession) -> None:
+        """Um lado fechou: entrega o que está na fila e encerra o par."""
+        if not (session.client.outbox or session.host.outbox):
+            self._close(session)
+            return
+        session.draining = True
+        self._update(session.client)
+        self._update(session.host)
+
+    def _close(self, session: ProxySession) -> None:
+        if session not in self.sessions:
+            return
+        self.sessions.discard(session)
+        for endpoint in (session.client, session.host):
+            if endpoint.events:
+                self.selector.unregister(endpoint.sock)
+                endpoint.events = 0
+            endpoint.sock.close()
+        logger.info(
+            f'[!] Proxy: sessão {session.number} encerrada '
+            f'({session.counter} telas gravadas).'
+        )
+        if self.on_session_closed:
+            self.on_session_closed(session)
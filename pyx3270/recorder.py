@@ -0,0 +1,157 @@
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from logging import getLogger
+from time import monotonic
+
+from pyx3270.metrics import Histogram
+
+logger = getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 1024
+DEFAULT_BATCH_SIZE = 64
+POLICIES = ('block', 'drop')
+
+
+@dataclass
+class WriterStats:
+    written: int = 0
+    dropped: int = 0
+    errors: int = 0
+    batches: int = 0
+    fsyncs: int = 0
+    lag: Histogram = field(default_factory=Histogram)
+
+    def __str__(self) -> str:
+        return (
+            f'{self.written} telas gravadas em {self.batches} lotes '
+            f'(descartadas={self.dropped} erros={self.errors} '
+            f'fsyncs={self.fsyncs}); atraso máx '
+            f'{self.lag.max * 1000:.1f} ms, '
+            f'p99 {self.lag.percentile(99) * 1000:.1f} ms'
+        )
+
+
+class RecordingWriter:
+    """
+    Grava as telas em uma thread própria, fora do laço do proxy.
+
+    ``submit`` só enfileira; a thread grava em lotes de até ``batch_size``
+    arquivos e, com ``fsync_interval``, força o disco no máximo uma vez a
+    cada tantos segundos, para todos os arquivos gravados desde o último
+    fsync, e mais uma vez em ``close``. Com a fila cheia (``max_queue``),
+    a política ``block`` espera a vez e ``drop`` descarta a tela. O atraso
+    entre o envio e a gravação fica em ``stats.lag``.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+        policy: str = 'block',
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        fsync_interval: float | None = None,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f'Política de fila inválida: {policy}')
+        self.policy = policy
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.stats = WriterStats()
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._last_fsync = monotonic()
+        self._unsynced: dict[str, None] = {}
+        self._thread = threading.Thread(
+            target=self._run, name='pyx3270-recorder', daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, path: str, data: bytes) -> bool:
+        """Enfileira ``data`` para ``path``; False se foi descartada."""
+        item = (path, data, monotonic())
+        if self.policy == 'block':
+            self._queue.put(item)
+            return True
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.stats.dropped += 1
+            logger.warning(
+                f'[!] Fila de gravação cheia, tela descartada: {path}'
+            )
+            return False
+        return True
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self) -> None:
+        """Espera a gravação de tudo o que já foi enfileirado."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Grava o que falta e encerra a thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+        logger.info(f'[+] Gravação: {self.stats}')
+
+    def __enter__(self) -> 'RecordingWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch.remove(None)
+            try:
+                self._write(batch)
+                if self._unsynced and (
+                    not running
+                    or monotonic() - self._last_fsync >= self.fsync_interval
+                ):
+                    self._sync()
+            finally:
+                for _ in range(len(batch) + (not running)):
+                    self._queue.task_done()
+
+    def _write(self, batch: list[tuple[str, bytes, float]]) -> None:
+        for path, data, submitted in batch:
+            try:
+                with open(path, 'wb') as fd:
+                    fd.write(data)
+            except OSError as e:
+                self.stats.errors += 1
+                logger.error(f'[!] Falha ao gravar tela {path}: {e}')
+                continue
+            logger.info(f'[+] Gravação de tela: {path}')
+            self.stats.written += 1
+            self.stats.lag.record(monotonic() - submitted)
+            if self.fsync_interval is not None:
+                self._unsynced[path] = None
+        self.stats.batches += 1
+
+    def _sync(self) -> None:
+        """Força para o disco os arquivos gravados desde o último fsync."""
+        for path in self._unsynced:
+            try:
+                with open(path, 'rb+') as fd:
+                    os.fsync(fd.fileno())
+            except OSError as e:
+                self.stats.errors += 1
+                logger.error(f'[!] Falha no fsync da tela {path}: {e}')
+        self._unsynced.clear()
+        self.stats.fsyncs += 1
+        self._last_fsync = monotonic()
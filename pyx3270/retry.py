@@ -0,0 +1,91 @@
+import random
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Callable
+
+from pyx3270.exceptions import KeyboardStateError
+
+logger = getLogger(__name__)
+
+
+def is_keyboard_error(error: Exception) -> bool:
+    return isinstance(error, KeyboardStateError)
+
+
+@dataclass(kw_only=True)
+class RetryPolicy:
+    """
+    Backoff exponencial com jitter para comandos que falham de forma
+    transitória (por padrão, somente KeyboardStateError).
+
+    A espera da tentativa ``n`` é ``base_delay * multiplier ** (n - 1)``,
+    limitada a ``max_delay`` e reduzida aleatoriamente em até ``jitter``
+    (fração de 0 a 1). As tentativas param ao atingir ``max_attempts`` ou
+    quando ``max_elapsed`` segundos se passaram desde a primeira falha.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.05
+    max_delay: float = 2.0
+    multiplier: float = 2.0
+    jitter: float = 0.5
+    max_elapsed: float | None = None
+    retryable: Callable[[Exception], bool] = field(
+        default=is_keyboard_error, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        if self.max_attempts < 1:
+            raise ValueError('max_attempts deve ser maior que zero.')
+        if not 0 <= self.jitter <= 1:
+            raise ValueError('jitter deve estar entre 0 e 1.')
+
+    def is_retryable(self, error: Exception) -> bool:
+        return self.retryable(error)
+
+    def should_retry(self, attempt: int, elapsed: float) -> bool:
+        """Indica se cabe nova tentativa após ``attempt`` falhas."""
+        if attempt >= self.max_attempts:
+            return False
+        if self.max_elapsed is None:
+            return True
+        return elapsed + self.delay(attempt, jitter=False) <= self.max_elapsed
+
+    def delay(self, attempt: int, jitter: bool = True) -> float:
+        """Espera, em segundos, antes da tentativa seguinte à ``attempt``."""
+        delay = min(
+            self.max_delay, self.base_delay * self.multiplier ** (attempt - 1)
+        )
+        if jitter and self.jitter:
+            delay -= delay * self.jitter * random.random()
+        return delay
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+@dataclass
+class RetryStats:
+    """Quanto tempo as novas tentativas custaram a uma instância X3270."""
+
+    retried_commands: int = 0
+    retries: int = 0
+    recovered: int = 0
+    exhausted: int = 0
+    backoff_time: float = 0.0
+    recovery_time: float = 0.0
+
+    @property
+    def total_time(self) -> float:
+        return self.backoff_time + self.recovery_time
+
+    def as_dict(self) -> dict[str, int | float]:
+        return dict(
+            retried_commands=self.retried_commands,
+            retries=self.retries,
+            recovered=self.recovered,
+            exhausted=self.exhausted,
+            backoff_time=self.backoff_time,
+            recovery_time=self.recovery_time,
+            total_time=self.total_time,
+        )
@@ -1,23 +1,38 @@
-import multiprocessing
+import asyncio
 import os
-import queue
 import re
 import select
 import socket
-import sys
 import threading
+from collections import deque
 from dataclasses import dataclass
+from itertools import islice
 from logging import getLogger
+from typing import Callable, Mapping
 
 import rich
 
-from pyx3270 import state, tn3270
+from pyx3270 import tn3270
+from pyx3270.archive import ScreenArchive, is_archive
+from pyx3270.control import (
+    CONTROL_COMMANDS,
+    DEFAULT_CONTROL,
+    start_control_server,
+)
+from pyx3270.datastream import InboundRecord, parse_inbound
 from pyx3270.emulator import BINARY_FOLDER, X3270
 from pyx3270.exceptions import NotConnectedException
+from pyx3270.recorder import RecordingWriter
+from pyx3270.store import (
+    DEFAULT_CACHE_SIZE,
+    ScreenStore,
+    screen_list,
+)
 
 logger = getLogger(__name__)
-server_stop = threading.Event()
-command_queue = multiprocessing.Queue()
+PROXY_BUFFER_SIZE = 65536
+REPLAY_RECV_SIZE = 4096
+REPLAY_BACKLOG = 1024
 
 
 @dataclass
@@ -26,6 +41,7 @@ class ReplayState:
     screens_list: list
     current_screen: int
     clear: bool
+    last_record: InboundRecord | None = None
 
 
 def ensure_dir(path: str | None) -> None:
@@ -59,7 +75,15 @@ def load_screens_basic(record_dir: str) -> dict:
 
 
 def load_screens(record_dir: str) -> dict:
-    """Carrega arquivos .bin mantendo a ordem dentro de cada subdiretório."""
+    """
+    Carrega arquivos .bin mantendo a ordem dentro de cada subdiretório.
+
+    ``record_dir`` também pode ser um arquivo .pyx3270 (pyx3270.archive):
+    as telas viram memoryviews sobre o mmap, lidas só quando enviadas.
+    """
+    if is_archive(record_dir):
+        return dict(ScreenArchive(record_dir))
+
     ensure_dir(record_dir)  # Garante que o diretório existe
 
     screens = {}
@@ -91,6 +115,21 @@ def load_screens(record_dir: str) -> dict:
     return screens
 
 
+def open_screens(
+    record_dir: str, cache_size: int = DEFAULT_CACHE_SIZE
+) -> Mapping:
+    """
+    Como load_screens, mas um diretório vira um ScreenStore: só os nomes
+    são lidos agora, o conteúdo de cada tela no primeiro uso.
+    """
+    if is_archive(record_dir):
+        return dict(ScreenArchive(record_dir))
+    ensure_dir(record_dir)
+    if not any(f.endswith('.bin') for f in os.listdir(record_dir)):
+        return load_screens_basic(BINARY_FOLDER)
+    return ScreenStore(record_dir, cache_size)
+
+
 def find_directory(base_dir: str, search_name: str) -> str | None:
     """
     Busca um diretório dentro da pasta base, considerando
@@ -139,17 +178,46 @@ def connect_serversock(
     return serversock
 
 
-def record_data(data_block, record_dir: str, counter: int) -> int:
+def record_data(
+    data_block,
+    record_dir: str,
+    counter: int,
+    writer: RecordingWriter | None = None,
+) -> int:
     if not is_screen_tn3270(data_block):
         logger.warning('[!] Dados recebidos não são uma tela TN3270.')
         return 0
     fn = os.path.join(record_dir, f'{counter:03}.bin')
+    if writer:
+        writer.submit(fn, data_block)
+        return 1
     with open(fn, 'wb') as f:
         logger.info(f'[+] Gravação de tela: {fn}')
         f.write(data_block)
     return 1
 
 
+def record_stream(  # noqa: PLR0913
+    framer: tn3270.TelnetFramer,
+    buffer: bytearray,
+    size: int,
+    record_dir: str,
+    counter: int,
+    *,
+    writer: RecordingWriter | None = None,
+) -> int:
+    """
+    Grava os registros de ``buffer[:size]``; retorna o contador. Com
+    ``writer`` a gravação só é enfileirada (pyx3270.recorder).
+    """
+    for event in framer.feed(buffer, size):
+        if isinstance(event, tn3270.TelnetRecord):
+            counter += record_data(
+                bytes(event.raw), record_dir, counter, writer
+            )
+    return counter
+
+
 def record_handler(
     clientsock: socket.socket,
     emu: X3270,
@@ -170,7 +238,10 @@ def record_handler(
 
     socks = [clientsock, serversock]
     channel = {clientsock: serversock, serversock: clientsock}
-    buffers = {clientsock: b'', serversock: b''}
+    # Um buffer fixo por sentido: recv_into e sendall de fatias, sem cópias.
+    buffers = {sock: bytearray(PROXY_BUFFER_SIZE) for sock in socks}
+    views = {sock: memoryview(buffer) for sock, buffer in buffers.items()}
+    framer = tn3270.TelnetFramer()
     screens = []
 
     try:
@@ -178,25 +249,15 @@ def record_handler(
             ready_socks, _, _ = select.select(socks, [], [], delay)
             for s in ready_socks:
                 save = True
-                data = s.recv(2048)
-                if not data:
+                size = s.recv_into(buffers[s])
+                if not size:
                     raise ConnectionResetError
 
-                if emu.tls:
-                    channel[s].sendall(data)
-                    continue
-
-                buffers[s] += data
-
-                if s == serversock and record_dir:
-                    while tn3270.IAC + tn3270.TN_EOR in buffers[s]:
-                        block, _, rest = buffers[s].partition(
-                            tn3270.IAC + tn3270.TN_EOR
-                        )
-                        full_block = block + tn3270.IAC + tn3270.TN_EOR
-                        counter += record_data(full_block, record_dir, counter)
-                        buffers[s] = rest
-                channel[s].sendall(data)
+                if not emu.tls and s == serversock and record_dir:
+                    counter = record_stream(
+                        framer, buffers[s], size, record_dir, counter
+                    )
+                channel[s].sendall(views[s][:size])
 
             if emu.tls:
                 buffer = emu.readbuffer('ebcdic')
@@ -222,31 +283,33 @@ def record_handler(
         logger.info('[!] Conexão encerrada pelo servidor ou erro de rede.')
         for sock in socks:
             sock.close()
-        server_stop.set()
 
 
-def backend_3270(
-    clientsock: socket.socket,
-    screens: list[bytes],
-    current_screen: int,
-    emulator: bool,
-) -> dict[str, int | bool]:
-    aid = None
+class InboundReader:
+    """
+    Separa os registros inteiros (até IAC EOR) vindos do terminal; a sobra
+    de um bloco fica guardada para o próximo ``feed``.
+    """
 
-    while aid not in tn3270.AIDS:
-        try:
-            aid = clientsock.recv(1)
-            if not aid:
-                raise ConnectionResetError('Terminal fechado.')
-        except socket.timeout:
-            continue
+    def __init__(self) -> None:
+        self.framer = tn3270.TelnetFramer()
+        self.records: deque[InboundRecord] = deque()
 
-    press = clientsock.recv(1)
+    def feed(self, data: bytes) -> None:
+        for event in self.framer.feed(data):
+            if isinstance(event, tn3270.TelnetRecord) and event.data:
+                self.records.append(parse_inbound(bytes(event.data)))
 
-    # Verifica se press contém um código esperado
-    key_press = press and press not in tn3270.AIDS
-    clear = False
 
+def navigate(
+    aid: bytes,
+    key_press: bool,
+    screens_count: int,
+    current_screen: int,
+    emulator: bool,
+) -> tuple[int, bool]:
+    """Aplica a tecla ``aid``; retorna (tela atual, se a tela foi limpa)."""
+    clear = False
     if aid in {tn3270.PF3, tn3270.PF7} and key_press and emulator:
         current_screen = max(0, current_screen - 1)
         logger.info('[!] Comando de retorno recebido.')
@@ -256,29 +319,11 @@ def backend_3270(
         and emulator
     ):
         logger.info('[!] Comando de paginação/confirmação recebido.')
-        current_screen = min(len(screens) - 1, current_screen + 1)
+        current_screen = min(screens_count - 1, current_screen + 1)
     elif aid == tn3270.CLEAR and key_press and emulator or aid == tn3270.PF12:
         logger.info('[!] Comando CLEAR recebido.')
-        clientsock.sendall(tn3270.CLEAR_SCREEN_BUFFER)
         clear = True
-
-    return dict(current_screen=current_screen, clear=clear)
-
-
-def listen_for_commands(command_queue):
-    logger.info('[*] Aguardando comandos...')
-    sys.stdin = open(0, mode='r', encoding='utf-8')
-    try:
-        while True:
-            command = input('[?] Digite um comando: ').strip().lower()
-            if command == 'q':
-                rich.print("[*] Comando 'quit' recebido, encerrando...")
-                break
-            command_queue.put(command)
-    except (OSError, EOFError) as e:
-        logger.warning(f'[*] stdin para comandos fechado: {e}')
-    finally:
-        logger.warning('[*] Encerrando processo de escuta.')
+    return current_screen, clear
 
 
 def handle_set(command: str, screens: dict) -> int | None:
@@ -309,9 +354,9 @@ def handle_change_directory(
 ) -> tuple[dict, list]:
     new_dir = find_directory(base_directory, command.split(' ', 2)[2].strip())
     if new_dir and os.path.isdir(new_dir):
-        new_screens = load_screens_basic(new_dir)
+        new_screens = ScreenStore(new_dir)
         logger.info(f'[+] Mudando para o diretório de telas: {new_dir}')
-        return new_screens, list(new_screens.values())
+        return new_screens, screen_list(new_screens)
     else:
         logger.info(f'[!] Diretório inválido: {new_dir}')
         return dict(), list()
@@ -366,72 +411,330 @@ def process_command(
     return state
 
 
-def start_command_process():
-    if state.command_process and state.command_process.is_alive():
-        logger.warning('[!] Processo de comando já está em execução.')
-        return
+class StreamSocket:
+    """Expõe um StreamWriter com a interface de socket de process_command."""
 
-    if not multiprocessing.get_start_method(allow_none=True):
-        if os.name == 'posix':
-            multiprocessing.set_start_method('fork')
-        else:
-            multiprocessing.set_start_method('spawn')
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
 
-    logger.info('[+] Iniciando processo de comando...')
-    state.command_process = multiprocessing.Process(
-        target=listen_for_commands, args=(command_queue,)
-    )
-    state.command_process.start()
+    def sendall(self, data: bytes) -> None:
+        self.writer.write(data)
 
+    def close(self) -> None:
+        self.writer.close()
 
-def replay_handler(
-    clientsock: socket.socket,
-    screens: dict,
-    emulator: bool,
-    base_directory: str,
-) -> None:
-    state = ReplayState(
-        screens=screens,
-        screens_list=list(screens.values()),
-        current_screen=0,
-        clear=False,
-    )
 
-    try:
-        peer_name = clientsock.getpeername()
-        logger.info(f'Iniciando replay para {peer_name}')
-        clientsock.sendall(b'\xff\xfd\x18\xff\xfb\x18')
+class ReplaySession:
+    """Terminal conectado ao ReplayServer, com o próprio ReplayState."""
 
-        while True:
-            try:
-                if not state.clear:
-                    clientsock.sendall(
-                        state.screens_list[state.current_screen]
-                    )
-            except IndexError:
-                state.current_screen = len(state.screens_list) - 1
-                clientsock.sendall(state.screens_list[state.current_screen])
-
-            try:
-                command = command_queue.get_nowait()
-                state = process_command(
-                    command, clientsock, base_directory, state
-                )
-            except queue.Empty:
-                pass
+    def __init__(
+        self, writer: asyncio.StreamWriter, screens: Mapping, emulator: bool
+    ) -> None:
+        self.sock = StreamSocket(writer)
+        self.emulator = emulator
+        self.reader = InboundReader()
+        self.state = ReplayState(
+            screens=screens,
+            screens_list=screen_list(screens),
+            current_screen=0,
+            clear=False,
+        )
+        # Tela exibida no terminal e quantas vezes ela mudou: o canal de
+        # controle informa ``version`` para o cliente saber se há repintura.
+        self.displayed: bytes | None = None
+        self.version = 0
+
+    def show(self) -> None:
+        """Envia a tela atual (nada se a tela foi limpa)."""
+        state = self.state
+        if state.clear:
+            self._display(None)
+        if state.clear or not state.screens_list:
+            return
+        if state.current_screen >= len(state.screens_list):
+            state.current_screen = len(state.screens_list) - 1
+        screen = state.screens_list[state.current_screen]
+        self._display(screen)
+        self.sock.sendall(screen)
+
+    def _display(self, screen: bytes | None) -> None:
+        if screen != self.displayed:
+            self.displayed = screen
+            self.version += 1
+
+    def receive(self, data: bytes) -> None:
+        """Trata cada registro do terminal (AID + cursor + campos)."""
+        self.reader.feed(data)
+        while self.reader.records:
+            record = self.reader.records.popleft()
+            aid = bytes([record.aid])
+            if aid not in tn3270.AIDS:
+                continue
+            state = self.state
+            state.last_record = record
+            state.current_screen, clear = navigate(
+                aid,
+                True,
+                len(state.screens_list),
+                state.current_screen,
+                self.emulator,
+            )
+            if clear:
+                self.sock.sendall(tn3270.CLEAR_SCREEN_BUFFER)
+            state.clear = clear
+            self.show()
 
-            result = backend_3270(
-                clientsock, state.screens_list, state.current_screen, emulator
+
+class ReplayServer:
+    """
+    Servidor de replay asyncio: uma corrotina e um ReplayState por
+    terminal, todos no mesmo laço de eventos.
+
+    Os comandos do canal de controle (pyx3270.control) são executados no
+    próprio laço, assim que chegam, e valem para todos os terminais
+    conectados; a resposta só sai depois de a tela ser enviada.
+    """
+
+    def __init__(
+        self,
+        screens: Mapping,
+        emulator: bool,
+        base_directory: str,
+        on_session_closed: Callable[[ReplaySession], None] | None = None,
+    ) -> None:
+        self.screens = screens
+        self.emulator = emulator
+        self.base_directory = base_directory
+        self.on_session_closed = on_session_closed
+        self.sessions: set[ReplaySession] = set()
+        self.server: asyncio.Server | None = None
+        self.port: int | None = None
+        self.control: asyncio.Server | None = None
+        self.control_address: str | None = None
+
+    async def start(
+        self,
+        port: int = 0,
+        host: str | None = None,
+        sock: socket.socket | None = None,
+    ) -> int:
+        """
+        Escuta em ``port`` (0 = porta livre) e retorna a porta usada. Com
+        ``sock``, aceita conexões nesse socket já em escuta.
+        """
+        if sock:
+            self.server = await asyncio.start_server(self._handle, sock=sock)
+        else:
+            self.server = await asyncio.start_server(
+                self._handle, host, port, backlog=REPLAY_BACKLOG
+            )
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def start_control(self, address: str = DEFAULT_CONTROL) -> str:
+        """Abre o canal de controle e retorna o endereço efetivo."""
+        self.control, self.control_address = await start_control_server(
+            self.execute, address
+        )
+        logger.info(f'[+] Canal de controle em {self.control_address}')
+        return self.control_address
+
+    async def serve_forever(
+        self, port: int | None = None, host: str | None = None
+    ) -> None:
+        if port is not None:
+            await self.start(port, host)
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            if self.control:
+                self.control.close()
+
+    async def close(self) -> None:
+        """Fecha os servidores e as sessões abertas."""
+        for server in (self.server, self.control):
+            if server:
+                server.close()
+        for session in list(self.sessions):
+            session.sock.close()
+        if self.server:
+            await self.server.wait_closed()
+
+    def execute(self, command: str) -> dict:
+        """Aplica um comando de controle e retorna o estado resultante."""
+        command = command.strip().lower()
+        if command.split(' ', 1)[0] not in CONTROL_COMMANDS:
+            error = f'Comando inválido: {command}'
+        else:
+            logger.info(
+                f'Comando de controle: {" ".join(command.split()[:2])}'
+            )
+            error = self._apply(command)
+        if error:
+            return {'ok': False, 'error': error}
+        return self.status()
+
+    def _apply(self, command: str) -> str | None:
+        """Executa ``command``; retorna a mensagem de erro, se houver."""
+        if command == 'status':
+            return None
+        if command.startswith('add '):
+            return self._add(command)
+        if command.startswith('change directory '):
+            return self._change_directory(command)
+        if command.startswith('set ') and (
+            handle_set(command, self.screens) is None
+        ):
+            return 'Tela não encontrada.'
+        for session in list(self.sessions):
+            session.state = process_command(
+                command, session.sock, self.base_directory, session.state
             )
+            session.show()
+        return None
+
+    def _add(self, command: str) -> str | None:
+        added = []
+        handle_add(command, self.screens, added)
+        if not added:
+            return 'Formato inválido.'
+        for session in self.sessions:
+            session.state.screens_list.append(added[0])
+        return None
+
+    def _change_directory(self, command: str) -> str | None:
+        screens, _ = handle_change_directory(command, self.base_directory)
+        if not screens:
+            return 'Diretório inválido.'
+        self.screens = screens
+        for session in self.sessions:
+            session.state = ReplayState(
+                screens, screen_list(screens), 0, False
+            )
+            session.show()
+        return None
+
+    def status(self) -> dict:
+        sessions = [
+            {
+                'screen': session.state.current_screen,
+                'name': next(
+                    islice(
+                        session.state.screens,
+                        session.state.current_screen,
+                        None,
+                    ),
+                    None,
+                ),
+                'clear': session.state.clear,
+                'version': session.version,
+            }
+            for session in self.sessions
+        ]
+        return {
+            'ok': True,
+            'port': self.port,
+            'screens': len(self.screens),
+            'sessions': sessions,
+        }
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        session = ReplaySession(writer, self.screens, self.emulator)
+        self.sessions.add(session)
+        logger.info(
+            f'Iniciando replay para {writer.get_extra_info("peername")}'
+        )
+        try:
+            await self._serve(session, reader, writer)
+        except (ConnectionError, OSError) as e:
+            logger.info(f'[!] Replay: conexão encerrada: {e}')
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+            if isinstance(session.state.screens, ScreenStore):
+                logger.info(f'[+] {session.state.screens.stats}')
+            if self.on_session_closed:
+                self.on_session_closed(session)
+
+    @staticmethod
+    async def _serve(
+        session: ReplaySession,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Negocia o terminal, envia a tela atual e responde até o EOF."""
+        writer.write(b'\xff\xfd\x18\xff\xfb\x18')
+        session.show()
+        await writer.drain()
+        while data := await reader.read(REPLAY_RECV_SIZE):
+            session.receive(data)
+            await writer.drain()
+
+
+class EmbeddedReplay:
+    """
+    ReplayServer no processo atual: laço asyncio próprio em uma thread,
+    sem subprocesso nem estado global, escutando em porta livre.
+    """
 
-            state.current_screen = result.get(
-                'current_screen', state.current_screen
+    def __init__(
+        self,
+        screens: Mapping,
+        base_directory: str,
+        emulator: bool = False,
+        on_session_closed: Callable[[ReplaySession], None] | None = None,
+    ) -> None:
+        self.replay = ReplayServer(
+            screens, emulator, base_directory, on_session_closed
+        )
+        self.loop = asyncio.new_event_loop()
+        self.port: int | None = None
+        self.control_address: str | None = None
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name='pyx3270-replay', daemon=True
+        )
+
+    def start(
+        self,
+        port: int = 0,
+        host: str | None = '127.0.0.1',
+        control: str | None = None,
+    ) -> int:
+        """
+        Inicia a thread e retorna a porta em uso (a escolhida, se
+        ``port`` for 0). Com ``control`` abre também o canal de controle.
+        """
+        self.thread.start()
+        self.port = self._call(self.replay.start(port, host))
+        if control is not None:
+            self.control_address = self._call(
+                self.replay.start_control(control)
             )
-            state.clear = result.get('clear', state.clear)
+        logger.info(f'[+] Replay embutido escutando na porta {self.port}')
+        return self.port
 
-    except Exception as e:
-        logger.error(f'[!] Erro fora do esperado: {str(e)}')
-        server_stop.set()
-    finally:
-        clientsock.close()
-        server_stop.set()
+    def execute(self, command: str) -> dict:
+        """Executa ``command`` no laço do replay, como o canal de controle."""
+
+        async def run() -> dict:
+            return self.replay.execute(command)
+
+        return self._call(run())
+
+    @property
+    def running(self) -> bool:
+        return self.thread.is_alive()
+
+    def close(self) -> None:
+        if not self.running:
+            return
+        self._call(self.replay.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
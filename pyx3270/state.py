@@ -1,3 +0,0 @@
-from multiprocessing import Process
-
-command_process: Process = None
@@ -0,0 +1,145 @@
+import os
+from collections import OrderedDict
+from collections.abc import Iterator, MutableMapping
+from dataclasses import dataclass
+from logging import getLogger
+from time import perf_counter
+
+from pyx3270 import tn3270
+
+logger = getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 256
+
+
+@dataclass
+class CacheStats:
+    screens: int = 0
+    index_seconds: float = 0.0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    cached: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f'{self.screens} telas indexadas em '
+            f'{self.index_seconds * 1000:.1f} ms; cache {self.cached} '
+            f'(acertos={self.hits} leituras={self.misses} '
+            f'descartes={self.evictions})'
+        )
+
+
+class ScreenStore(MutableMapping):
+    """
+    Telas .bin de um diretório, lidas sob demanda.
+
+    Na criação só os nomes são indexados (os.scandir, na mesma ordem de
+    load_screens); o conteúdo é lido no primeiro acesso e mantido em um
+    LRU de até ``cache_size`` telas. Telas incluídas com ``store[nome] =
+    dados`` (comando ``add``) ficam fora do LRU.
+    """
+
+    def __init__(
+        self, record_dir: str, cache_size: int = DEFAULT_CACHE_SIZE
+    ) -> None:
+        self.record_dir = record_dir
+        self.cache_size = cache_size
+        self._paths: dict[str, str] = {}
+        self._added: dict[str, bytes] = {}
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self.stats = CacheStats()
+
+        start = perf_counter()
+        self._index(record_dir)
+        self.stats.screens = len(self._paths)
+        self.stats.index_seconds = perf_counter() - start
+        logger.info(f'[+] {self.stats}')
+
+    def _index(self, directory: str) -> None:
+        """Arquivos do diretório em ordem, depois os subdiretórios."""
+        with os.scandir(directory) as scan:
+            entries = list(scan)
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.name.endswith('.bin') and entry.is_file():
+                key = entry.name.upper().replace('.BIN', '')
+                self._paths[key] = entry.path
+        for entry in entries:
+            if entry.is_dir():
+                self._index(entry.path)
+
+    def __getitem__(self, name: str) -> bytes:
+        if name in self._added:
+            return self._added[name]
+        if name in self._cache:
+            self._cache.move_to_end(name)
+            self.stats.hits += 1
+            return self._cache[name]
+
+        with open(self._paths[name], 'rb') as fd:
+            data = fd.read()
+        if not data.endswith(tn3270.IAC + tn3270.TN_EOR):
+            data += tn3270.IAC + tn3270.TN_EOR
+        self.stats.misses += 1
+        self._cache[name] = data
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+            self.stats.evictions += 1
+        self.stats.cached = len(self._cache)
+        return data
+
+    def __setitem__(self, name: str, data: bytes) -> None:
+        self._paths.pop(name, None)
+        self._cache.pop(name, None)
+        self._added[name] = data
+
+    def __delitem__(self, name: str) -> None:
+        if name in self._added:
+            del self._added[name]
+            return
+        del self._paths[name]
+        self._cache.pop(name, None)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._paths
+        yield from self._added
+
+    def __len__(self) -> int:
+        return len(self._paths) + len(self._added)
+
+
+class ScreenList:
+    """
+    Lista das telas de um ScreenStore sem lê-las: como
+    ``list(store.values())``, mas cada tela só é lida quando indexada.
+    """
+
+    def __init__(self, store: ScreenStore) -> None:
+        self.store = store
+        self._keys = list(store)
+        self._extra: list[bytes] = []
+
+    def __len__(self) -> int:
+        return len(self._keys) + len(self._extra)
+
+    def __getitem__(self, index: int) -> bytes:
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('índice de tela fora do intervalo')
+        if index < len(self._keys):
+            return self.store[self._keys[index]]
+        return self._extra[index - len(self._keys)]
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def append(self, data: bytes) -> None:
+        self._extra.append(data)
+
+
+def screen_list(screens: MutableMapping) -> list | ScreenList:
+    """``list(screens.values())``, preguiçoso quando for um ScreenStore."""
+    if isinstance(screens, ScreenStore):
+        return ScreenList(screens)
+    return list(screens.values())
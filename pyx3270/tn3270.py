@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+
 CLEAR_SCREEN_BUFFER = b'\xf5\xc3\x11\x5d\x7f\x1d\xc0\x11\x40\x40\x13\xff\xef'
 START_SCREEN = (
     b'\xff\xfd\x18\xff\xfa\x18\x01\xff\xf0\xff\xfd\x19\xff\xfb'
@@ -52,7 +54,7 @@ EW = b'\x05'
 EWA = b'\x0d'
 RB = b'\x02'
 RM = b'\x06'
-RMA = b''
+RMA = b'\x0e'
 W = b'\x01'
 WSF = b'\x11'
 NOP = b'\x03'
@@ -374,3 +376,172 @@ tn3270_options = {
     TN3270E_REQUEST: 'TN3270E_REQUEST',
     TN3270E_SEND: 'TN3270E_SEND',
 }
+
+_IAC = IAC[0]
+_SB = SB[0]
+_SE = SE[0]
+_EOR = TN_EOR[0]
+_NEGOTIATION = {WILL[0], WONT[0], DO[0], DONT[0]}
+
+
+@dataclass
+class TelnetRecord:
+    """
+    Registro 3270 completo (terminado em IAC EOR).
+
+    ``data`` traz só os dados 3270, com IAC IAC já desfeito; ``raw`` traz
+    os bytes como vieram na conexão, desde o fim do registro anterior
+    (inclui a negociação telnet e o IAC EOR final).
+    """
+
+    data: memoryview
+    raw: memoryview
+
+
+@dataclass
+class TelnetCommand:
+    """
+    Comando telnet fora de um registro.
+
+    ``option`` é a opção de WILL/WONT/DO/DONT ou o primeiro byte de uma
+    subnegociação; ``payload`` é o conteúdo de IAC SB ... IAC SE.
+    """
+
+    command: int
+    option: int | None = None
+    payload: bytes = b''
+
+
+class TelnetFramer:
+    """
+    Separa um fluxo telnet em comandos e registros 3270.
+
+    ``feed`` aceita qualquer fragmentação e retorna os eventos completos
+    na ordem em que chegaram. Cada byte é examinado uma única vez: só a
+    sequência IAC incompleta do fim de um bloco é guardada para o
+    próximo, então rajadas grandes são processadas em tempo linear.
+    Quando o registro inteiro está no bloco recebido e não tem IAC IAC,
+    ``data`` e ``raw`` são fatias do próprio bloco, sem cópia.
+    """
+
+    def __init__(self) -> None:
+        self._pending = b''
+        self._record = bytearray()
+        self._raw = bytearray()
+        self._subnegotiation: bytearray | None = None
+
+    def feed(
+        self, data: bytes | bytearray, size: int | None = None
+    ) -> list[TelnetRecord | TelnetCommand]:
+        """
+        Processa ``data[:size]`` e retorna os eventos completos.
+
+        Os memoryviews dos eventos podem apontar para ``data``: se o buffer
+        for reutilizado (ex.: ``recv_into``), consuma-os antes do próximo
+        ``feed``.
+        """
+        data, size = self._resume(data, size)
+        limit = size
+        view = memoryview(data)
+        events = []
+        record = self._record
+        start = 0  # início dos bytes brutos do registro neste bloco
+        segment = 0  # início dos dados 3270 ainda não copiados
+        pos = 0
+        while pos < size:
+            index = data.find(IAC, pos, size)
+            if index < 0:
+                break
+            if index + 1 >= size:
+                size = index
+                break
+            command = data[index + 1]
+
+            if self._subnegotiation is not None:
+                event = self._subnegotiate(view[pos:index], command)
+                pos = index + 2
+                if event:
+                    events.append(event)
+                    segment = pos
+                continue
+
+            if command == _IAC:
+                record += view[segment : index + 1]
+                pos = segment = index + 2
+                continue
+
+            if command == _EOR:
+                end = index + 2
+                events.append(
+                    TelnetRecord(
+                        self._join(record, view[segment:index]),
+                        self._join(self._raw, view[start:end]),
+                    )
+                )
+                pos = segment = start = end
+                continue
+
+            if command in _NEGOTIATION and index + 2 >= size:
+                size = index
+                break
+            record += view[segment:index]
+            event, pos = self._command(data, index)
+            if event:
+                events.append(event)
+            segment = pos
+
+        if self._subnegotiation is not None:
+            self._subnegotiation += view[pos:size]
+        else:
+            record += view[segment:size]
+        self._raw += view[start:size]
+        self._pending = bytes(view[size:limit])
+        return events
+
+    def _resume(
+        self, data: bytes | bytearray, size: int | None
+    ) -> tuple[bytes | bytearray, int]:
+        """Junta a sequência IAC incompleta do bloco anterior a ``data``."""
+        if size is None:
+            size = len(data)
+        if not self._pending:
+            return data, size
+        data = self._pending + data[:size]
+        self._pending = b''
+        return data, len(data)
+
+    def _command(
+        self, data: bytes, index: int
+    ) -> tuple[TelnetCommand | None, int]:
+        """Interpreta o comando em ``data[index]``; retorna a nova posição."""
+        command = data[index + 1]
+        if command == _SB:
+            self._subnegotiation = bytearray()
+            return None, index + 2
+        if command in _NEGOTIATION:
+            return TelnetCommand(command, data[index + 2]), index + 3
+        return TelnetCommand(command), index + 2
+
+    def _subnegotiate(
+        self, chunk: memoryview, command: int
+    ) -> TelnetCommand | None:
+        """Acumula a subnegociação; retorna o comando ao chegar IAC SE."""
+        payload = self._subnegotiation
+        payload += chunk
+        if command == _IAC:
+            payload.append(_IAC)
+        if command != _SE:
+            return None
+        self._subnegotiation = None
+        option = payload[0] if payload else None
+        return TelnetCommand(_SB, option, bytes(payload))
+
+    @staticmethod
+    def _join(head: bytearray, tail: memoryview) -> memoryview:
+        """Une o que sobrou de blocos anteriores; sem sobra, não copia."""
+        if not head:
+            return tail
+        head += tail
+        joined = memoryview(bytes(head))
+        head.clear()
+        return joined
@@ -20,11 +20,24 @@ def _wrap_method(method):
     return wrapper
 
 
-def x3270_command(em, func, *args, **kwargs):
-    all_args_str = ', '.join(
+def format_args(*args, **kwargs) -> str:
+    return ', '.join(
         list(map(str, args)) + [f'{k}={repr(v)}' for k, v in kwargs.items()]
     )
 
+
+def command_result(cmd) -> Any:
+    """Converte as linhas de dados de um comando no retorno do builtin."""
+    try:
+        text = [text.decode('utf8') for text in cmd.data[0:]]
+        return ' '.join(text)
+    except AttributeError:
+        return [val for val in cmd.data[0:]]
+
+
+def x3270_command(em, func, *args, **kwargs):
+    all_args_str = format_args(*args, **kwargs)
+
     if func == 'send_string_not_log':
         warnings.warn(
             f'`{func}` foi descontinuada, use `send_string`'
@@ -50,13 +63,7 @@ def x3270_command(em, func, *args, **kwargs):
         
     try:
         cmd = em._exec_command(f'{func}({all_args_str})'.encode('utf8'))
-        try:
-            text = [text.decode('utf8') for text in cmd.data[0:]]
-            result = ' '.join(text)
-        except AttributeError:
-            result = [val for val in cmd.data[0:]]
-
-        return result
+        return command_result(cmd)
     except Exception:
         raise
 
@@ -208,13 +208,12 @@ def replay_dependencies(tmp_path, monkeypatch):
         'X3270Mock', (), {'connect_host': lambda self, *a, **kw: None}
     )()
 
-    def control_replay_mock(th):
+    def control_replay_mock(th, stop):
         # levanta KeyboardInterrupt quando chamado
         raise KeyboardInterrupt
 
     # Monkeypatch no módulo
     monkeypatch.setattr(cli, 'X3270', lambda *a, **kw: x3270_mock)
-    monkeypatch.setattr(cli, 'start_command_process', lambda: None)
     monkeypatch.setattr(cli, 'control_replay', control_replay_mock)
 
     # Monkeypatch para não abrir socket de verdade
@@ -224,6 +223,13 @@ def replay_dependencies(tmp_path, monkeypatch):
         return thread
 
     monkeypatch.setattr(cli, 'start_server_thread', fake_start_server_thread)
+    monkeypatch.setattr(
+        cli,
+        'start_replay_server',
+        lambda *args, **kwargs: SimpleNamespace(
+            port=port, thread=fake_start_server_thread()
+        ),
+    )
 
     # Monkeypatch do rich.print para capturar chamadas
     printed_messages = []
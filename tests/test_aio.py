@@ -0,0 +1,261 @@
+import asyncio
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from pyx3270.aio import (
+    AsyncCommand,
+    AsyncExecutableApp,
+    AsyncX3270,
+    ScreenReader,
+)
+from pyx3270.conditions import StringCondition
+from pyx3270.emulator import Screen
+from pyx3270.exceptions import (
+    CommandError,
+    CommandTimeoutError,
+    KeyboardStateError,
+    TerminatedError,
+)
+from pyx3270.iemulator import AbstractAsyncEmulator
+from pyx3270.retry import NO_RETRY, RetryPolicy
+
+STATUS = b'U F U C(localhost) I 2 24 80 0 0 0x0 0.000'
+
+# Processo que imita o protocolo de script do s3270 via stdin/stdout.
+FAKE_S3270 = r"""
+import sys
+rows = ['MENU PRINCIPAL'.ljust(80)] + [' ' * 80] * 23
+status = 'U F U C(localhost) I 2 24 80 0 0 0x0 0.000'
+for line in sys.stdin:
+    action = line.split('(')[0].strip().lower()
+    if action == 'ascii':
+        for row in rows:
+            print('data: ' + row)
+    if action == 'fail':
+        print('data: falha simulada')
+        print(status)
+        print('error', flush=True)
+        continue
+    print(status)
+    print('ok', flush=True)
+    if action == 'quit':
+        break
+"""
+
+
+class FakeApp:
+    """App assíncrono com respostas enfileiradas."""
+
+    fractional_wait = False
+
+    def __init__(self, lines):
+        self.lines = list(lines)
+        self.written = []
+        self.process = object()
+        self.closed = False
+
+    async def write(self, data):
+        self.written.append(data)
+
+    async def readline(self):
+        return self.lines.pop(0)
+
+    async def close(self):
+        self.closed = True
+        return 0
+
+
+def ok(*data):
+    return [b'data: ' + d + b'\n' for d in data] + [STATUS + b'\n', b'ok\n']
+
+
+def fake_emulator(*responses, **kwargs):
+    lines = [line for response in responses for line in response]
+    app = FakeApp(lines)
+    return AsyncX3270(app=app, **kwargs), app
+
+
+def test_async_x3270_implements_abstract():
+    assert issubclass(AsyncX3270, AbstractAsyncEmulator)
+
+
+def test_async_executable_app_args():
+    app = AsyncExecutableApp(model='4')
+    assert app.args[-3:] == ['-xrm', '*model:4', '-utf8']
+    assert AsyncExecutableApp(args=['x']).args == ['x']
+
+
+def test_async_x3270_with_subprocess():
+    """Conduz um processo real por streams do asyncio."""
+
+    async def run():
+        app = AsyncExecutableApp(args=[sys.executable, '-c', FAKE_S3270])
+        async with AsyncX3270(app=app) as em:
+            assert await em.string_found(1, 1, 'MENU')
+            assert await em.get_string(1, 6, 9) == 'PRINCIPAL'
+            assert await em.is_connected()
+            await em.send_enter()
+            with pytest.raises(CommandError, match='falha simulada'):
+                await em._exec_command(b'fail()')
+        return app
+
+    app = asyncio.run(run())
+    assert app.process.returncode is not None
+
+
+def test_async_x3270_many_sessions_one_loop():
+    """Várias sessões conduzidas concorrentemente pelo mesmo event loop."""
+
+    async def session():
+        app = AsyncExecutableApp(args=[sys.executable, '-c', FAKE_S3270])
+        async with AsyncX3270(app=app) as em:
+            return await em.search_string('principal', ignore_case=True)
+
+    async def run():
+        return await asyncio.gather(*(session() for _ in range(5)))
+
+    assert asyncio.run(run()) == [True] * 5
+
+
+def test_async_command_error_without_sleep():
+    app = FakeApp([b'data: keyboard locked\n', STATUS + b'\n', b'error\n'])
+    cmd = AsyncCommand(app, b'String("x")')
+
+    with patch('pyx3270.emulator.sleep') as mock_sleep, pytest.raises(
+        KeyboardStateError
+    ):
+        asyncio.run(cmd.execute())
+    mock_sleep.assert_not_called()
+    assert app.written == [b'String("x")\n']
+
+
+def test_async_builtins_and_pf():
+    em, app = fake_emulator(ok(b'abc'), ok(), ok())
+
+    async def run():
+        assert await em.ascii(0, 0, 3) == 'abc'
+        await em.send_pf(3)
+
+    asyncio.run(run())
+    assert app.written == [
+        b'ascii(0, 0, 3)\n',
+        b'PF(3)\n',
+        b'wait(60, unlock)\n',
+    ]
+    assert em.status.connection_state == b'C(localhost)'
+
+
+def test_async_unknown_attribute():
+    em, _ = fake_emulator()
+    with pytest.raises(AttributeError):
+        em.not_a_builtin  # noqa: B018
+
+
+def test_async_exec_command_terminated():
+    em, _ = fake_emulator()
+    em.is_terminated = True
+    with pytest.raises(TerminatedError):
+        asyncio.run(em._exec_command(b'enter()'))
+
+
+def test_async_keyboard_error_retries():
+    locked = [b'data: keyboard locked\n', STATUS + b'\n', b'error\n']
+    em, app = fake_emulator(
+        locked, ok(), ok(), ok(), ok(), retry_policy=RetryPolicy(jitter=0)
+    )
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    with patch('pyx3270.aio.asyncio.sleep', fake_sleep):
+        asyncio.run(em._exec_command(b'enter()'))
+
+    assert app.written == [
+        b'enter()\n',
+        b'reset()\n',
+        b'wait(60, unlock)\n',
+        b'tab()\n',
+        b'enter()\n',
+    ]
+    assert delays == [em.retry_policy.base_delay]
+    assert em.retry_stats.recovered == 1
+
+
+def test_async_keyboard_error_exhausts_policy():
+    locked = [b'data: keyboard locked\n', STATUS + b'\n', b'error\n']
+    em, app = fake_emulator(locked, retry_policy=NO_RETRY)
+
+    with pytest.raises(CommandError):
+        asyncio.run(em._exec_command(b'enter()'))
+    assert app.written == [b'enter()\n']
+    assert em.retry_stats.exhausted == 1
+
+
+def test_async_command_timeout_recycles_app():
+    async def no_response():
+        await asyncio.sleep(1)
+
+    stuck = FakeApp([])
+    stuck.readline = no_response
+    em = AsyncX3270(app=stuck, command_timeout=0.01)
+    fresh = FakeApp([])
+
+    with patch.object(AsyncX3270, '_create_app', return_value=fresh):
+        with pytest.raises(CommandTimeoutError):
+            asyncio.run(em._exec_command(b'enter()'))
+
+    assert stuck.closed
+    assert em.app is fresh
+
+
+def test_async_screen_cache_and_positions():
+    rows = [b'abc target'.ljust(19), b'target end'.ljust(19)]
+    em, app = fake_emulator(ok(*rows), ok(), ok(*rows), screen_cache=True)
+    em.model_dimensions = {'rows': 2, 'columns': 20}
+
+    async def run():
+        assert await em.get_string_positions('target') == [(1, 5), (2, 1)]
+        assert await em.get_string_area(1, 1, 2, 3) == 'abc tar'
+        await em.enter()
+        assert await em.search_string('END', ignore_case=True)
+
+    asyncio.run(run())
+    assert em.screen_cache_stats['hits'] == 1
+    EXPECTED_MISSES = 2
+    assert em.screen_cache_stats['misses'] == EXPECTED_MISSES
+
+
+def test_async_wait_until():
+    waiting = ok(b'LOADING')
+    em, app = fake_emulator(waiting, ok(), ok(b'MENU   '))
+
+    result = asyncio.run(
+        em.wait_until(StringCondition(1, 1, 'MENU'), timeout=10)
+    )
+
+    assert result is True
+    assert app.written[1] == b'wait(1, Output)\n'
+
+
+def test_async_wait_until_sleep_refreshes_cached_screen():
+    em, app = fake_emulator(ok(b'LOADING'), ok(b'MENU   '), screen_cache=True)
+    em.model_dimensions = {'rows': 1, 'columns': 7}
+
+    with patch('pyx3270.aio.asyncio.sleep'):
+        result = asyncio.run(
+            em.wait_until(StringCondition(1, 1, 'MENU'), timeout=0.5)
+        )
+
+    assert result is True
+    assert app.written == [b'ascii()\n', b'ascii()\n']
+
+
+def test_screen_reader():
+    reader = ScreenReader(Screen(['abcdef', 'ghijkl']), {'columns': 3})
+
+    assert reader.get_string(2, 2, 3) == 'hij'
+    assert reader.get_string_area(1, 2, 2, 3) == 'bc hi'
+    assert reader.get_full_screen(header=False) == 'def ghijkl'
@@ -0,0 +1,83 @@
+import struct
+
+import pytest
+from typer.testing import CliRunner
+
+from pyx3270 import server, tn3270
+from pyx3270.archive import (
+    ArchiveWriter,
+    ScreenArchive,
+    is_archive,
+    pack_directory,
+)
+from pyx3270.cli import app
+from pyx3270.exceptions import ArchiveFormatError
+
+EOR = tn3270.IAC + tn3270.TN_EOR
+
+
+def test_archive_roundtrip_is_zero_copy(tmp_path):
+    path = str(tmp_path / 'telas.pyx3270')
+    with ArchiveWriter(path) as writer:
+        writer.add('LOGIN', b'\x11' * 120 + EOR)
+        writer.add('MENU', b'\x11' * 130)  # sem IAC EOR: é completado
+
+    archive = ScreenArchive(path)
+    assert list(archive) == ['LOGIN', 'MENU']
+    assert bytes(archive['LOGIN']) == b'\x11' * 120 + EOR
+    assert bytes(archive['MENU']) == b'\x11' * 130 + EOR
+    assert isinstance(archive['MENU'], memoryview)
+    assert archive['MENU'].readonly
+    assert is_archive(path)
+    assert not is_archive(str(tmp_path))
+
+
+def test_archive_write_failure_leaves_no_file(tmp_path):
+    path = tmp_path / 'telas.pyx3270'
+
+    def write_and_fail():
+        with ArchiveWriter(str(path)) as writer:
+            writer.add('LOGIN', b'\x11' * 120)
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        write_and_fail()
+    assert not list(tmp_path.iterdir())
+
+
+def test_archive_rejects_other_files(tmp_path):
+    path = tmp_path / 'outro.pyx3270'
+    path.write_bytes(struct.pack('<8s', b'NOTPYX32') + b'\x00' * 32)
+    with pytest.raises(ArchiveFormatError):
+        ScreenArchive(str(path))
+
+
+def test_pack_directory_matches_load_screens(tmp_path):
+    record_dir = tmp_path / 'screens'
+    (record_dir / 'sub').mkdir(parents=True)
+    (record_dir / '001.bin').write_bytes(b'\x11' * 120)
+    (record_dir / '000.bin').write_bytes(b'\x11' * 110 + EOR)
+    (record_dir / 'sub' / 'fim.bin').write_bytes(b'\x11' * 140)
+    (record_dir / 'notas.txt').write_text('ignorado')
+    path = str(tmp_path / 'screens.pyx3270')
+
+    COUNT = 3
+    assert pack_directory(str(record_dir), path) == COUNT
+    expected = server.load_screens(str(record_dir))
+    loaded = server.load_screens(path)
+    assert list(loaded) == list(expected) == ['000', '001', 'FIM']
+    assert {k: bytes(v) for k, v in loaded.items()} == expected
+
+
+def test_cli_pack(tmp_path):
+    record_dir = tmp_path / 'screens'
+    record_dir.mkdir()
+    (record_dir / '000.bin').write_bytes(b'\x11' * 120)
+    output = tmp_path / 'screens.pyx3270'
+
+    result = CliRunner().invoke(
+        app,
+        ['pack', '--directory', str(record_dir), '--output', str(output)],
+    )
+    assert result.exit_code == 0
+    assert list(ScreenArchive(str(output))) == ['000']
@@ -30,8 +30,8 @@ def test_replay(monkeypatch, emulator, replay_dependencies):
     runner = CliRunner()
     result = runner.invoke(app, args)
 
-    # Typer encerra o app com SystemExit
-    assert result.exit_code != 0
+    # Ctrl+C encerra o replay com os._exit(0)
+    assert result.exit_code == 0
 
     # Verifica se a mensagem de REPLAY apareceu
     assert any(
@@ -109,3 +109,76 @@ def test_record(emulator, record_dependencies):
     if emulator:
         deps.x3270.connect_host.assert_called()
     deps.control_replay.assert_called()
+
+
+def test_record_without_tls_uses_record_proxy(record_dependencies):
+    deps = record_dependencies
+    proxy = MagicMock()
+    with mock.patch(
+        'pyx3270.cli.start_record_proxy',
+        return_value=(proxy, deps.server_thread),
+    ) as start_record_proxy:
+        runner.invoke(
+            app,
+            [
+                'record',
+                '--address',
+                deps.address,
+                '--directory',
+                deps.directory,
+                '--no-tls',
+                '--no-emulator',
+            ],
+        )
+
+    stop = start_record_proxy.call_args.args[3]
+    start_record_proxy.assert_called_once_with(
+        3270, deps.address, deps.directory, stop
+    )
+    deps.control_replay.assert_called_once_with(
+        deps.server_thread, stop, on_stop=None
+    )
+
+
+def test_command_without_replay_fails():
+    closed = socket.create_server(('127.0.0.1', 0))
+    address = f'127.0.0.1:{closed.getsockname()[1]}'
+    closed.close()
+
+    result = runner.invoke(app, ['command', 'next', '--control', address])
+
+    assert result.exit_code == 1
+
+
+def test_record_archive_flushes_writer_before_pack(record_dependencies):
+    deps = record_dependencies
+    proxy = MagicMock()
+    calls = MagicMock()
+    proxy.writer.flush = calls.flush
+
+    def stop_session(th, stop, on_stop):
+        on_stop()
+        raise KeyboardInterrupt
+
+    deps.control_replay.side_effect = stop_session
+    with mock.patch(
+        'pyx3270.cli.start_record_proxy',
+        return_value=(proxy, deps.server_thread),
+    ), mock.patch('pyx3270.cli.pack_directory', calls.pack_directory):
+        runner.invoke(
+            app,
+            [
+                'record',
+                '--address',
+                deps.address,
+                '--no-tls',
+                '--no-emulator',
+                '--archive',
+                'screens.pyx3270',
+            ],
+        )
+
+    assert calls.mock_calls[:2] == [
+        mock.call.flush(),
+        mock.call.pack_directory('./screens', 'screens.pyx3270'),
+    ]
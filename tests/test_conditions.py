@@ -0,0 +1,86 @@
+from unittest.mock import MagicMock, patch
+
+from pyx3270.conditions import (
+    ChangedCondition,
+    RegexCondition,
+    StableCondition,
+    StringCondition,
+)
+
+
+def test_string_condition_equal_and_not_equal():
+    em = MagicMock()
+    em.get_string.return_value = 'MENU'
+
+    assert StringCondition(1, 2, 'MENU').check(em) is True
+    assert StringCondition(1, 2, 'MENU', equal=False).check(em) is False
+    assert StringCondition(1, 2, 'SAIR').check(em) is False
+    em.get_string.assert_called_with(1, 2, 4)
+
+
+def test_string_condition_error_is_false():
+    em = MagicMock()
+    em.get_string.side_effect = RuntimeError('falha')
+
+    assert StringCondition(1, 1, 'x').check(em) is False
+
+
+def test_regex_condition_full_screen_and_area():
+    em = MagicMock()
+    em.get_full_screen.return_value = 'CONTA 12345 ATIVA'
+    em.get_string_area.return_value = 'SALDO: 10,00'
+
+    assert RegexCondition(r'CONTA \d+').check(em) is True
+    assert RegexCondition(r'saldo', area=(1, 1, 2, 20)).check(em) is False
+    assert (
+        RegexCondition(r'saldo', area=(1, 1, 2, 20), flags=2).check(em) is True
+    )
+    em.get_string_area.assert_called_with(1, 1, 2, 20)
+
+
+def test_regex_condition_error_is_false():
+    em = MagicMock()
+    em.get_full_screen.side_effect = RuntimeError('falha')
+
+    assert RegexCondition('x').check(em) is False
+
+
+def test_stable_condition_requires_unchanged_screen():
+    em = MagicMock()
+    em.get_full_screen.side_effect = ['A', 'A', 'B', 'B']
+    cond = StableCondition(duration=2)
+    clock = iter([10.0, 11.0, 12.5, 14.6])
+
+    with patch('pyx3270.conditions.monotonic', lambda: next(clock)):
+        assert cond.check(em) is False  # primeira leitura
+        assert cond.check(em) is False  # estável há 1s
+        assert cond.check(em) is False  # mudou, reinicia contagem
+        assert cond.check(em) is True  # estável há 2.1s
+
+
+def test_stable_condition_retry_after_and_reset():
+    cond = StableCondition(duration=3)
+    DURATION = 3
+    assert cond.retry_after() == DURATION
+
+    em = MagicMock()
+    em.get_full_screen.return_value = 'A'
+    clock = iter([5.0, 6.0])
+    with patch('pyx3270.conditions.monotonic', lambda: next(clock)):
+        cond.check(em)
+        REMAINING = 2.0
+        assert cond.retry_after() == REMAINING
+
+    cond.reset()
+    assert cond._since is None
+
+
+def test_changed_condition():
+    em = MagicMock()
+    em.get_full_screen.return_value = 'MENU'
+
+    assert ChangedCondition('MENU').check(em) is False
+    assert ChangedCondition('LOGIN').check(em) is True
+
+    em.get_string_area.side_effect = RuntimeError('falha')
+    assert ChangedCondition('MENU', area=(1, 1, 1, 4)).check(em) is False
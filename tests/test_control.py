@@ -0,0 +1,111 @@
+import asyncio
+import os
+import socket
+import threading
+
+import pytest
+
+from pyx3270 import server, tn3270
+from pyx3270.control import ControlClient, parse_address
+from pyx3270.exceptions import ControlError
+
+SCREENS = {
+    'INICIO': tn3270.EW + b'\xc3' + b'A' * 150 + tn3270.IAC + tn3270.TN_EOR,
+    'MENU': tn3270.EW + b'\xc3' + b'B' * 150 + tn3270.IAC + tn3270.TN_EOR,
+}
+NEGOTIATION = b'\xff\xfd\x18\xff\xfb\x18'
+
+
+class RunningReplay:
+    """ReplayServer com canal de controle em um laço de outra thread."""
+
+    def __init__(self, base_directory: str = '.', control: str = '') -> None:
+        self.replay = server.ReplayServer(dict(SCREENS), True, base_directory)
+        self.loop = asyncio.new_event_loop()
+        self.port = self.run(self.replay.start(0, '127.0.0.1'))
+        self.control = self.run(
+            self.replay.start_control(control or '127.0.0.1:0')
+        )
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def run(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.replay.server.close()
+        self.replay.control.close()
+
+
+@pytest.fixture
+def running():
+    replay = RunningReplay()
+    yield replay
+    replay.close()
+
+
+def test_parse_address():
+    PORT = 3271
+    assert parse_address(f'localhost:{PORT}') == ('localhost', PORT)
+    assert parse_address(f':{PORT}') == ('127.0.0.1', PORT)
+    assert parse_address('unix:/tmp/replay.sock') == '/tmp/replay.sock'
+
+
+def test_control_acknowledges_after_screen_is_sent(running):
+    with socket.create_connection(('127.0.0.1', running.port)) as terminal:
+        terminal.settimeout(5)
+        first = len(NEGOTIATION) + len(SCREENS['INICIO'])
+        received = b''
+        while len(received) < first:
+            received += terminal.recv(first - len(received))
+
+        with ControlClient(running.control) as client:
+            response = client.send('set menu')
+            assert response['sessions'] == [
+                {'screen': 1, 'name': 'MENU', 'clear': False, 'version': 2}
+            ]
+            screen = b''
+            while len(screen) < len(SCREENS['MENU']):
+                screen += terminal.recv(len(SCREENS['MENU']) - len(screen))
+            assert screen == SCREENS['MENU']
+
+            assert client.send('prev')['sessions'][0]['name'] == 'INICIO'
+            status = client.send('status')
+            assert status['screens'] == len(SCREENS)
+            assert status['port'] == running.port
+
+
+def test_control_rejects_invalid_commands(running):
+    with ControlClient(running.control) as client:
+        with pytest.raises(ControlError, match='inválido'):
+            client.send('reboot')
+        with pytest.raises(ControlError, match='Tela'):
+            client.send('set inexistente')
+        with pytest.raises(ControlError, match='Formato'):
+            client.send('add NOVA zz')
+        response = client.send('add NOVA 1111')
+    assert response['screens'] == len(SCREENS) + 1
+
+
+def test_control_change_directory(tmp_path):
+    screens = tmp_path / 'outro'
+    screens.mkdir()
+    (screens / '000.bin').write_bytes(b'\x11' * 200)
+    replay = RunningReplay(str(tmp_path))
+    try:
+        with ControlClient(replay.control) as client:
+            with pytest.raises(ControlError, match='Diretório'):
+                client.send('change directory nada')
+            assert client.send('change directory outro')['screens'] == 1
+    finally:
+        replay.close()
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='socket Unix')
+def test_control_over_unix_socket(tmp_path):
+    replay = RunningReplay(control=f'unix:{tmp_path / "replay.sock"}')
+    try:
+        with ControlClient(replay.control) as client:
+            assert client.send('status')['sessions'] == []
+    finally:
+        replay.close()
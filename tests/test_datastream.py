@@ -0,0 +1,229 @@
+import os
+
+from pyx3270 import tn3270
+from pyx3270.datastream import (
+    DataStreamDecoder,
+    PresentationSpace,
+    decode_address,
+    decode_screen,
+    encode_address,
+    parse_inbound,
+)
+from pyx3270.emulator import BINARY_FOLDER
+
+EOR = tn3270.IAC + tn3270.TN_EOR
+
+
+def ebcdic(text: str) -> bytes:
+    return text.encode('cp037')
+
+
+def write(*parts: bytes, wcc: bytes = b'\xc3') -> bytes:
+    return tn3270.EW + wcc + b''.join(parts)
+
+
+def sba(row: int, col: int, cols: int = 80) -> bytes:
+    return tn3270.SBA + encode_address(row * cols + col)
+
+
+def test_address_roundtrip_12_and_14_bit():
+    ADDRESS = 1919
+    assert decode_address(*encode_address(ADDRESS)) == ADDRESS
+    assert decode_address(0x07, 0x7F) == ADDRESS  # 14 bits
+
+
+def test_write_text_and_cursor():
+    decoder = DataStreamDecoder()
+    decoder.apply(write(sba(2, 5), ebcdic('OLA MUNDO'), sba(3, 0), tn3270.IC))
+    ps = decoder.ps
+    assert ps.get_string(2, 5, 9) == 'OLA MUNDO'
+    assert ps.lines()[2].strip() == 'OLA MUNDO'
+    assert ps.cursor_position == (3, 0)
+    assert ps.keyboard_restored
+
+
+def test_text_matches_screen_format():
+    ps = decode_screen(write(ebcdic('A')) + EOR)
+    assert len(ps.text) == 24 * 80 + 23
+    assert ps.text.startswith('A ')
+
+
+def test_fields_attributes():
+    PROTECTED = b'\x60'
+    NUMERIC = b'\x50'
+    HIDDEN = b'\x4c'
+    ps = decode_screen(
+        write(
+            tn3270.SF + PROTECTED + ebcdic('NOME:'),
+            tn3270.SF + NUMERIC + ebcdic('123'),
+            tn3270.SF + HIDDEN + ebcdic('SENHA'),
+            tn3270.SF + PROTECTED,
+        )
+        + EOR
+    )
+    label, number, password, rest = ps.fields()
+    assert label.protected
+    assert not label.numeric
+    assert ps.field_text(label) == 'NOME:'
+    assert number.numeric
+    assert not number.protected
+    assert ps.field_text(number) == '123'
+    assert password.hidden
+    assert 'SENHA' not in ps.text
+    assert len(rest) == 24 * 80 - 17
+
+
+def test_sfe_extended_attributes_and_mf():
+    COLOR = 0x42
+    RED = 0xF2
+    UNPROTECTED = 0x20
+    ps = decode_screen(
+        write(
+            tn3270.SFE + b'\x02\xc0\x60' + bytes([COLOR, RED]),
+            ebcdic('X'),
+            sba(0, 0),
+            tn3270.MF + b'\x01\xc0\x20',
+        )
+        + EOR
+    )
+    assert ps.attributes[0] == UNPROTECTED
+    assert ps.extended[0] == {COLOR: RED}
+
+
+def test_repeat_to_address_with_graphic_escape():
+    ps = decode_screen(
+        write(
+            tn3270.RA + encode_address(10) + ebcdic('*'),
+            tn3270.RA + encode_address(12) + tn3270.GE + b'\xad',
+        )
+        + EOR
+    )
+    assert ps.get_string(0, 0, 10) == '*' * 10
+    assert ps.buffer[10:12] == b'\xad\xad'
+
+
+def test_erase_unprotected_to_address_keeps_protected():
+    ps = decode_screen(
+        write(
+            tn3270.SF + b'\x60' + ebcdic('ROT'),
+            tn3270.SF + b'\x40' + ebcdic('ENTRADA'),
+            sba(0, 0),
+            tn3270.EUA + encode_address(80),
+        )
+        + EOR
+    )
+    assert ps.get_string(0, 1, 3) == 'ROT'
+    assert not ps.get_string(0, 5, 7).strip()
+
+
+def test_erase_all_unprotected_moves_cursor():
+    FIRST_INPUT = 5
+    decoder = DataStreamDecoder()
+    decoder.apply(
+        write(
+            tn3270.SF + b'\x60' + ebcdic('ROT'),
+            tn3270.SF + b'\x41' + ebcdic('ENTRADA'),
+        )
+    )
+    decoder.apply(tn3270.EAU)
+    ps = decoder.ps
+    assert ps.get_string(0, 1, 3) == 'ROT'
+    assert not ps.get_string(0, 5, 7).strip()
+    assert ps.cursor == FIRST_INPUT
+    assert not ps.fields()[1].modified
+
+
+def test_write_keeps_buffer_and_ew_erases():
+    decoder = DataStreamDecoder()
+    decoder.apply(write(ebcdic('PRIMEIRA')))
+    decoder.apply(tn3270.W + b'\xc3' + sba(1, 0) + ebcdic('SEGUNDA'))
+    assert decoder.ps.get_string(0, 0, 8) == 'PRIMEIRA'
+    decoder.apply(write(sba(1, 0), ebcdic('NOVA')))
+    assert not decoder.ps.get_string(0, 0, 8).strip()
+
+
+def test_erase_write_alternate_resizes():
+    ROWS, ALT_ROWS = 24, 43
+    ps = PresentationSpace(ROWS, 80, ALT_ROWS, 80)
+    decoder = DataStreamDecoder(ps)
+    decoder.apply(tn3270.EWA + b'\xc3' + ebcdic('X'))
+    assert len(ps.lines()) == ALT_ROWS
+    decoder.apply(write(ebcdic('X')))
+    assert len(ps.lines()) == ROWS
+
+
+def test_write_structured_field_outbound_ds():
+    data = b'\x00' + tn3270.W + b'\xc3' + ebcdic('WSF')
+    record = (
+        tn3270.WSF
+        + (len(data) + 3).to_bytes(2, 'big')
+        + tn3270.SF_OUTBOUND_DS
+        + data
+    )
+    decoder = DataStreamDecoder()
+    decoder.apply(record)
+    assert decoder.ps.get_string(0, 0, 3) == 'WSF'
+
+
+def test_feed_handles_fragments_negotiation_and_escaped_iac():
+    stream = (
+        tn3270.START_SCREEN + ebcdic('AB') + tn3270.IAC * 2 + ebcdic('C') + EOR
+    )
+    decoder = DataStreamDecoder()
+    applied = sum(decoder.feed(stream[i : i + 1]) for i in range(len(stream)))
+    assert applied == 1
+    assert decoder.ps.buffer[:4] == ebcdic('AB') + b'\xff' + ebcdic('C')
+
+
+def test_feed_multiple_records_in_one_chunk():
+    RECORDS = 2
+    decoder = DataStreamDecoder()
+    stream = write(ebcdic('UM')) + EOR + write(ebcdic('DOIS')) + EOR
+    assert decoder.feed(stream) == RECORDS
+    assert decoder.ps.get_string(0, 0, 4) == 'DOIS'
+
+
+def test_tn3270e_header_is_skipped():
+    decoder = DataStreamDecoder(tn3270e=True)
+    decoder.apply(b'\x00\x00\x00\x00\x01' + write(ebcdic('E')))
+    decoder.apply(b'\x03\x00\x00\x00\x02' + write(ebcdic('Z')))
+    assert decoder.ps.get_string(0, 0, 1) == 'E'
+    assert decoder.records == 1
+
+
+def test_clear_screen_buffer():
+    ps = decode_screen(tn3270.CLEAR_SCREEN_BUFFER)
+    assert not ps.text.strip()
+    assert len(ps.fields()) == 1
+
+
+def test_decode_packaged_start_screen():
+    with open(os.path.join(BINARY_FOLDER, 'start.bin'), 'rb') as fd:
+        ps = decode_screen(fd.read())
+    assert 'Pyx3270' in ps.lines()[0]
+    assert 'Automatize seu MAINFRAME' in ps.text
+
+
+def test_parse_inbound_read_modified():
+    CURSOR, USER, PASSWORD = 95, 90, 170
+    record = (
+        tn3270.ENTER
+        + encode_address(CURSOR)
+        + sba(1, 10)
+        + ebcdic('JOAO')
+        + sba(2, 10)
+        + ebcdic('S3NH4')
+        + b'\x00\x00'
+    )
+    inbound = parse_inbound(record)
+    assert inbound.aid == tn3270.ENTER[0]
+    assert inbound.cursor == CURSOR
+    assert inbound.fields[USER] == ebcdic('JOAO')
+    assert inbound.texts == {USER: 'JOAO', PASSWORD: 'S3NH4'}
+
+
+def test_parse_inbound_short_read_and_structured_field():
+    assert parse_inbound(tn3270.CLEAR).cursor is None
+    inbound = parse_inbound(tn3270.AID_SF + b'\x00\x05\x81\x80\x11')
+    assert inbound.aid == tn3270.AID_SF[0]
+    assert not inbound.fields
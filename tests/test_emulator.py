@@ -8,6 +8,7 @@ from unittest.mock import MagicMock, call, patch
 
 import pytest
 
+from pyx3270.conditions import StableCondition, StringCondition
 from pyx3270.emulator import (
     BINARY_FOLDER,
     MODEL_DIMENSIONS,
@@ -16,22 +17,28 @@ from pyx3270.emulator import (
     AbstractEmulatorCmd,
     AbstractExecutableApp,
     Command,
+    CommandBatch,
     CommandError,
     ExecutableApp,
     KeyboardStateError,
     S3270App,
+    S3270SocketApp,
+    Screen,
     Status,
     Wc3270App,
     Ws3270App,
     X3270App,
     X3270Cmd,
+    action_name,
 )
 from pyx3270.exceptions import (
+    CommandTimeoutError,
     FieldTruncateError,
     NotConnectedException,
     TerminatedError,
 )
 from pyx3270.iemulator import AbstractCommand
+from pyx3270.retry import NO_RETRY, RetryPolicy
 
 
 def test_x3270_implements_abstract():
@@ -221,16 +228,27 @@ def test_wc3270app_readline_success():
     assert line == b'test line\n'
 
 
-@pytest.mark.usefixtures('mock_subprocess_popen')
-def test_executable_app_readline(mock_subprocess_popen):
+@pytest.fixture
+def stdout_pipe(mock_subprocess_popen):
+    """Substitui o stdout do processo mockado por um pipe real."""
+    read_fd, write_fd = os.pipe()
+    stdout = os.fdopen(read_fd, 'rb', buffering=0)
+    mock_subprocess_popen.return_value.stdout = stdout
+    yield write_fd
+    stdout.close()
+    try:
+        os.close(write_fd)
+    except OSError:
+        pass
+
+
+def test_executable_app_readline(stdout_pipe):
     """Testa a leitura do stdout do processo."""
     app = ExecutableApp(model='2')
-    mock_stdout = mock_subprocess_popen.return_value.stdout
-    mock_stdout.readline.return_value = b'output line\n'
+    os.write(stdout_pipe, b'output line\n')
 
     line = app.readline()
 
-    mock_stdout.readline.assert_called_once()
     assert line == b'output line\n'
 
 
@@ -669,7 +687,9 @@ def test_exec_command_not_connected(x3270_real_exec_instance, caplog):
             x3270._exec_command(cmdstr)
 
         # Verifica que a instância de Command foi criada corretamente
-        mock_command_class.assert_called_once_with(x3270.app, cmdstr)
+        mock_command_class.assert_called_once_with(
+            x3270.app, cmdstr, timeout=x3270.command_timeout
+        )
 
         # Verifica se o log de erro foi emitido
         assert any('Emulador não conectado.' in msg for msg in caplog.messages)
@@ -1023,16 +1043,11 @@ def test_x3270app_init(mock_subprocess_popen):
     assert '-script' in args[0]
 
 
-def test_s3270app_init_and_spawn(monkeypatch):
+def test_s3270app_init_and_spawn(mock_subprocess_popen, stdout_pipe):
     """Testa inicialização e execução simulada da S3270App."""
 
-    # Mock subprocess.Popen
-    mock_popen = MagicMock()
-    mock_process = MagicMock()
-    mock_process.stdout.readline.return_value = b'fake output\n'
-    mock_popen.return_value = mock_process
-
-    monkeypatch.setattr('subprocess.Popen', mock_popen)
+    mock_popen = mock_subprocess_popen
+    os.write(stdout_pipe, b'fake output\n')
 
     # Cria instância
     app = S3270App(model='2')
@@ -1596,10 +1611,12 @@ def test_executable_app_write_error():
 
 
 @pytest.mark.usefixtures('mock_subprocess_popen')
-def test_executable_app_readline_error():
+def test_executable_app_readline_error(stdout_pipe):
     app = ExecutableApp(model='2')
-    app.subprocess.stdout.readline.side_effect = OSError('fail read')
-    with pytest.raises(OSError, match='fail read'):
+    os.write(stdout_pipe, b'partial')
+    with patch(
+        'pyx3270.emulator.os.read', side_effect=OSError('fail read')
+    ), pytest.raises(OSError, match='fail read'):
         app.readline()
 
 
@@ -1687,9 +1704,8 @@ def test_executable_app_write_exception(mock_subprocess_popen):
 def test_executable_app_readline_exception(mock_subprocess_popen):
     """Testa se readline levanta exceção em caso de erro."""
     app = ExecutableApp(model='2')
-    mock_subprocess_popen.return_value.stdout.readline.side_effect = Exception(
-        'Erro de leitura'
-    )
+    app._selector = MagicMock()
+    app._selector.select.side_effect = Exception('Erro de leitura')
     with pytest.raises(Exception, match='Erro de leitura'):
         app.readline()
 
@@ -1702,13 +1718,12 @@ def test_command_handle_result_command_error(mock_executable_app):
 
 
 @pytest.mark.usefixtures('mock_subprocess_popen', 'mock_socket')
-def test_wc3270app_get_free_port_exception(monkeypatch):
+def test_wc3270app_get_free_port_exception():
     """Testa se _get_free_port levanta exceção em caso de erro."""
-    monkeypatch.setattr(
-        socket, 'socket', MagicMock(side_effect=Exception('Erro de socket'))
-    )
-    with pytest.raises(Exception, match='Erro de socket'):
-        Wc3270App._get_free_port()
+    # patch (e não monkeypatch) para desfazer antes do mock_socket.
+    with patch('socket.socket', side_effect=Exception('Erro de socket')):
+        with pytest.raises(Exception, match='Erro de socket'):
+            Wc3270App._get_free_port()
 
 
 @pytest.mark.usefixtures('mock_subprocess_popen', 'mock_socket')
@@ -1960,3 +1975,777 @@ def test_command_execute_data_before_status():
     assert result is True
     assert cmd.data == [b'first line', b'second line']
     assert cmd.status_line == b'status line'
+
+
+def test_command_batch_single_write():
+    """Testa CommandBatch enviando todos os comandos em uma escrita."""
+    mock_app = MagicMock(spec=ExecutableApp)
+    mock_app.readline.side_effect = [
+        b'status 1\n',
+        b'ok\n',
+        b'data: tela\n',
+        b'status 2\n',
+        b'ok\n',
+    ]
+    batch = CommandBatch(mock_app)
+    batch.add(b'MoveCursor1(1, 1)')
+    batch.add('Ascii(0, 0, 4)')
+
+    commands = batch.execute()
+
+    mock_app.write.assert_called_once_with(
+        b'MoveCursor1(1, 1)\nAscii(0, 0, 4)\n'
+    )
+    assert [cmd.status_line for cmd in commands] == [b'status 1', b'status 2']
+    assert commands[0].data == []
+    assert commands[1].data == [b'tela']
+
+
+def test_command_batch_empty():
+    mock_app = MagicMock(spec=ExecutableApp)
+    assert CommandBatch(mock_app).execute() == []
+    mock_app.write.assert_not_called()
+
+
+def test_command_batch_drains_after_error():
+    """Uma falha no meio do batch não deixa respostas pendentes no pipe."""
+    mock_app = MagicMock(spec=ExecutableApp)
+    mock_app.readline.side_effect = [
+        b'data: falhou\n',
+        b'status 1\n',
+        b'error\n',
+        b'status 2\n',
+        b'ok\n',
+    ]
+    batch = CommandBatch(mock_app)
+    batch.add(b'String("x")')
+    batch.add(b'Enter()')
+
+    with patch('pyx3270.emulator.sleep'), pytest.raises(
+        CommandError, match='falhou'
+    ):
+        batch.execute()
+
+    EXPECTED_READS = 5
+    assert mock_app.readline.call_count == EXPECTED_READS
+    assert batch.commands[1].status_line == b'status 2'
+
+
+@pytest.mark.usefixtures('x3270_emulator_instance')
+def test_x3270_batch_queues_and_flushes(x3270_emulator_instance):
+    """Testa X3270.batch enfileirando comandos do X3270Cmd."""
+    del x3270_emulator_instance._exec_command
+    x3270_emulator_instance.time_unlock = 10
+    with patch.object(x3270_emulator_instance, 'app', MagicMock()) as mock_app:
+        mock_app.readline.side_effect = [
+            b'U F U C(host) I 4 32 80 0 0 0x0 0.001\n',
+            b'ok\n',
+        ] * 3
+
+        with x3270_emulator_instance.batch() as batch:
+            x3270_emulator_instance.move_to(1, 1)
+            x3270_emulator_instance.send_string('abc')
+            mock_app.write.assert_not_called()
+
+        mock_app.write.assert_called_once_with(
+            b'movecursor1(1, 1)\nstring("abc")\nwait(10, unlock)\n'
+        )
+    EXPECTED_COMMANDS = 3
+    assert len(batch) == EXPECTED_COMMANDS
+    assert x3270_emulator_instance._batch is None
+    assert x3270_emulator_instance.status.connection_state == b'C(host)'
+
+
+@pytest.mark.usefixtures('x3270_emulator_instance')
+def test_x3270_batch_nested_and_discard(x3270_emulator_instance):
+    """Blocos aninhados compartilham o batch; exceções descartam a fila."""
+    del x3270_emulator_instance._exec_command
+    with patch.object(x3270_emulator_instance, 'app', MagicMock()) as mock_app:
+        nested = []
+
+        def fail_inside_batch():
+            with x3270_emulator_instance.batch() as outer:
+                with x3270_emulator_instance.batch() as inner:
+                    x3270_emulator_instance.enter()
+                nested.append((outer, inner))
+                raise RuntimeError('falha')
+
+        with pytest.raises(RuntimeError):
+            fail_inside_batch()
+
+        outer, inner = nested[0]
+        assert inner is outer
+        mock_app.write.assert_not_called()
+    assert x3270_emulator_instance._batch is None
+
+
+@pytest.mark.usefixtures('x3270_emulator_instance')
+def test_x3270_execute_many(x3270_emulator_instance):
+    del x3270_emulator_instance._exec_command
+    with patch.object(x3270_emulator_instance, 'app', MagicMock()) as mock_app:
+        mock_app.readline.side_effect = [
+            b'status 1\n',
+            b'ok\n',
+            b'data: linha\n',
+            b'status 2\n',
+            b'ok\n',
+        ]
+        commands = x3270_emulator_instance.execute_many([b'Tab()', b'Ascii()'])
+
+    mock_app.write.assert_called_once_with(b'Tab()\nAscii()\n')
+    assert commands[1].data == [b'linha']
+
+
+def test_action_name():
+    assert action_name(b'Ascii(0, 0, 8)') == 'ascii'
+    assert action_name('  MoveCursor1(1, 1)') == 'movecursor1'
+    assert action_name(b'Enter') == 'enter'
+
+
+def test_screen_snapshot_reads():
+    """Testa leituras do Screen equivalentes às variações de Ascii()."""
+    screen = Screen(['abcdef', 'ghijkl', 'mnopqr'])
+
+    assert screen.text == 'abcdef ghijkl mnopqr'
+    assert screen.get_string(1, 2, 3) == 'ijk'
+    assert screen.get_area(0, 1, 2, 3) == 'bcd hij'
+    assert Screen.from_command(MagicMock(data=[b'x', b'y'])).rows == [
+        'x',
+        'y',
+    ]
+
+
+@pytest.mark.usefixtures('x3270_cmd_instance')
+def test_screen_cache_serves_reads_from_one_fetch(x3270_cmd_instance):
+    """Com screen_cache, várias leituras usam um único Ascii()."""
+    x3270_cmd_instance.screen_cache = True
+    x3270_cmd_instance.model_dimensions = {'rows': 3, 'columns': 20}
+    screen_data = [
+        b'line 1'.ljust(20),
+        b'line 2 with target'.ljust(20),
+        b'line 3'.ljust(20),
+    ]
+    x3270_cmd_instance._exec_command.return_value = MagicMock(data=screen_data)
+
+    assert x3270_cmd_instance.get_string(2, 13, 6) == 'target'
+    assert x3270_cmd_instance.string_found(1, 1, 'line 1')
+    assert x3270_cmd_instance.search_string('TARGET', ignore_case=True)
+    assert x3270_cmd_instance.get_string_area(2, 1, 3, 4) == 'line line'
+    assert x3270_cmd_instance.get_full_screen().startswith('line 1')
+
+    x3270_cmd_instance._exec_command.assert_called_once_with(b'ascii()')
+    EXPECTED_HITS = 4
+    assert x3270_cmd_instance.screen_cache_stats == {
+        'hits': EXPECTED_HITS,
+        'misses': 1,
+        'hit_rate': EXPECTED_HITS / 5,
+    }
+
+    x3270_cmd_instance.reset_screen_cache_stats()
+    assert x3270_cmd_instance.screen_cache_stats['hits'] == 0
+
+
+@pytest.mark.usefixtures('x3270_cmd_instance')
+def test_screen_cache_disabled_fetches_every_time(x3270_cmd_instance):
+    x3270_cmd_instance._exec_command.return_value = MagicMock(data=[b'abc'])
+
+    x3270_cmd_instance.screen()
+    x3270_cmd_instance.screen()
+
+    EXPECTED_CALLS = 2
+    assert x3270_cmd_instance._exec_command.call_count == EXPECTED_CALLS
+    assert x3270_cmd_instance._screen is None
+    assert x3270_cmd_instance.screen_cache_stats['misses'] == EXPECTED_CALLS
+
+
+@pytest.mark.usefixtures('x3270_real_exec_instance')
+def test_screen_cache_invalidated_by_state_changes(x3270_real_exec_instance):
+    """Ações que alteram a tela invalidam o retrato; movimentos não."""
+    emu = x3270_real_exec_instance
+    emu.screen_cache = True
+    emu._screen = Screen(['cached'])
+
+    with patch('pyx3270.emulator.Command') as mock_command:
+        mock_command.return_value.status_line = b''
+        emu._exec_command(b'movecursor1(1, 1)')
+        emu._exec_command(b'ascii(0, 0, 3)')
+        assert emu._screen is not None
+
+        emu._exec_command(b'enter()')
+        assert emu._screen is None
+
+        emu._screen = Screen(['cached'])
+        emu._exec_command(b'pf(3)')
+        assert emu._screen is None
+
+    emu._screen = Screen(['cached'])
+    with patch.object(emu, 'app', MagicMock()):
+        emu.connect_host('localhost', 3270, mode_3270=False)
+    assert emu._screen is None
+
+
+@pytest.mark.usefixtures('x3270_real_exec_instance')
+def test_screen_cache_not_filled_inside_batch(x3270_real_exec_instance):
+    """Leituras dentro de batch() falham sem gravar um retrato vazio."""
+    emu = x3270_real_exec_instance
+    emu.screen_cache = True
+    emu.model_dimensions = {'rows': 1, 'columns': 4}
+
+    with patch.object(emu, 'app', MagicMock()):
+        with emu.batch():
+            with pytest.raises(CommandError, match='batch'):
+                emu.get_string(1, 1, 4)
+    assert emu._screen is None
+
+    with patch('pyx3270.emulator.Command') as mock_command:
+        mock_command.return_value.data = [b'abcd']
+        mock_command.return_value.status_line = b''
+        assert emu.get_string(1, 1, 4) == 'abcd'
+
+
+@pytest.mark.usefixtures('x3270_real_exec_instance')
+def test_screen_reads_inside_batch_without_cache(x3270_real_exec_instance):
+    """Sem screen_cache, as leituras em batch() também falham."""
+    emu = x3270_real_exec_instance
+    emu.model_dimensions = {'rows': 1, 'columns': 4}
+
+    with patch.object(emu, 'app', MagicMock()), emu.batch() as batch:
+        for read in (
+            lambda: emu.get_string(1, 1, 4),
+            lambda: emu.get_string_area(1, 1, 1, 4),
+            emu.get_full_screen,
+        ):
+            with pytest.raises(CommandError, match='batch'):
+                read()
+    assert not batch.commands
+
+
+@pytest.mark.usefixtures('x3270_cmd_instance')
+def test_wait_until_blocks_on_wait_output(x3270_cmd_instance):
+    """wait_until só lê a tela novamente após Wait(Output) retornar."""
+    x3270_cmd_instance.get_string = MagicMock(
+        side_effect=['LOADING', 'LOADING', 'MENU   ']
+    )
+
+    result = x3270_cmd_instance.wait_until(
+        StringCondition(1, 1, 'MENU   '), timeout=10
+    )
+
+    assert result is True
+    EXPECTED_READS = 3
+    assert x3270_cmd_instance.get_string.call_count == EXPECTED_READS
+    assert x3270_cmd_instance._exec_command.call_args_list == [
+        call(b'wait(1, Output)'),
+        call(b'wait(1, Output)'),
+    ]
+
+
+@pytest.mark.usefixtures('x3270_cmd_instance')
+def test_wait_until_any_match(x3270_cmd_instance):
+    x3270_cmd_instance.get_string = MagicMock(return_value='ERRO')
+
+    result = x3270_cmd_instance.wait_until(
+        StringCondition(1, 1, 'MENU'),
+        StringCondition(1, 1, 'ERRO'),
+        match='any',
+    )
+
+    assert result is True
+    x3270_cmd_instance._exec_command.assert_not_called()
+
+
+@pytest.mark.usefixtures('x3270_cmd_instance')
+def test_wait_until_timeout_from_wait_output(x3270_cmd_instance):
+    """Wait timed out não gera espera extra e a condição é reavaliada."""
+    x3270_cmd_instance.get_string = MagicMock(return_value='LOADING')
+    x3270_cmd_instance._exec_command.side_effect = CommandError(
+        'Wait timed out'
+    )
+    clock = iter([0.0, 0.0, 1.0, 2.0, 3.0])
+
+    with patch('pyx3270.emulator.monotonic', lambda: next(clock)), patch(
+        'pyx3270.emulator.sleep'
+    ) as mock_sleep:
+        result = x3270_cmd_instance.wait_until(
+            StringCondition(1, 1, 'MENU'), timeout=2.5
+        )
+
+    assert result is False
+    mock_sleep.assert_called_once_with(0.5)
+    assert x3270_cmd_instance._exec_command.call_args_list == [
+        call(b'wait(1, Output)'),
+        call(b'wait(1, Output)'),
+    ]
+
+
+@pytest.mark.usefixtures('x3270_cmd_instance')
+def test_wait_until_short_timeout_never_waits_past_end(x3270_cmd_instance):
+    """Com timeout abaixo de 1 s o s3270 não recebe Wait(1, Output)."""
+    x3270_cmd_instance.get_string = MagicMock(return_value='LOADING')
+
+    TIMEOUT = 0.2
+    with patch('pyx3270.emulator.sleep') as mock_sleep:
+        result = x3270_cmd_instance.wait_until(
+            StringCondition(1, 1, 'MENU'), timeout=TIMEOUT
+        )
+
+    assert result is False
+    x3270_cmd_instance._exec_command.assert_not_called()
+    assert 0 < mock_sleep.call_args_list[0].args[0] <= TIMEOUT
+
+
+@pytest.mark.usefixtures('x3270_cmd_instance')
+def test_wait_until_fractional_slices(x3270_cmd_instance):
+    """
+    Saída que chega logo antes do Wait atrasa a leitura em no máximo uma
+    fatia curta, não o tempo limite inteiro.
+    """
+    x3270_cmd_instance.app.fractional_wait = True
+    x3270_cmd_instance.get_string = MagicMock(
+        side_effect=['LOADING', 'MENU   ']
+    )
+    # A tela mudou entre a leitura e o Wait: o Wait só vence pelo tempo.
+    x3270_cmd_instance._exec_command.side_effect = CommandError(
+        'Wait: Timed out'
+    )
+
+    result = x3270_cmd_instance.wait_until(
+        StringCondition(1, 1, 'MENU   '), timeout=30
+    )
+
+    assert result is True
+    x3270_cmd_instance._exec_command.assert_called_once_with(
+        b'wait(0.5, Output)'
+    )
+
+
+@pytest.mark.usefixtures('x3270_cmd_instance')
+def test_wait_until_backoff_fallback(x3270_cmd_instance):
+    """Se Wait(Output) falha, as verificações usam espera exponencial."""
+    x3270_cmd_instance.get_string = MagicMock(
+        side_effect=['A', 'A', 'A', 'MENU']
+    )
+    x3270_cmd_instance._exec_command.side_effect = CommandError(
+        'not connected'
+    )
+
+    with patch('pyx3270.emulator.sleep') as mock_sleep:
+        result = x3270_cmd_instance.wait_until(
+            StringCondition(1, 1, 'MENU'), timeout=30
+        )
+
+    assert result is True
+    delays = [c.args[0] for c in mock_sleep.call_args_list]
+    assert delays == [0.05, 0.1, 0.2]
+
+
+@pytest.mark.usefixtures('x3270_cmd_instance')
+def test_wait_until_limits_wait_to_stable_condition(x3270_cmd_instance):
+    x3270_cmd_instance.get_full_screen = MagicMock(return_value='tela')
+
+    with patch.object(
+        StableCondition, 'check', side_effect=[False, True]
+    ), patch.object(StableCondition, 'retry_after', return_value=0.3), patch(
+        'pyx3270.emulator.sleep'
+    ) as mock_sleep:
+        result = x3270_cmd_instance.wait_until(
+            StableCondition(duration=0.3), timeout=20
+        )
+
+    assert result is True
+    # Menos de 1 s: o s3270 não aceita Wait(0.3), então a espera é sleep.
+    x3270_cmd_instance._exec_command.assert_not_called()
+    mock_sleep.assert_called_once_with(0.3)
+
+
+@pytest.mark.usefixtures('x3270_cmd_instance')
+def test_wait_until_sleep_refreshes_cached_screen(x3270_cmd_instance):
+    """Após o sleep curto, a verificação seguinte lê a tela de novo."""
+    x3270_cmd_instance.screen_cache = True
+    x3270_cmd_instance.model_dimensions = {'rows': 1, 'columns': 7}
+    x3270_cmd_instance._exec_command.side_effect = [
+        MagicMock(data=[b'LOADING']),
+        MagicMock(data=[b'MENU   ']),
+    ]
+
+    with patch('pyx3270.emulator.sleep'):
+        result = x3270_cmd_instance.wait_until(
+            StringCondition(1, 1, 'MENU'), timeout=0.5
+        )
+
+    assert result is True
+    EXPECTED_READS = 2
+    assert x3270_cmd_instance.screen_cache_misses == EXPECTED_READS
+
+
+@pytest.mark.usefixtures('mock_subprocess_popen')
+def test_s3270_socket_app_unix(mock_subprocess_popen, mock_socket):
+    """Transporte unix: -socket, shell=False e socket /tmp/x3sck.<pid>."""
+    app = S3270SocketApp(model='2', transport='unix', timeout=3)
+
+    args, kwargs = mock_subprocess_popen.call_args
+    assert args[0][-1] == '-socket'
+    assert kwargs['shell'] is False
+    mock_socket.assert_called_with(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock = mock_socket.return_value
+    sock.connect.assert_called_once_with('/tmp/x3sck.12345')
+    sock.settimeout.assert_called_once_with(3)
+    assert app.socket_fh is sock.makefile.return_value
+
+
+@pytest.mark.usefixtures('mock_subprocess_popen')
+def test_s3270_socket_app_tcp(mock_subprocess_popen, mock_socket):
+    """Transporte tcp: -scriptport em 127.0.0.1 com TCP_NODELAY."""
+    with patch.object(Wc3270App, '_get_free_port', return_value=4000):
+        S3270SocketApp(model='2', transport='tcp')
+
+    args, _ = mock_subprocess_popen.call_args
+    assert args[0][-2:] == ['-scriptport', '127.0.0.1:4000']
+    sock = mock_socket.return_value
+    sock.connect.assert_called_once_with(('127.0.0.1', 4000))
+    sock.setsockopt.assert_called_once_with(
+        socket.IPPROTO_TCP, socket.TCP_NODELAY, 1
+    )
+
+
+def test_s3270_socket_app_invalid_transport():
+    with pytest.raises(ValueError, match='Transporte inválido'):
+        S3270SocketApp(model='2', transport='pipe')
+
+
+@pytest.mark.usefixtures('mock_subprocess_popen')
+def test_s3270_socket_app_waits_for_socket(mock_subprocess_popen, mock_socket):
+    """Tenta novamente enquanto o s3270 ainda não criou o socket."""
+    mock_subprocess_popen.return_value.poll.return_value = None
+    sock = mock_socket.return_value
+    sock.connect.side_effect = [
+        FileNotFoundError,
+        ConnectionRefusedError,
+        None,
+    ]
+    with patch('pyx3270.emulator.sleep') as mock_sleep:
+        S3270SocketApp(model='2')
+
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [0.01, 0.02]
+    assert sock.connect.call_args_list[-1] == call('/tmp/x3sck.12345')
+
+
+@pytest.mark.usefixtures('mock_subprocess_popen')
+def test_s3270_socket_app_process_died(mock_subprocess_popen, mock_socket):
+    mock_subprocess_popen.return_value.poll.return_value = 1
+    mock_socket.return_value.connect.side_effect = FileNotFoundError
+    with pytest.raises(NotConnectedException):
+        S3270SocketApp(model='2')
+
+
+@pytest.mark.usefixtures('mock_subprocess_popen')
+def test_s3270_socket_app_connect_timeout(mock_subprocess_popen, mock_socket):
+    mock_subprocess_popen.return_value.poll.return_value = None
+    mock_socket.return_value.connect.side_effect = ConnectionRefusedError
+    with patch('pyx3270.emulator.sleep'), pytest.raises(NotConnectedException):
+        S3270SocketApp(model='2', connect_timeout=0)
+
+
+@pytest.mark.usefixtures('mock_subprocess_popen')
+def test_s3270_socket_app_read_timeout(mock_socket):
+    app = S3270SocketApp(model='2')
+    app.socket_fh.readline.side_effect = socket.timeout
+    with pytest.raises(CommandTimeoutError):
+        app.readline(timeout=0.5)
+    mock_socket.return_value.settimeout.assert_called_with(0.5)
+
+
+@pytest.mark.usefixtures('mock_subprocess_popen')
+def test_s3270_socket_app_close(mock_subprocess_popen, mock_socket, tmp_path):
+    app = S3270SocketApp(model='2')
+    sock = mock_socket.return_value
+    fh = app.socket_fh
+    app.socket_path = str(tmp_path / 'x3sck.12345')
+    open(app.socket_path, 'w', encoding='utf-8').close()
+    mock_subprocess_popen.return_value.poll.return_value = None
+    mock_subprocess_popen.return_value.returncode = 0
+
+    app.close()
+
+    fh.close.assert_called_once()
+    sock.close.assert_called_once()
+    mock_subprocess_popen.return_value.terminate.assert_called_once()
+    assert not os.path.exists(app.socket_path)
+    assert app.socket is None
+
+
+def test_create_app_socket_transport(monkeypatch):
+    """X3270(transport=...) seleciona o S3270SocketApp no Linux."""
+    monkeypatch.setattr('os.name', 'posix')
+    with patch(
+        'pyx3270.emulator.S3270SocketApp', return_value=MagicMock()
+    ) as mock_app:
+        emulator = X3270(transport='unix')
+
+    mock_app.assert_called_once_with('2', 'unix')
+    assert emulator.app is mock_app.return_value
+
+
+def test_executable_app_readline_buffers_lines(stdout_pipe):
+    """Várias linhas em uma única leitura são entregues uma a uma."""
+    app = ExecutableApp(model='2')
+    os.write(stdout_pipe, b'data: a\nU F U C(h) I 4 24 80 0 0 0x0 -\nok\n')
+
+    assert app.readline(timeout=1) == b'data: a\n'
+    assert app.readline(timeout=1).startswith(b'U F U')
+    assert app.readline(timeout=1) == b'ok\n'
+
+
+def test_executable_app_readline_timeout(stdout_pipe):
+    app = ExecutableApp(model='2')
+    os.write(stdout_pipe, b'sem fim de linha')
+
+    with pytest.raises(CommandTimeoutError):
+        app.readline(timeout=0.05)
+
+    os.write(stdout_pipe, b'\n')
+    assert app.readline(timeout=1) == b'sem fim de linha\n'
+
+
+def test_executable_app_readline_eof(stdout_pipe):
+    app = ExecutableApp(model='2')
+    os.write(stdout_pipe, b'resto')
+    os.close(stdout_pipe)
+
+    assert app.readline(timeout=1) == b'resto'
+    assert not app.readline(timeout=1)
+
+
+def test_executable_app_readline_windows(mock_subprocess_popen, monkeypatch):
+    """No Windows a leitura continua bloqueante via stdout.readline."""
+    app = ExecutableApp(model='2')
+    monkeypatch.setattr('os.name', 'nt')
+    mock_stdout = mock_subprocess_popen.return_value.stdout
+    mock_stdout.readline.return_value = b'ok\n'
+
+    assert app.readline(timeout=1) == b'ok\n'
+    mock_stdout.readline.assert_called_once()
+
+
+@pytest.mark.usefixtures('mock_subprocess_popen')
+def test_executable_app_kill(mock_subprocess_popen):
+    app = ExecutableApp(model='2')
+    process = mock_subprocess_popen.return_value
+    process.poll.return_value = None
+
+    app.kill()
+
+    process.kill.assert_called_once()
+    process.wait.assert_called_once_with(timeout=1)
+
+
+def test_command_timeout_extended_by_wait():
+    app = MagicMock()
+    TIMEOUT = 5
+    WAIT_TIMEOUT = 65
+    assert Command(app, 'Enter', timeout=TIMEOUT).timeout == TIMEOUT
+    cmd = Command(app, 'Wait(60, unlock)', timeout=TIMEOUT)
+    assert cmd.timeout == WAIT_TIMEOUT
+    assert Command(app, 'Wait(Output)', timeout=TIMEOUT).timeout == TIMEOUT
+    assert Command(app, 'Wait(60, unlock)').timeout is None
+
+
+def test_command_passes_remaining_time_to_readline():
+    app = MagicMock()
+    app.readline.side_effect = [b'U F U C(h) I 4 24 80 0 0 0x0 -\n', b'ok\n']
+    TIMEOUT = 5
+    cmd = Command(app, 'Enter', timeout=TIMEOUT)
+
+    assert cmd.execute()
+    for c in app.readline.call_args_list:
+        assert 0 < c.kwargs['timeout'] <= TIMEOUT
+
+
+def test_command_propagates_timeout():
+    app = MagicMock()
+    app.readline.side_effect = CommandTimeoutError('timeout')
+    with pytest.raises(CommandTimeoutError):
+        Command(app, 'Enter', timeout=1).execute()
+
+
+@pytest.mark.usefixtures('mock_executable_app_instance')
+def test_exec_command_timeout_recycles_app(x3270_emulator_instance):
+    emu = x3270_emulator_instance
+    del emu._exec_command
+    stuck = MagicMock()
+    stuck.readline.side_effect = CommandTimeoutError('timeout')
+    fresh = MagicMock()
+    emu.app = stuck
+    emu.host, emu.port, emu.tls, emu.mode_3270 = 'host', 23, False, True
+
+    with patch.object(emu, '_create_app', return_value=fresh), patch.object(
+        emu, 'connect_host'
+    ) as connect_host:
+        with pytest.raises(CommandTimeoutError):
+            emu._exec_command('Enter')
+
+    stuck.kill.assert_called_once()
+    stuck.close.assert_called_once()
+    assert emu.app is fresh
+    connect_host.assert_called_once_with('host', 23, False, True)
+
+
+@pytest.mark.usefixtures('mock_executable_app_instance')
+def test_recycle_app_is_not_reentrant(x3270_emulator_instance):
+    emu = x3270_emulator_instance
+    emu._recycling = True
+    app = emu.app
+    emu._recycle_app()
+    assert emu.app is app
+
+
+@pytest.mark.usefixtures('mock_executable_app_instance')
+def test_deadline_overrides_command_timeout(x3270_emulator_instance):
+    emu = x3270_emulator_instance
+    emu.command_timeout = 30
+    with patch('pyx3270.emulator.Command') as command:
+        del emu._exec_command
+        with emu.deadline(2):
+            emu._exec_command('Enter')
+            with emu.deadline(0.5):
+                emu._exec_command('Tab')
+        emu._exec_command('Home')
+
+    timeouts = [c.kwargs['timeout'] for c in command.call_args_list]
+    assert timeouts == [2, 0.5, 30]
+
+
+@pytest.mark.usefixtures('x3270_real_exec_instance')
+def test_exec_command_retry_policy_backoff(x3270_real_exec_instance):
+    """As esperas seguem a RetryPolicy e o custo vai para retry_stats."""
+    emu = x3270_real_exec_instance
+    emu.time_unlock = 0
+    emu.retry_policy = RetryPolicy(
+        max_attempts=4, base_delay=0.1, multiplier=3, jitter=0
+    )
+
+    with patch('pyx3270.emulator.Command') as mock_command, patch(
+        'pyx3270.emulator.sleep'
+    ) as mock_sleep, patch.object(emu, 'reset'), patch.object(
+        emu, 'wait'
+    ), patch.object(emu, 'tab'):
+        mock_command.return_value.status_line = STATUS_LINE
+        mock_command.return_value.execute.side_effect = [
+            KeyboardStateError,
+            KeyboardStateError,
+            True,
+        ]
+        emu._exec_command('Enter')
+
+    delays = [c.args[0] for c in mock_sleep.call_args_list]
+    assert delays == pytest.approx([0.1, 0.3])
+    stats = emu.retry_stats.as_dict()
+    RETRIES = 2
+    assert stats['retries'] == RETRIES
+    assert stats['recovered'] == 1
+    assert stats['exhausted'] == 0
+    assert stats['backoff_time'] == pytest.approx(0.4)
+
+
+@pytest.mark.usefixtures('x3270_real_exec_instance')
+def test_exec_command_not_retryable(x3270_real_exec_instance):
+    emu = x3270_real_exec_instance
+    emu.retry_policy = NO_RETRY
+
+    with patch('pyx3270.emulator.Command') as mock_command, patch(
+        'pyx3270.emulator.sleep'
+    ) as mock_sleep:
+        mock_command.return_value.execute.side_effect = KeyboardStateError
+        with pytest.raises(CommandError):
+            emu._exec_command('Enter')
+        mock_command.return_value.execute.side_effect = CommandError('x')
+        with pytest.raises(CommandError, match='x'):
+            emu._exec_command('Enter')
+
+    mock_sleep.assert_not_called()
+    assert emu.retry_stats.exhausted == 1
+    emu.reset_retry_stats()
+    assert emu.retry_stats.as_dict()['retried_commands'] == 0
+
+
+def test_command_handle_result_does_not_sleep(mock_executable_app):
+    cmd = Command(mock_executable_app, 'Test')
+    with patch('pyx3270.emulator.sleep') as mock_sleep, pytest.raises(
+        CommandError
+    ):
+        cmd.handle_result('error')
+    mock_sleep.assert_not_called()
+
+
+STATUS_LINE = b'U F U C(host) I 4 24 80 0 0 0x0 0.250'
+
+
+def test_status_host_time():
+    HOST_TIME = 0.25
+    assert Status(STATUS_LINE).host_time == HOST_TIME
+    assert Status(b'U F U C(host) I 4 24 80 0 0 0x0 -').host_time is None
+    assert Status(b'A B').host_time is None
+
+
+@pytest.mark.usefixtures('x3270_real_exec_instance')
+def test_exec_command_records_metrics(x3270_real_exec_instance):
+    emu = x3270_real_exec_instance
+    emu.time_unlock = 0
+    emu.retry_policy = RetryPolicy(max_attempts=2, jitter=0)
+
+    with patch('pyx3270.emulator.Command') as mock_command, patch(
+        'pyx3270.emulator.sleep'
+    ), patch.object(emu, 'reset'), patch.object(emu, 'wait'), patch.object(
+        emu, 'tab'
+    ), patch(
+        'pyx3270.emulator.perf_counter', side_effect=[0.0, 1.0, 2.0, 3.0, 3.5]
+    ):
+        mock_command.return_value.status_line = STATUS_LINE
+        mock_command.return_value.execute.side_effect = [
+            True,
+            KeyboardStateError,
+            True,
+        ]
+        emu._exec_command('Enter')
+        emu._exec_command('PF(3)')
+
+    metrics = emu.get_metrics()
+    enter = metrics['actions']['enter']
+    pf = metrics['actions']['pf']
+    assert enter['wall']['count'] == 1
+    assert enter['wall']['max'] == 1.0
+    assert enter['host']['max'] == pytest.approx(0.25)
+    assert enter['overhead']['max'] == pytest.approx(0.75)
+    assert pf['keyboard_errors'] == 1
+    assert pf['retries'] == 1
+    assert pf['wall']['count'] == 1
+    assert metrics['retries']['retries'] == 1
+
+    emu.reset_metrics()
+    assert emu.get_metrics()['actions'] == {}
+    assert emu.get_metrics()['retries']['retries'] == 0
+
+
+@pytest.mark.usefixtures('x3270_real_exec_instance')
+def test_exec_command_metrics_disabled(x3270_real_exec_instance):
+    emu = x3270_real_exec_instance
+    emu.metrics.enabled = False
+    with patch('pyx3270.emulator.Command') as mock_command:
+        mock_command.return_value.status_line = STATUS_LINE
+        emu._exec_command('Enter')
+    assert emu.get_metrics()['actions'] == {}
+
+
+def test_batch_records_metrics(mock_executable_app_instance):
+    app = mock_executable_app_instance
+    app.readline = MagicMock(side_effect=[STATUS_LINE + b'\n', b'ok\n'] * 2)
+    with patch.object(X3270, '_create_app', return_value=app):
+        emu = X3270()
+    with emu.batch():
+        emu.home()
+        emu.tab()
+
+    actions = emu.get_metrics()['actions']
+    assert actions['batch']['wall']['count'] == 1
+    assert actions['home']['host']['count'] == 1
+    assert actions['tab']['wall']['count'] == 0
@@ -6,6 +6,7 @@ from pyx3270.exceptions import (
     FieldTruncateError,
     KeyboardStateError,
     NotConnectedException,
+    PoolTimeoutError,
     TerminatedError,
 )
 
@@ -40,3 +41,8 @@ def test_not_connected_exception():
         NotConnectedException, match='Test NotConnectedException'
     ):
         raise NotConnectedException('Test NotConnectedException')
+
+
+def test_pool_timeout_error():
+    with pytest.raises(PoolTimeoutError, match='Test PoolTimeoutError'):
+        raise PoolTimeoutError('Test PoolTimeoutError')
@@ -0,0 +1,98 @@
+import logging
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pyx3270 import logging_config
+from pyx3270.emulator import Command
+from pyx3270.logging_config import TRACE, TraceSampler, configure_logging
+
+
+@pytest.fixture
+def reset_configured_level():
+    logging_config._configured['level'] = None
+    yield
+    logging_config._configured['level'] = None
+
+
+@pytest.mark.usefixtures('reset_configured_level')
+def test_configure_logging_sets_emulator_level():
+    with patch('logging.config.dictConfig') as dict_config:
+        configure_logging('info')
+
+    config = dict_config.call_args.args[0]
+    assert config['loggers']['pyx3270.emulator']['level'] == logging.INFO
+    # A configuração compartilhada não é alterada.
+    emulator = logging_config.LOGGING_CONFIG['loggers']['pyx3270.emulator']
+    assert emulator['level'] == 'DEBUG'
+
+
+@pytest.mark.usefixtures('reset_configured_level')
+def test_configure_logging_is_idempotent():
+    with patch('logging.config.dictConfig') as dict_config:
+        configure_logging(logging.DEBUG)
+        configure_logging('DEBUG')
+        configure_logging('TRACE')
+
+    levels = [
+        c.args[0]['loggers']['pyx3270.emulator']['level']
+        for c in dict_config.call_args_list
+    ]
+    assert levels == [logging.DEBUG, TRACE]
+
+
+@pytest.mark.usefixtures('reset_configured_level')
+def test_configure_logging_trace_every():
+    every = logging_config.command_trace.every
+    TRACE_EVERY = 10
+    try:
+        with patch('logging.config.dictConfig'):
+            configure_logging('TRACE', trace_every=TRACE_EVERY)
+        assert logging_config.command_trace.every == TRACE_EVERY
+    finally:
+        logging_config.command_trace.every = every
+
+
+def test_trace_sampler_disabled_below_trace():
+    logger = MagicMock()
+    logger.isEnabledFor.return_value = False
+    sampler = TraceSampler(logger)
+    assert not any(sampler.sample() for _ in range(5))
+
+
+def test_trace_sampler_samples_one_in_n():
+    logger = MagicMock()
+    logger.isEnabledFor.return_value = True
+    sampler = TraceSampler(logger, every=3)
+    assert [sampler.sample() for _ in range(6)] == [
+        False,
+        False,
+        True,
+        False,
+        False,
+        True,
+    ]
+
+
+def test_command_io_logged_in_trace(caplog):
+    app = MagicMock()
+    app.readline.side_effect = [b'data: abc\n', b'U F U\n', b'ok\n']
+    with caplog.at_level(TRACE, logger='pyx3270.emulator'):
+        Command(app, 'Ascii()').execute()
+
+    trace = [r.getMessage() for r in caplog.records if r.levelno == TRACE]
+    assert trace == [
+        "> b'Ascii()'",
+        "< b'data: abc\\n'",
+        "< b'U F U\\n'",
+        "< b'ok'",
+    ]
+
+
+def test_command_io_not_logged_at_debug(caplog):
+    app = MagicMock()
+    app.readline.side_effect = [b'U F U\n', b'ok\n']
+    with caplog.at_level(logging.DEBUG, logger='pyx3270.emulator'):
+        Command(app, 'Enter').execute()
+
+    assert not [r for r in caplog.records if r.levelno == TRACE]
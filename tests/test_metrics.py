@@ -0,0 +1,62 @@
+import pytest
+
+from pyx3270.metrics import NUM_BUCKETS, CommandMetrics, Histogram
+
+
+def test_histogram_buckets_are_powers_of_two():
+    COUNT = 3
+    hist = Histogram()
+    hist.record(0.0000005)  # < 1µs
+    hist.record(0.000003)  # 3µs -> [2, 4)
+    hist.record(0.001)  # 1000µs -> [512, 1024)
+    assert hist.buckets[0] == 1
+    assert hist.buckets[2] == 1
+    assert hist.buckets[10] == 1
+    assert hist.count == COUNT
+
+
+def test_histogram_huge_value_goes_to_last_bucket():
+    hist = Histogram()
+    hist.record(10**6)
+    assert hist.buckets[NUM_BUCKETS - 1] == 1
+
+
+def test_histogram_percentiles():
+    hist = Histogram()
+    for _ in range(99):
+        hist.record(0.001)
+    hist.record(0.5)
+    assert hist.percentile(50) == pytest.approx(1024 / 1_000_000)
+    assert hist.percentile(99) == pytest.approx(1024 / 1_000_000)
+    assert hist.percentile(100) == pytest.approx(0.5)
+
+
+def test_histogram_as_dict_empty():
+    data = Histogram().as_dict()
+    assert data['count'] == 0
+    assert data['min'] == 0.0
+    assert data['mean'] == 0.0
+    assert data['buckets'] == {}
+
+
+def test_command_metrics_record_and_reset():
+    metrics = CommandMetrics()
+    metrics.record('enter', 0.3, 0.1)
+    metrics.record('ascii', 0.01)
+    metrics.count('enter', 'keyboard_errors')
+
+    data = metrics.as_dict()
+    assert list(data) == ['ascii', 'enter']
+    assert data['enter']['overhead']['max'] == pytest.approx(0.2)
+    assert data['enter']['keyboard_errors'] == 1
+    assert data['ascii']['host']['count'] == 0
+
+    metrics.reset()
+    assert metrics.as_dict() == {}
+
+
+def test_command_metrics_disabled():
+    metrics = CommandMetrics(enabled=False)
+    metrics.record('enter', 0.3)
+    metrics.count('enter', 'retries')
+    assert metrics.as_dict() == {}
@@ -0,0 +1,305 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from pyx3270 import tn3270
+from pyx3270.aio import AsyncX3270
+from pyx3270.datastream import DataStreamDecoder, encode_address
+from pyx3270.emulator import X3270, Status
+from pyx3270.exceptions import CommandError
+from pyx3270.native import (
+    NativeApp,
+    Tn3270Session,
+    parse_host,
+    split_args,
+)
+
+EOR = tn3270.IAC + tn3270.TN_EOR
+WCC = b'\xc3'  # reset MDT + keyboard restore
+INPUT_START = 10
+
+
+def ebcdic(text: str) -> bytes:
+    return text.encode('cp037')
+
+
+def sba(address: int) -> bytes:
+    return tn3270.SBA + encode_address(address)
+
+
+# USUARIO: [campo de entrada 10..29]; cursor no campo.
+LOGIN = (
+    tn3270.EW
+    + WCC
+    + sba(0)
+    + tn3270.SF
+    + b'\x60'
+    + ebcdic('USUARIO:')
+    + tn3270.SF
+    + b'\x40'
+    + sba(30)
+    + tn3270.SF
+    + b'\x60'
+    + sba(10)
+    + tn3270.IC
+    + EOR
+)
+WELCOME = tn3270.EW + WCC + sba(80) + ebcdic('BEM-VINDO') + EOR
+NEGOTIATION = (
+    tn3270.IAC
+    + tn3270.DO
+    + tn3270.options['TTYPE']
+    + tn3270.IAC
+    + tn3270.SB
+    + tn3270.options['TTYPE']
+    + tn3270.SEND
+    + tn3270.IAC
+    + tn3270.SE
+    + tn3270.IAC
+    + tn3270.DO
+    + tn3270.options['EOR']
+    + tn3270.IAC
+    + tn3270.WILL
+    + tn3270.options['EOR']
+    + tn3270.IAC
+    + tn3270.DO
+    + tn3270.options['BINARY']
+    + tn3270.IAC
+    + tn3270.WILL
+    + tn3270.options['BINARY']
+)
+
+
+class HostRecorder(DataStreamDecoder):
+    """Separa o que o terminal envia: registros e subnegociações."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records = []
+        self.subnegotiations = []
+
+    def apply(self, record: bytes) -> None:
+        self.records.append(record)
+
+    def on_subnegotiation(self, payload: bytes) -> None:
+        self.subnegotiations.append(payload)
+
+
+class FakeHost:
+    """Host TN3270 mínimo: negocia, envia LOGIN e responde com WELCOME."""
+
+    def __init__(self) -> None:
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.port = self.server.getsockname()[1]
+        self.recorder = HostRecorder()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self) -> None:
+        conn, _ = self.server.accept()
+        with conn:
+            conn.sendall(NEGOTIATION + LOGIN)
+            while True:
+                data = conn.recv(4096)
+                if not data:
+                    break
+                if self.recorder.feed(data):
+                    conn.sendall(WELCOME)
+
+    def close(self) -> None:
+        self.server.close()
+
+
+@pytest.fixture
+def host():
+    fake = FakeHost()
+    yield fake
+    fake.close()
+
+
+def connected_session() -> Tn3270Session:
+    session = Tn3270Session()
+    session.connection_made('host', 23, False)
+    session.receive(LOGIN)
+    return session
+
+
+def run(session: Tn3270Session, line: str) -> list[bytes]:
+    """Executa uma ação sem E/S: todo pedido recebe ``None``."""
+    action = session.execute(line)
+    try:
+        while True:
+            action.send(None)
+    except StopIteration as stop:
+        return stop.value
+
+
+def test_split_args_and_parse_host():
+    assert split_args(None) == []
+    assert split_args('60, unlock') == ['60', 'unlock']
+    assert split_args('"a, b", \'c\'') == ['a, b', 'c']
+    assert parse_host('L:Y:host.com:992') == ('host.com', 992, True, False)
+    assert parse_host('lu@host') == ('host', 23, False, True)
+    assert parse_host('[::1]:3270') == ('::1', 3270, False, True)
+
+
+def test_session_negotiates_terminal_type():
+    session = Tn3270Session(model='4', rows=43, cols=80)
+    session.connection_made('host', 23, False)
+    session.receive(NEGOTIATION)
+    recorder = HostRecorder()
+    recorder.feed(bytes(session.outbox))
+    assert recorder.subnegotiations == [
+        tn3270.options['TTYPE'] + tn3270.IS + b'IBM-3279-4-E'
+    ]
+    assert session.mode_3270
+
+
+def test_session_rejects_tn3270e():
+    session = Tn3270Session()
+    session.receive(tn3270.IAC + tn3270.DO + tn3270.options['TN3270E'])
+    assert session.outbox == (
+        tn3270.IAC + tn3270.WONT + tn3270.options['TN3270E']
+    )
+
+
+def test_session_status_line():
+    session = connected_session()
+    status = Status(run(session, 'Query(ConnectionState)')[-2].rstrip())
+    assert status.keyboard == b'U'
+    assert status.screen_format == b'F'
+    assert status.field_protection == b'U'
+    assert status.connection_state == b'C(host)'
+    assert status.emulator_mode == b'I'
+    assert (status.cursor_row, status.cursor_col) == (b'0', b'10')
+
+
+def test_session_ascii_variants():
+    session = connected_session()
+    assert run(session, 'Ascii(0, 1, 8)')[0] == b'data: USUARIO:\n'
+    assert run(session, 'Ascii1(1, 2, 8)')[0] == b'data: USUARIO:\n'
+    ROWS = 24
+    assert len(run(session, 'Ascii()')) == ROWS + 2
+    lines = run(session, 'Ascii(0, 78, 4)')
+    assert lines[:2] == [b'data:   \n', b'data:   \n']
+    assert run(session, 'Ascii(99, 0, 1)')[-1] == b'error\n'
+
+
+def test_session_string_and_enter_send_modified_fields():
+    session = connected_session()
+    run(session, 'String("joao")')
+    assert run(session, 'Ascii(0, 10, 4)')[0] == b'data: joao\n'
+    run(session, 'Enter')
+    assert session.locked
+    record = bytes(session.outbox)
+    assert record == (
+        tn3270.ENTER + encode_address(14) + sba(10) + ebcdic('joao') + EOR
+    )
+
+
+def test_session_typing_in_protected_field_fails():
+    session = connected_session()
+    run(session, 'MoveCursor(0, 2)')
+    response = run(session, 'String("x")')
+    assert response[0] == b'data: Keyboard locked\n'
+    assert response[-1] == b'error\n'
+    assert Status(response[-2].rstrip()).keyboard == b'E'
+    run(session, 'Reset')
+    assert not session.error
+
+
+def test_session_field_editing():
+    session = connected_session()
+    run(session, 'String("abcdef")')
+    run(session, 'MoveCursor(0, 12)')
+    run(session, 'Delete')
+    assert run(session, 'Ascii(0, 10, 5)')[0] == b'data: abdef\n'
+    run(session, 'EraseEOF')
+    assert run(session, 'Ascii(0, 10, 5)')[0] == b'data: ab   \n'
+    run(session, 'DeleteField')
+    assert run(session, 'Ascii(0, 10, 2)')[0] == b'data:   \n'
+    assert session.ps.cursor == INPUT_START
+
+
+def test_session_tab_home_and_unknown_action():
+    session = connected_session()
+    run(session, 'MoveCursor(5, 0)')
+    run(session, 'Home')
+    assert session.ps.cursor == INPUT_START
+    run(session, 'MoveCursor(0, 0)')
+    run(session, 'Tab')
+    assert session.ps.cursor == INPUT_START
+    response = run(session, 'Nope()')
+    assert response[0] == b'data: Unknown action: Nope\n'
+
+
+def test_session_answers_read_modified():
+    session = connected_session()
+    run(session, 'String("x")')
+    session.receive(tn3270.SNA_RM + EOR)
+    assert bytes(session.outbox).startswith(
+        bytes([tn3270.NO_AID]) + encode_address(11) + sba(10)
+    )
+
+
+def test_session_wait_output_counts_output_since_last_command():
+    """Saída aplicada antes do Wait (por _poll) já o satisfaz."""
+    session = connected_session()
+    run(session, 'Ascii()')
+    session.receive(WELCOME)
+
+    request = next(session.execute('Wait(1, Output)'))
+    assert request.predicate()
+
+    run(session, 'Ascii()')
+    request = next(session.execute('Wait(1, Output)'))
+    assert not request.predicate()
+
+
+def test_native_app_connection_refused():
+    app = NativeApp(connect_timeout=1)
+    closed = socket.create_server(('127.0.0.1', 0))
+    port = closed.getsockname()[1]
+    closed.close()
+    app.write(f'Connect(127.0.0.1:{port})\n'.encode())
+    lines = [app.readline() for _ in range(3)]
+    assert lines[0].startswith(b'data: Connection failed')
+    assert lines[-1] == b'error\n'
+    assert app.readline() == b''
+
+
+def test_x3270_native_transport(host):
+    em = X3270(transport='native')
+    assert isinstance(em.app, NativeApp)
+    em.connect_host('127.0.0.1', host.port, tls=False)
+    assert em.is_connected()
+    assert em.get_string(1, 2, 8) == 'USUARIO:'
+
+    em.send_string('joao')
+    em.send_enter()
+    assert em.get_string(2, 1, 9) == 'BEM-VINDO'
+    assert host.recorder.records[0].endswith(sba(10) + ebcdic('joao'))
+    assert host.recorder.subnegotiations == [
+        tn3270.options['TTYPE'] + tn3270.IS + b'IBM-3279-2-E'
+    ]
+
+    with pytest.raises(CommandError, match='Timed out'):
+        em.wait(0.05, 'output')
+    em.terminate()
+    assert not em.app.session.connected
+
+
+def test_async_x3270_native_transport(host):
+    async def run_session():
+        async with AsyncX3270(transport='native') as em:
+            await em.connect_host('127.0.0.1', host.port, tls=False)
+            assert await em.is_connected()
+            assert await em.get_string(1, 2, 8) == 'USUARIO:'
+            await em.send_string('maria')
+            await em.send_enter()
+            return await em.get_string(2, 1, 9)
+
+    assert asyncio.run(run_session()) == 'BEM-VINDO'
+    assert host.recorder.records[0].endswith(sba(10) + ebcdic('maria'))
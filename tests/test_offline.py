@@ -1,9 +1,11 @@
 import gc
+import socket
 import subprocess
 import sys
 import weakref
 from unittest.mock import MagicMock, patch
 
+from pyx3270.exceptions import ControlError
 from pyx3270.offline import PyX3270Manager
 
 
@@ -25,12 +27,16 @@ def test_pyx3270_manager_init_and_terminate(mock_popen, x3270_cmd_instance):
             './screens',
             '--no-tls',
             '--no-emulator',
+            '--port',
+            '3270',
+            '--control',
+            manager.control,
         ],
         stdin=subprocess.PIPE,
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
         text=True,
-        bufsize=0
+        bufsize=0,
     )
     assert manager.process == mock_process
 
@@ -40,25 +46,95 @@ def test_pyx3270_manager_init_and_terminate(mock_popen, x3270_cmd_instance):
     mock_process.wait.assert_called_once_with(timeout=5)
 
 
+def status(screen: int | None, version: int = 1) -> dict:
+    sessions = (
+        []
+        if screen is None
+        else [{'screen': screen, 'clear': False, 'version': version}]
+    )
+    return {'ok': True, 'screens': 3, 'sessions': sessions}
+
+
 @patch('subprocess.Popen')
+@patch('pyx3270.offline.ControlClient')
 @patch('pyx3270.offline.logger')
-def test_pyx3270_manager_exec(mock_logger, mock_popen, x3270_cmd_instance):
-    mock_process = MagicMock()
-    mock_popen.return_value = mock_process
-    mock_process.poll.return_value = None  # Processo em execução
+def test_pyx3270_manager_exec(
+    mock_logger, mock_client_class, mock_popen, x3270_cmd_instance
+):
+    mock_popen.return_value.poll.return_value = None  # Processo em execução
+    client = mock_client_class.return_value
+    client.send.side_effect = [status(1), status(2, version=2)]
 
     manager = PyX3270Manager(x3270_cmd_instance)
     manager.emu = MagicMock()  # Mock atributos de emu
 
-    command = 'test_command'
-    manager._exec(command)
+    command = 'next'
+    assert manager._exec(command) == status(2, version=2)
 
     mock_logger.info.assert_called_with(
         f'[+] Enviando comando offline: {command}'
     )
-    mock_process.stdin.write.assert_called_once_with(f'{command}\n')
-    mock_process.stdin.flush.assert_called_once()
-    manager.emu.pf.assert_called_once_with(1)
+    client.send.assert_called_with(command)
+    manager.emu.wait_until.assert_called_once()
+    (condition,) = manager.emu.wait_until.call_args.args
+    assert condition.before == manager.emu.get_full_screen.return_value
+    manager.emu.pf.assert_not_called()
+
+
+@patch('subprocess.Popen')
+@patch('pyx3270.offline.ControlClient')
+def test_pyx3270_manager_exec_without_repaint_does_not_wait(
+    mock_client_class, mock_popen, x3270_cmd_instance
+):
+    """Última tela + next e set na tela atual retornam na confirmação."""
+    mock_popen.return_value.poll.return_value = None
+    client = mock_client_class.return_value
+    client.send.side_effect = [status(2), status(2), status(2)]
+
+    manager = PyX3270Manager(x3270_cmd_instance)
+    manager.emu = MagicMock()
+
+    manager.next()
+    # Nada a repintar: nem a leitura da tela antes do comando.
+    manager.emu.get_full_screen.assert_not_called()
+
+    # Mesma tela (ou tela gravada idêntica): a versão não muda.
+    assert manager.set_screen('003') is True
+    manager.emu.get_full_screen.assert_called_once()
+    manager.emu.wait_until.assert_not_called()
+
+
+@patch('subprocess.Popen')
+@patch('pyx3270.offline.ControlClient')
+@patch('pyx3270.offline.logger')
+def test_pyx3270_manager_exec_rejected(
+    mock_logger, mock_client_class, mock_popen, x3270_cmd_instance
+):
+    mock_popen.return_value.poll.return_value = None
+    client = mock_client_class.return_value
+    client.send.side_effect = [status(0), ControlError('Tela não encontrada.')]
+
+    manager = PyX3270Manager(x3270_cmd_instance)
+    manager.emu = MagicMock()
+
+    assert manager.set_screen('nada') is False
+    mock_logger.error.assert_called_once()
+    manager.emu.wait_until.assert_not_called()
+
+
+@patch('subprocess.Popen')
+@patch('pyx3270.offline.ControlClient')
+def test_pyx3270_manager_connect_gives_up_when_process_dies(
+    mock_client_class, mock_popen, x3270_cmd_instance
+):
+    mock_popen.return_value.poll.side_effect = [None, 1]
+    mock_client_class.side_effect = ConnectionRefusedError
+
+    manager = PyX3270Manager(x3270_cmd_instance)
+    manager.emu = MagicMock()
+
+    assert manager._exec('next') is None
+    assert mock_client_class.call_count == 1
 
 
 @patch('subprocess.Popen')
@@ -79,7 +155,7 @@ def test_pyx3270_manager_exec_inactive_process(
     mock_logger.info.assert_called_with(
         '[!] O processo inativo, não é possível enviar comandos.'
     )
-    mock_process.stdin.write.assert_not_called()
+    assert manager.client is None
 
 
 def test_pyx3270_manager_next(x3270_cmd_instance):
@@ -138,7 +214,7 @@ def test_pyx3270_manager_change_directory(x3270_cmd_instance):
     directory_name = 'new_directory'
     manager.change_directory(directory_name)
     manager._exec.assert_called_once_with(f'change directory {directory_name}')
-    manager.emu.pf.assert_called_once_with(1)
+    manager.emu.pf.assert_not_called()
 
 
 def test_pyX3270_manager_del(x3270_cmd_instance):
@@ -188,3 +264,67 @@ def test_terminate_kills_process_on_timeout(mock_popen, x3270_cmd_instance):
     mock_process.terminate.assert_called_once()
     mock_process.wait.assert_called_once_with(timeout=5)
     mock_process.kill.assert_called_once()
+
+
+def write_screens(directory, names):
+    directory.mkdir()
+    for name in names:
+        (directory / f'{name}.bin').write_bytes(
+            name.encode('cp037') + b'\x11' * 120
+        )
+
+
+def read_screen(terminal, size):
+    data = b''
+    while len(data) < size:
+        data += terminal.recv(size - len(data))
+    return data
+
+
+def test_pyx3270_manager_embedded_side_by_side(tmp_path):
+    NEGOTIATION = 6
+    write_screens(tmp_path / 'a', ['000', '001'])
+    write_screens(tmp_path / 'b', ['000', '001'])
+    managers = [
+        PyX3270Manager(
+            MagicMock(), str(tmp_path / name), embedded=True, port=0
+        )
+        for name in ('a', 'b')
+    ]
+    try:
+        assert managers[0].process is None
+        assert len({manager.port for manager in managers}) == len(managers)
+
+        manager = managers[0]
+        screen = (tmp_path / 'a' / '001.bin').read_bytes()
+        with socket.create_connection(('127.0.0.1', manager.port)) as term:
+            term.settimeout(5)
+            read_screen(term, NEGOTIATION + len(screen) + 2)
+
+            assert manager.set_screen('001') is True
+            assert read_screen(term, len(screen)) == screen
+            manager.emu.wait_until.assert_called_once()
+            assert manager.set_screen('zzz') is False
+    finally:
+        for manager in managers:
+            manager.terminate()
+
+    assert not managers[0].replay.running
+    managers[0].emu.terminate.assert_called_once()
+    assert managers[0]._exec('next') is None
+
+
+def test_pyx3270_manager_subprocess_reports_free_port(tmp_path):
+    write_screens(tmp_path / 'telas', ['000'])
+    managers = [
+        PyX3270Manager(MagicMock(), str(tmp_path / 'telas'), port=0)
+        for _ in range(2)
+    ]
+    try:
+        ports = [manager.port for manager in managers]
+        assert len(set(ports)) == len(managers)
+        with socket.create_connection(('127.0.0.1', ports[0]), timeout=5):
+            pass
+    finally:
+        for manager in managers:
+            manager.terminate()
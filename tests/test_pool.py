@@ -0,0 +1,185 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pyx3270.exceptions import PoolTimeoutError
+from pyx3270.pool import X3270Pool, session_factory
+
+
+def make_session():
+    em = MagicMock()
+    em.is_terminated = False
+    em.is_connected.return_value = True
+    return em
+
+
+@pytest.fixture
+def factory():
+    return MagicMock(side_effect=make_session)
+
+
+def test_pool_prewarms_sessions(factory):
+    SIZE = 3
+    pool = X3270Pool(
+        factory,
+        size=SIZE,
+    )
+
+    assert factory.call_count == SIZE
+    stats = pool.stats()
+    assert stats['idle'] == SIZE
+    assert stats['in_use'] == 0
+    assert stats['created'] == SIZE
+
+
+def test_pool_lazy_creation(factory):
+    pool = X3270Pool(factory, size=2, prewarm=False)
+    factory.assert_not_called()
+
+    with pool.session() as em:
+        assert pool.stats()['in_use'] == 1
+    factory.assert_called_once()
+    em.clear_screen.assert_called_once()
+    assert pool.stats()['idle'] == 1
+
+
+def test_session_factory_connects():
+    factory = session_factory('mainframe', 992, model='3')
+    with patch('pyx3270.pool.X3270') as mock_x3270:
+        X3270Pool(factory, size=1)
+
+    mock_x3270.assert_called_once_with(model='3')
+    mock_x3270.return_value.connect_host.assert_called_once_with(
+        'mainframe', 992, True, True
+    )
+
+
+def test_pool_checkin_resets_and_reuses(factory):
+    on_checkin = MagicMock()
+    pool = X3270Pool(factory, size=1, on_checkin=on_checkin)
+
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        pass
+
+    assert first is second
+    EXPECTED_RESETS = 2
+    assert on_checkin.call_count == EXPECTED_RESETS
+    assert pool.stats()['checkouts'] == EXPECTED_RESETS
+
+
+def test_pool_recycles_unhealthy_session(factory):
+    pool = X3270Pool(factory, size=1)
+
+    with pool.session() as em:
+        em.is_connected.return_value = False
+
+    em.terminate.assert_called_once()
+    stats = pool.stats()
+    assert stats['recycled'] == 1
+    assert stats['idle'] == 0
+    with pool.session() as replacement:
+        assert replacement is not em
+
+
+def test_pool_release_does_not_replace_in_caller(factory):
+    """O descarte só libera a vaga; a nova sessão nasce no acquire."""
+    pool = X3270Pool(factory, size=1)
+
+    with pool.session() as em:
+        em.is_connected.return_value = False
+
+    factory.assert_called_once()
+    assert pool.stats()['total'] == 0
+    with pool.session() as replacement:
+        assert replacement is not em
+    EXPECTED_CREATED = 2
+    assert factory.call_count == EXPECTED_CREATED
+
+
+def test_pool_double_release_is_ignored(factory):
+    SIZE = 2
+    pool = X3270Pool(factory, size=SIZE)
+    em = pool.acquire()
+
+    pool.release(em)
+    pool.release(em)
+    assert pool.stats()['idle'] == SIZE
+    pool.release(em, healthy=False)
+    assert pool.stats()['total'] == SIZE
+    em.terminate.assert_not_called()
+
+
+def test_pool_recycles_when_reset_fails(factory):
+    on_checkin = MagicMock(side_effect=RuntimeError('tela travada'))
+    pool = X3270Pool(factory, size=1, on_checkin=on_checkin)
+
+    with pool.session() as em:
+        pass
+
+    em.terminate.assert_called_once()
+    assert pool.stats()['recycled'] == 1
+
+
+def test_pool_recycles_after_max_uses(factory):
+    pool = X3270Pool(factory, size=1, max_uses=2)
+
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        pass
+    with pool.session() as third:
+        pass
+
+    assert first is second
+    assert third is not first
+    first.terminate.assert_called_once()
+
+
+def test_pool_timeout_when_exhausted(factory):
+    pool = X3270Pool(factory, size=1)
+
+    with pool.session():
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire(timeout=0.01)
+
+
+def test_pool_waits_for_release(factory):
+    pool = X3270Pool(factory, size=1)
+    em = pool.acquire()
+    released = threading.Timer(0.05, pool.release, args=(em,))
+    released.start()
+
+    assert pool.acquire(timeout=5) is em
+    released.join()
+    stats = pool.stats()
+    assert stats['wait_time_max'] > 0
+    assert stats['wait_time_avg'] > 0
+    assert 0 < stats['utilisation'] <= 1
+
+
+def test_pool_factory_failure_frees_slot():
+    factory = MagicMock(side_effect=[RuntimeError('sem rede'), make_session()])
+    pool = X3270Pool(factory, size=1, prewarm=False)
+
+    with pytest.raises(RuntimeError, match='sem rede'):
+        pool.acquire()
+    assert pool.stats()['total'] == 0
+    assert pool.acquire() is not None
+
+
+def test_pool_close(factory):
+    with X3270Pool(
+        factory,
+        size=2,
+    ) as pool:
+        em = pool.acquire()
+
+    assert pool.stats()['idle'] == 0
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(em)
+    em.terminate.assert_called_once()
+    assert pool.stats()['total'] == 0
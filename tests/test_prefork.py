@@ -0,0 +1,65 @@
+import os
+import signal
+import socket
+import threading
+from time import monotonic, sleep
+
+import pytest
+
+from pyx3270 import tn3270
+from pyx3270.prefork import PreforkReplay, supports_prefork
+
+pytestmark = pytest.mark.skipif(
+    not supports_prefork(), reason='prefork requer POSIX'
+)
+
+# O fixture no_os_exit troca os._exit; os workers precisam do original.
+REAL_EXIT = os._exit
+SCREENS = {
+    'A': tn3270.EW + b'\xc3' + b'A' * 150 + tn3270.IAC + tn3270.TN_EOR,
+}
+NEGOTIATION = b'\xff\xfd\x18\xff\xfb\x18'
+
+
+def first_screen(port: int) -> bytes:
+    size = len(NEGOTIATION) + len(SCREENS['A'])
+    data = b''
+    with socket.create_connection(('127.0.0.1', port), timeout=5) as term:
+        while len(data) < size:
+            data += term.recv(size - len(data))
+    return data
+
+
+def wait_until(predicate, timeout: float = 5) -> bool:
+    deadline = monotonic() + timeout
+    while not predicate():
+        if monotonic() > deadline:
+            return False
+        sleep(0.01)
+    return True
+
+
+def test_prefork_serves_and_restarts_workers(monkeypatch):
+    WORKERS = 2
+    monkeypatch.setattr(os, '_exit', REAL_EXIT)
+    replay = PreforkReplay(SCREENS, '.', WORKERS)
+    port = replay.bind(0, '127.0.0.1')
+    replay.start()
+    supervisor = threading.Thread(target=replay.supervise)
+    supervisor.start()
+    try:
+        assert len(replay.pids) == WORKERS
+        for _ in range(10):
+            assert first_screen(port) == NEGOTIATION + SCREENS['A']
+
+        dead = next(iter(replay.pids))
+        os.kill(dead, signal.SIGKILL)
+        assert wait_until(lambda: replay.restarts == 1)
+        assert wait_until(lambda: len(replay.pids) == WORKERS)
+        assert dead not in replay.pids
+        assert first_screen(port) == NEGOTIATION + SCREENS['A']
+    finally:
+        replay.stop()
+        supervisor.join(timeout=5)
+        replay.close()
+    assert not replay.pids
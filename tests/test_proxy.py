@@ -0,0 +1,164 @@
+import socket
+import threading
+from time import monotonic, sleep
+from unittest.mock import patch
+
+import pytest
+
+from pyx3270 import tn3270
+from pyx3270.proxy import RecordProxy
+from pyx3270.server import PROXY_BUFFER_SIZE
+
+EOR = tn3270.IAC + tn3270.TN_EOR
+SCREEN = tn3270.START_SCREEN + 'TELA DE TESTE'.encode('cp037') * 10 + EOR
+
+
+class FakeHost:
+    """Host que envia ``payload`` a cada conexão e ecoa o que recebe."""
+
+    def __init__(self, payload: bytes = SCREEN, close: bool = False) -> None:
+        self.payload = payload
+        self.close_after_send = close
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.address = f'127.0.0.1:{self.server.getsockname()[1]}'
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(
+                target=self._talk, args=(conn,), daemon=True
+            ).start()
+
+    def _talk(self, conn: socket.socket) -> None:
+        with conn:
+            conn.sendall(self.payload)
+            if self.close_after_send:
+                return
+            while data := conn.recv(4096):
+                conn.sendall(data)
+
+    def close(self) -> None:
+        self.server.close()
+
+
+def start_proxy(proxy: RecordProxy) -> tuple[int, threading.Thread]:
+    port = proxy.listen(0, '127.0.0.1')
+    thread = threading.Thread(target=proxy.serve_forever, daemon=True)
+    thread.start()
+    return port, thread
+
+
+def stop_proxy(proxy: RecordProxy, thread: threading.Thread) -> None:
+    proxy.stop()
+    thread.join(timeout=5)
+    proxy.close()
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return bytes(data)
+
+
+def wait_until(predicate, timeout: float = 5) -> bool:
+    deadline = monotonic() + timeout
+    while not predicate():
+        if monotonic() > deadline:
+            return False
+        sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def host():
+    fake = FakeHost()
+    yield fake
+    fake.close()
+
+
+def test_proxy_multiplexes_sessions_and_records_each(host, tmp_path):
+    SESSIONS = 3
+    proxy = RecordProxy(host.address, str(tmp_path))
+    port, thread = start_proxy(proxy)
+    try:
+        terminals = [
+            socket.create_connection(('127.0.0.1', port))
+            for _ in range(SESSIONS)
+        ]
+        for number, terminal in enumerate(terminals):
+            assert recv_exactly(terminal, len(SCREEN)) == SCREEN
+            message = f'terminal {number}'.encode()
+            terminal.sendall(message)
+            assert recv_exactly(terminal, len(message)) == message
+        assert wait_until(lambda: len(proxy.sessions) == SESSIONS)
+        for terminal in terminals:
+            terminal.close()
+        assert wait_until(lambda: not proxy.sessions)
+    finally:
+        stop_proxy(proxy, thread)
+
+    assert (tmp_path / '000.bin').read_bytes() == SCREEN
+    assert (tmp_path / 'session-001' / '000.bin').read_bytes() == SCREEN
+    assert (tmp_path / 'session-002' / '000.bin').read_bytes() == SCREEN
+
+
+def test_proxy_resolves_host_once(host):
+    """O accept usa o endereço resolvido na criação, sem DNS no laço."""
+    proxy = RecordProxy(host.address)
+    port, thread = start_proxy(proxy)
+    try:
+        with patch('socket.getaddrinfo', side_effect=OSError('DNS')):
+            with socket.socket() as terminal:
+                terminal.connect(('127.0.0.1', port))
+                assert recv_exactly(terminal, len(SCREEN)) == SCREEN
+    finally:
+        stop_proxy(proxy, thread)
+
+
+def test_proxy_backpressure_pauses_fast_host():
+    HIGH_WATER = 64 * 1024
+    payload = b'\x40' * (8 * 1024 * 1024)
+    fast_host = FakeHost(payload, close=True)
+    proxy = RecordProxy(fast_host.address, high_water=HIGH_WATER)
+    port, thread = start_proxy(proxy)
+    try:
+        terminal = socket.socket()
+        terminal.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        terminal.connect(('127.0.0.1', port))
+        assert wait_until(
+            lambda: any(session.host.paused for session in proxy.sessions)
+        )
+        (session,) = proxy.sessions
+        assert len(session.client.outbox) <= HIGH_WATER + PROXY_BUFFER_SIZE
+
+        # O terminal volta a ler: a fila esvazia e o host é retomado.
+        assert recv_exactly(terminal, len(payload)) == payload
+        assert terminal.recv(1) == b''
+        terminal.close()
+    finally:
+        stop_proxy(proxy, thread)
+        fast_host.close()
+
+
+def test_proxy_host_unreachable_closes_terminal():
+    closed = socket.create_server(('127.0.0.1', 0))
+    address = f'127.0.0.1:{closed.getsockname()[1]}'
+    closed.close()
+    finished = []
+    proxy = RecordProxy(address, on_session_closed=finished.append)
+    port, thread = start_proxy(proxy)
+    try:
+        with socket.create_connection(('127.0.0.1', port)) as terminal:
+            terminal.settimeout(5)
+            assert terminal.recv(1) == b''
+        assert wait_until(lambda: finished)
+    finally:
+        stop_proxy(proxy, thread)
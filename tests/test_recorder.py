@@ -0,0 +1,83 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from pyx3270 import recorder, server, tn3270
+from pyx3270.recorder import RecordingWriter
+
+SCREEN = tn3270.START_SCREEN + b'\x11' * 120 + tn3270.IAC + tn3270.TN_EOR
+
+
+def test_writer_writes_in_background(tmp_path):
+    COUNT = 10
+    with RecordingWriter(batch_size=4) as writer:
+        for number in range(COUNT):
+            assert writer.submit(str(tmp_path / f'{number:03}.bin'), SCREEN)
+        writer.flush()
+        assert not writer.pending
+    for number in range(COUNT):
+        assert (tmp_path / f'{number:03}.bin').read_bytes() == SCREEN
+    assert writer.stats.written == COUNT
+    assert writer.stats.lag.count == COUNT
+    assert 'telas gravadas' in str(writer.stats)
+
+
+def test_writer_fsyncs_on_schedule(tmp_path):
+    with patch.object(recorder.os, 'fsync') as fsync:
+        with RecordingWriter(fsync_interval=0) as writer:
+            writer.submit(str(tmp_path / '000.bin'), SCREEN)
+    fsync.assert_called_once()
+    assert writer.stats.fsyncs == 1
+
+
+def test_writer_fsyncs_every_file_since_last_sync(tmp_path):
+    """Arquivos de lotes que não cruzaram o intervalo também vão ao disco."""
+    with patch.object(recorder.os, 'fsync') as fsync:
+        with RecordingWriter(fsync_interval=3600) as writer:
+            for number in range(2):
+                writer.submit(str(tmp_path / f'{number:03}.bin'), SCREEN)
+                writer.flush()
+            fsync.assert_not_called()
+    EXPECTED_FSYNCS = 2
+    assert fsync.call_count == EXPECTED_FSYNCS
+    assert writer.stats.fsyncs == 1
+
+
+def test_writer_drop_policy_never_blocks(tmp_path):
+    release = threading.Event()
+    real_write = RecordingWriter._write
+
+    def slow_write(self, batch):
+        release.wait()
+        real_write(self, batch)
+
+    with patch.object(RecordingWriter, '_write', slow_write):
+        writer = RecordingWriter(max_queue=1, policy='drop', batch_size=1)
+        results = [
+            writer.submit(str(tmp_path / f'{number:03}.bin'), SCREEN)
+            for number in range(5)
+        ]
+        release.set()
+        writer.close()
+    assert not all(results)
+    assert writer.stats.dropped == results.count(False)
+    assert writer.stats.written == results.count(True)
+
+
+def test_writer_counts_errors(tmp_path):
+    with RecordingWriter() as writer:
+        writer.submit(str(tmp_path / 'inexistente' / '000.bin'), SCREEN)
+    assert writer.stats.errors == 1
+    assert not writer.stats.written
+
+
+def test_writer_rejects_unknown_policy():
+    with pytest.raises(ValueError, match='Política'):
+        RecordingWriter(policy='ignorar')
+
+
+def test_record_data_with_writer_only_enqueues(tmp_path):
+    with RecordingWriter() as writer:
+        assert server.record_data(SCREEN, str(tmp_path), 7, writer) == 1
+    assert (tmp_path / '007.bin').read_bytes() == SCREEN
@@ -0,0 +1,63 @@
+from unittest.mock import patch
+
+import pytest
+
+from pyx3270.exceptions import CommandError, KeyboardStateError
+from pyx3270.retry import NO_RETRY, RetryPolicy, RetryStats
+
+
+def test_delay_grows_exponentially_until_max():
+    policy = RetryPolicy(base_delay=0.1, multiplier=2, max_delay=0.3)
+    delays = [policy.delay(n, jitter=False) for n in range(1, 5)]
+    assert delays == pytest.approx([0.1, 0.2, 0.3, 0.3])
+
+
+def test_delay_jitter_reduces_delay():
+    policy = RetryPolicy(base_delay=1.0, jitter=0.5)
+    with patch('pyx3270.retry.random.random', return_value=1.0):
+        assert policy.delay(1) == pytest.approx(0.5)
+    with patch('pyx3270.retry.random.random', return_value=0.0):
+        assert policy.delay(1) == pytest.approx(1.0)
+
+
+def test_should_retry_respects_max_attempts():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(1, 0)
+    assert policy.should_retry(2, 0)
+    assert not policy.should_retry(3, 0)
+    assert not NO_RETRY.should_retry(1, 0)
+
+
+def test_should_retry_respects_max_elapsed():
+    policy = RetryPolicy(
+        max_attempts=10, base_delay=0.5, jitter=0, max_elapsed=1.0
+    )
+    assert policy.should_retry(1, 0.4)
+    assert not policy.should_retry(1, 0.6)
+
+
+def test_default_predicate_only_keyboard_errors():
+    policy = RetryPolicy()
+    assert policy.is_retryable(KeyboardStateError())
+    assert not policy.is_retryable(CommandError())
+
+
+def test_custom_predicate():
+    policy = RetryPolicy(retryable=lambda e: isinstance(e, CommandError))
+    assert policy.is_retryable(CommandError())
+
+
+@pytest.mark.parametrize(
+    'kwargs', [{'max_attempts': 0}, {'jitter': 1.5}, {'jitter': -0.1}]
+)
+def test_invalid_policy(kwargs):
+    with pytest.raises(ValueError, match='deve'):
+        RetryPolicy(**kwargs)
+
+
+def test_retry_stats_as_dict():
+    RETRIES = 2
+    stats = RetryStats(retries=RETRIES, backoff_time=0.25, recovery_time=0.5)
+    data = stats.as_dict()
+    assert data['retries'] == RETRIES
+    assert data['total_time'] == pytest.approx(0.75)
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import socket
 from unittest.mock import MagicMock, Mock, call, mock_open, patch
@@ -9,6 +10,26 @@ from pyx3270.emulator import X3270
 from pyx3270.server import ReplayState, process_command
 
 _real_socket_class = socket.socket
+EOR = tn3270.IAC + tn3270.TN_EOR
+
+
+def recv_into_chunks(*chunks: bytes):
+    """side_effect de recv_into que entrega ``chunks`` e depois b''."""
+    pending = iter(chunks)
+
+    def recv_into(buffer):
+        chunk = next(pending, b'')
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+    return recv_into
+
+
+def capture_sendall(sock: MagicMock) -> list[bytes]:
+    """Copia o que é enviado: o proxy reutiliza o buffer entre leituras."""
+    sent = []
+    sock.sendall.side_effect = lambda data: sent.append(bytes(data))
+    return sent
 
 
 def test_ensure_dir_exists(monkeypatch):
@@ -160,110 +181,51 @@ def test_connect_serversock_failure(mock_create_conn):
     mock_client_sock.close.assert_called_once()
 
 
-@patch('socket.socket')
-def test_backend_3270_navigation(mock_socket_constructor):
-    """Testa a navegação básica em backend_3270."""
-    mock_clientsock = MagicMock(spec=_real_socket_class)
-    # Simula recebimento de AID e dados de tecla pressionada
-    mock_clientsock.recv.side_effect = [
-        tn3270.ENTER,
-        b'K\xe9\xff',  # Enter pressionado
-        tn3270.PF3,
-        b'K\xe9\xff',  # PF3 pressionado
-        tn3270.PF8,
-        b'K\xe9\xff',  # PF8 pressionado
-        tn3270.CLEAR,
-        b'K\xe9\xff',  # Clear pressionado
-        tn3270.PF7,
-        b'K\xe9\xff',  # PF7 pressionado (emulator=True)
-        tn3270.PF4,
-        b'K\xe9\xff',  # PF4 pressionado
-        b'\x00',  # Simula fechamento do terminal para sair do loop
-    ]
-    screens = {'s0': b's0', 's1': b's1', 's2': b's2', 's3': b's3'}
+def key(aid: bytes) -> bytes:
+    """Registro de entrada: AID, cursor e um campo modificado."""
+    return aid + b'K\xe9' + tn3270.SBA + b'\x40\xc1' + b'\xc1' + EOR
 
-    # Teste 1: ENTER
-    result = server.backend_3270(mock_clientsock, screens, 0, emulator=True)
-    assert result == {'current_screen': 1, 'clear': False}
 
-    # Teste 2: PF3
-    result = server.backend_3270(mock_clientsock, screens, 1, emulator=True)
-    assert result == {'current_screen': 0, 'clear': False}
+def test_replay_session_navigation():
+    """Navegação do replay a partir dos registros do terminal."""
+    writer = MagicMock()
+    screens = {'s0': b's0', 's1': b's1', 's2': b's2', 's3': b's3'}
+    session = server.ReplaySession(writer, screens, True)
+    state = session.state
 
-    # Teste 3: PF8
-    result = server.backend_3270(mock_clientsock, screens, 0, emulator=True)
-    assert result == {'current_screen': 1, 'clear': False}
+    session.receive(key(tn3270.ENTER))
+    assert state.current_screen == 1
+    assert state.last_record.texts == {1: 'A'}
 
-    # Teste 4: CLEAR
-    result = server.backend_3270(mock_clientsock, screens, 1, emulator=True)
-    assert result == {'current_screen': 1, 'clear': True}
-    mock_clientsock.sendall.assert_called_with(tn3270.CLEAR_SCREEN_BUFFER)
+    session.receive(key(tn3270.PF3))
+    assert state.current_screen == 0
 
-    # Teste 5: PF7 (emulator=True)
-    result = server.backend_3270(mock_clientsock, screens, 2, emulator=True)
-    assert result == {'current_screen': 1, 'clear': False}
+    session.receive(key(tn3270.PF8))
+    assert state.current_screen == 1
 
-    # Teste 6: PF4
-    result = server.backend_3270(mock_clientsock, screens, 1, emulator=True)
-    assert result == {'current_screen': 2, 'clear': False}
+    session.receive(tn3270.CLEAR + EOR)  # leitura curta: só o AID
+    assert (state.current_screen, state.clear) == (1, True)
+    assert state.last_record.cursor is None
+    writer.write.assert_called_with(tn3270.CLEAR_SCREEN_BUFFER)
 
-    # Teste 7: Fechamento do terminal
-    mock_clientsock.recv.side_effect = [b'']
-    with pytest.raises(ConnectionResetError, match='Terminal fechado.'):
-        server.backend_3270(mock_clientsock, screens, 2, emulator=True)
+    session.receive(key(tn3270.PF7))
+    assert (state.current_screen, state.clear) == (0, False)
 
-
-@patch('socket.socket')
-def test_backend_3270_timeout(mock_socket_constructor):
-    """Testa backend_3270 com timeout no recv."""
-    EXPECTED_CALLS = 3
-    mock_clientsock = MagicMock(spec=_real_socket_class)
-    mock_clientsock.recv.side_effect = [
-        socket.timeout,
-        tn3270.ENTER,
-        b'K\xe9\xff',
-    ]
-    screens = {'s0': b's0', 's1': b's1'}
-
-    result = server.backend_3270(mock_clientsock, screens, 0, emulator=False)
-    assert result == {'current_screen': 0, 'clear': False}
-    assert mock_clientsock.recv.call_count == EXPECTED_CALLS
+    session.receive(key(tn3270.PF4))
+    assert state.current_screen == 1
 
 
-@patch('pyx3270.server.backend_3270')
-def test_replay_handler(mock_backend, monkeypatch):
-    """Testa o fluxo básico de replay_handler."""
-    mock_clientsock = MagicMock(spec=_real_socket_class)
-    screens = {
-        'screen0': b'screen0',
-        'screen1': b'screen1',
-        'screen2': b'screen2',
-    }
-    screens_list = list(screens.values())
-    # Simula a sequência de interações retornada por backend_3270
-    mock_backend.side_effect = [
-        {'current_screen': 0, 'clear': False},  # Inicial
-        {'current_screen': 1, 'clear': False},  # Após interação 1
-        {'current_screen': 1, 'clear': True},  # Após interação 2 (Clear)
-        {'current_screen': 2, 'clear': False},  # Após interação 3
-        Exception('Simulate loop break'),  # Para sair do loop
-    ]
+def test_replay_session_reads_records_in_chunks():
+    """Vários registros e negociação em um bloco; a sobra fica no reader."""
+    negotiation = tn3270.IAC + tn3270.WILL + tn3270.options['TTYPE']
+    screens = {'s0': b's0', 's1': b's1'}
+    session = server.ReplaySession(MagicMock(), screens, True)
 
-    server.replay_handler(
-        mock_clientsock, screens, emulator=True, base_directory='./screens'
-    )
+    session.receive(negotiation + key(tn3270.ENTER) + key(tn3270.PF3)[:4])
+    assert session.state.current_screen == 1
 
-    # Verifica chamadas
-    mock_clientsock.sendall.assert_has_calls([
-        call(b'\xff\xfd\x18\xff\xfb\x18'),  # handshake inicial
-        call(screens_list[0]),  # inicial
-        call(screens_list[0]),  # chamada extra repetida
-        call(screens_list[1]),
-        call(screens_list[2]),
-    ])
-    EXPECTED_CALLS = 5
-    assert mock_backend.call_count == EXPECTED_CALLS  # Chamado até a exceção
-    mock_clientsock.close.assert_called_once()  # Garante que fechou no finally
+    session.receive(key(tn3270.PF3)[4:])
+    assert session.state.current_screen == 0
 
 
 def test_record_handler_basic_flow(record_mocks):
@@ -293,17 +255,19 @@ def test_record_handler_basic_flow(record_mocks):
         ConnectionResetError,  # Simula desconexão para parar o loop
     ]
 
-    # Configura recv dos sockets
-    mock_clientsock.recv.return_value = client_data
-    mock_serversock.recv.side_effect = [
+    # Configura recv_into dos sockets
+    mock_clientsock.recv_into.side_effect = recv_into_chunks(client_data)
+    mock_serversock.recv_into.side_effect = recv_into_chunks(
         server_data_screen1,
         server_data_non_screen,
         server_data_screen2,
-    ]
+    )
+    sent_to_server = capture_sendall(mock_serversock)
+    sent_to_client = capture_sendall(mock_clientsock)
 
     # Configura is_screen_tn3270
-    record_mocks.is_screen.side_effect = (
-        lambda data: tn3270.IAC + tn3270.TN_EOR in data
+    record_mocks.is_screen.side_effect = lambda data: (
+        tn3270.IAC + tn3270.TN_EOR in data
     )
 
     server.record_handler(mock_clientsock, mock_emu, 'host:3270', record_dir)
@@ -318,12 +282,12 @@ def test_record_handler_basic_flow(record_mocks):
     assert record_mocks.select.call_count == EXPECTED_CALLS
 
     # Verifica envios entre sockets
-    mock_serversock.sendall.assert_called_once_with(client_data)
-    mock_clientsock.sendall.assert_has_calls([
-        call(server_data_screen1),
-        call(server_data_non_screen),
-        call(server_data_screen2),
-    ])
+    assert sent_to_server == [client_data]
+    assert sent_to_client == [
+        server_data_screen1,
+        server_data_non_screen,
+        server_data_screen2,
+    ]
 
     # Verifica gravação dos arquivos
     # Chamado para tela 1 e tela 2
@@ -383,12 +347,10 @@ def test_record_handler_not_is_screen_tn3270():
     tn_eor = b'\xff\xef'  # IAC + TN_EOR
     fake_data = b'nao eh tn3270' + tn_eor
 
-    # recv() devolve os dados na primeira chamada e depois vazio
-    fake_server_sock.recv.side_effect = [fake_data, b'']
-    fake_client_sock.recv.side_effect = [
-        b'',
-        b'',
-    ]  # Não recebe nada do cliente
+    # recv_into() devolve os dados na primeira chamada e depois vazio
+    fake_server_sock.recv_into.side_effect = recv_into_chunks(fake_data)
+    # Não recebe nada do cliente
+    fake_client_sock.recv_into.side_effect = recv_into_chunks()
 
     # select retorna sockets prontos para leitura
     def fake_select(rlist, _, __, ___):
@@ -695,3 +657,97 @@ def test_invalid_handle_change_directory():
 
         assert screens_result == dict()
         assert screens_list == list()
+
+
+REPLAY_SCREENS = {
+    'A': tn3270.EW + b'\xc3' + b'A' * 150 + tn3270.IAC + tn3270.TN_EOR,
+    'B': tn3270.EW + b'\xc3' + b'B' * 150 + tn3270.IAC + tn3270.TN_EOR,
+}
+REPLAY_NEGOTIATION = b'\xff\xfd\x18\xff\xfb\x18'
+ENTER_RECORD = tn3270.ENTER + b'\x40\x40' + tn3270.IAC + tn3270.TN_EOR
+PF7_RECORD = tn3270.PF7 + b'\x40\x40' + tn3270.IAC + tn3270.TN_EOR
+
+
+async def open_replay_client(port: int):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    first = await reader.readexactly(
+        len(REPLAY_NEGOTIATION) + len(REPLAY_SCREENS['A'])
+    )
+    assert first == REPLAY_NEGOTIATION + REPLAY_SCREENS['A']
+    return reader, writer
+
+
+def test_replay_server_many_clients_with_own_state():
+    CLIENTS = 200
+
+    async def scenario():
+        replay = server.ReplayServer(REPLAY_SCREENS, True, '.')
+        port = await replay.start(0, '127.0.0.1')
+        clients = await asyncio.gather(
+            *(open_replay_client(port) for _ in range(CLIENTS))
+        )
+        assert len(replay.sessions) == CLIENTS
+
+        # Só os clientes pares avançam; os ímpares voltam (fica na 1ª).
+        for number, (_, writer) in enumerate(clients):
+            writer.write(PF7_RECORD if number % 2 else ENTER_RECORD)
+        screens = await asyncio.gather(
+            *(
+                reader.readexactly(len(REPLAY_SCREENS['A']))
+                for reader, _ in clients
+            )
+        )
+        for _, writer in clients:
+            writer.close()
+        replay.server.close()
+        await replay.server.wait_closed()
+        return screens
+
+    screens = asyncio.run(scenario())
+    assert screens[0::2] == [REPLAY_SCREENS['B']] * (CLIENTS // 2)
+    assert screens[1::2] == [REPLAY_SCREENS['A']] * (CLIENTS // 2)
+
+
+def test_replay_server_broadcasts_commands_and_reports_close():
+    closed = []
+
+    async def scenario():
+        replay = server.ReplayServer(
+            REPLAY_SCREENS, True, '.', on_session_closed=closed.append
+        )
+        port = await replay.start(0, '127.0.0.1')
+        clients = [await open_replay_client(port) for _ in range(2)]
+        response = replay.execute('set b')
+        screens = [
+            await reader.readexactly(len(REPLAY_SCREENS['B']))
+            for reader, _ in clients
+        ]
+        for _, writer in clients:
+            writer.close()
+        while len(closed) < len(clients):
+            await asyncio.sleep(0.01)
+        replay.server.close()
+        return response, screens
+
+    response, screens = asyncio.run(scenario())
+    assert screens == [REPLAY_SCREENS['B']] * 2
+    assert response['ok']
+    assert [session['name'] for session in response['sessions']] == ['B'] * 2
+    assert all(session.state.current_screen == 1 for session in closed)
+
+
+def test_replay_session_version_counts_display_changes():
+    """Reenviar a mesma tela (ou uma gravação idêntica) não muda a versão."""
+    screens = dict(REPLAY_SCREENS, C=REPLAY_SCREENS['B'])
+    session = server.ReplaySession(MagicMock(), screens, False)
+    versions = []
+    for screen in (0, 0, 1, 2):
+        session.state.current_screen = screen
+        session.show()
+        versions.append(session.version)
+    session.state.clear = True
+    session.show()
+
+    assert versions == [1, 1, 2, 2]
+    EXPECTED_VERSION = 3
+    assert session.version == EXPECTED_VERSION
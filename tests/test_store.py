@@ -0,0 +1,81 @@
+from pyx3270 import server, tn3270
+from pyx3270.server import ReplayState, process_command
+from pyx3270.store import ScreenList, ScreenStore, screen_list
+
+EOR = tn3270.IAC + tn3270.TN_EOR
+
+
+def make_screens(directory, names):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (directory / f'{name}.bin').write_bytes(name.encode() + b'\x11' * 120)
+
+
+def test_store_indexes_like_load_screens_and_reads_lazily(tmp_path):
+    record_dir = tmp_path / 'screens'
+    make_screens(record_dir, ['002', '000', '001'])
+    make_screens(record_dir / 'sub', ['fim'])
+
+    store = ScreenStore(str(record_dir))
+    expected = server.load_screens(str(record_dir))
+    assert list(store) == list(expected)
+    assert store.stats.screens == len(expected)
+    assert not store.stats.misses
+
+    screen = store['001']
+    assert screen == expected['001']
+    assert screen.endswith(EOR)
+    assert (store.stats.misses, store.stats.hits) == (1, 0)
+    assert store['001'] == expected['001']
+    assert (store.stats.misses, store.stats.hits) == (1, 1)
+
+
+def test_store_lru_is_bounded(tmp_path):
+    make_screens(tmp_path, ['000', '001', '002'])
+    CACHE_SIZE = 2
+    store = ScreenStore(str(tmp_path), cache_size=CACHE_SIZE)
+    for name in ['000', '001', '002', '000']:
+        store[name]
+    assert store.stats.cached == CACHE_SIZE
+    EVICTIONS, READS = 2, 4
+    assert store.stats.evictions == EVICTIONS
+    assert store.stats.misses == READS
+    assert 'indexadas' in str(store.stats)
+
+
+def test_screen_list_behaves_like_values_list(tmp_path):
+    make_screens(tmp_path, ['000', '001'])
+    store = ScreenStore(str(tmp_path))
+    screens = screen_list(store)
+    assert isinstance(screens, ScreenList)
+    assert not store.stats.misses
+    assert len(screens) == len(store)
+    assert screens[-1] == store['001']
+    assert screen_list({'A': b'a'}) == [b'a']
+
+
+def test_replay_commands_with_store(tmp_path):
+    make_screens(tmp_path, ['000', '001', '002'])
+    store = ScreenStore(str(tmp_path))
+    state = ReplayState(store, screen_list(store), 0, False)
+    sock = type('Sock', (), {'sendall': print, 'close': print})()
+
+    state = process_command('set 002', sock, '.', state)
+    assert state.screens_list[state.current_screen] == store['002']
+    state = process_command('prev', sock, '.', state)
+    assert state.current_screen == 1
+    state = process_command('next', sock, '.', state)
+    assert state.screens_list[state.current_screen] == store['002']
+
+    state = process_command('add NOVA 1111', sock, '.', state)
+    assert store['NOVA'].startswith(tn3270.START_SCREEN)
+    assert state.screens_list[-1] == store['NOVA']
+    assert len(state.screens_list) == len(store)
+
+
+def test_open_screens_uses_store_for_directories(tmp_path):
+    make_screens(tmp_path, ['000'])
+    assert isinstance(server.open_screens(str(tmp_path)), ScreenStore)
+    empty = tmp_path / 'vazio'
+    empty.mkdir()
+    assert 'START' in server.open_screens(str(empty))
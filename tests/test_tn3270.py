@@ -0,0 +1,97 @@
+from pyx3270 import tn3270
+from pyx3270.tn3270 import TelnetCommand, TelnetFramer, TelnetRecord
+
+EOR = tn3270.IAC + tn3270.TN_EOR
+TTYPE = tn3270.options['TTYPE']
+
+
+def records(events: list) -> list[bytes]:
+    return [
+        bytes(event.data)
+        for event in events
+        if isinstance(event, TelnetRecord)
+    ]
+
+
+def raws(events: list) -> list[bytes]:
+    return [
+        bytes(event.raw) for event in events if isinstance(event, TelnetRecord)
+    ]
+
+
+def test_framer_separates_commands_and_records():
+    framer = TelnetFramer()
+    events = framer.feed(tn3270.START_SCREEN + b'\x11\x40\x40' + EOR)
+    commands = [event for event in events if isinstance(event, TelnetCommand)]
+    assert commands[0] == TelnetCommand(tn3270.DO[0], TTYPE[0])
+    assert commands[1] == TelnetCommand(
+        tn3270.SB[0], TTYPE[0], TTYPE + tn3270.SEND
+    )
+    record = events[-1]
+    assert bytes(record.data) == b'\xf5\x42\x11\x40\x40\x11\x40\x40'
+    assert bytes(record.raw).startswith(tn3270.START_SCREEN)
+    assert bytes(record.raw).endswith(EOR)
+
+
+def test_framer_unescapes_iac_iac_before_eor():
+    framer = TelnetFramer()
+    stream = b'\xf5\xc3' + tn3270.IAC * 2 + tn3270.TN_EOR + b'A' + EOR
+    events = framer.feed(stream)
+    assert records(events) == [b'\xf5\xc3\xff\xefA']
+    assert bytes(events[0].raw) == stream
+
+
+def test_framer_byte_by_byte_matches_single_chunk():
+    stream = (
+        tn3270.START_SCREEN
+        + b'AB'
+        + tn3270.IAC * 2
+        + b'C'
+        + EOR
+        + tn3270.IAC
+        + tn3270.SB
+        + TTYPE
+        + tn3270.IAC * 2
+        + tn3270.IAC
+        + tn3270.SE
+        + b'D'
+        + EOR
+    )
+    whole = TelnetFramer().feed(stream)
+    framer = TelnetFramer()
+    pieces = []
+    for index in range(len(stream)):
+        pieces += framer.feed(stream[index : index + 1])
+    assert records(pieces) == records(whole)
+    assert raws(pieces) == raws(whole)
+    assert pieces[-2] == TelnetCommand(
+        tn3270.SB[0], TTYPE[0], TTYPE + tn3270.IAC
+    )
+
+
+def test_framer_record_in_one_chunk_is_not_copied():
+    data = b'\xf5\xc3ABC' + EOR
+    (record,) = TelnetFramer().feed(data)
+    assert record.data.obj is data
+    assert record.raw.obj is data
+
+
+def test_framer_large_burst():
+    COUNT = 2000
+    screen = b'\xf5\xc3' + b'\x40' * 1920 + EOR
+    framer = TelnetFramer()
+    burst = screen * COUNT
+    assert len(records(framer.feed(burst[:-1]))) == COUNT - 1
+    assert len(records(framer.feed(burst[-1:]))) == 1
+
+
+def test_framer_reused_buffer_with_size():
+    framer = TelnetFramer()
+    buffer = bytearray(64)
+    buffer[:5] = b'AB' + EOR + tn3270.IAC
+    assert records(framer.feed(buffer, 5)) == [b'AB']
+    buffer[:3] = tn3270.IAC + b'C' + tn3270.IAC
+    assert framer.feed(buffer, 3) == []
+    buffer[:1] = tn3270.TN_EOR
+    (record,) = framer.feed(buffer, 1)
+    assert bytes(record.data) == b'\xffC'